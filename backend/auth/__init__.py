@@ -1,14 +1,23 @@
 """Authentication package initialization."""
-from auth.password import verify_password, get_password_hash
+from auth.password import verify_password, get_password_hash, password_hasher, PasswordHasherBusy
 from auth.jwt import create_access_token, create_refresh_token, decode_token
-from auth.rbac import get_current_user, get_current_active_user, require_admin, require_role
+from auth.principals import Principal, principal_cache, bump_principal_version
+from auth.revocation import revocation_list
+from auth.rbac import authenticate, get_current_user, get_current_active_user, require_admin, require_role
 
 __all__ = [
     "verify_password",
     "get_password_hash",
+    "password_hasher",
+    "PasswordHasherBusy",
     "create_access_token",
     "create_refresh_token",
     "decode_token",
+    "Principal",
+    "principal_cache",
+    "bump_principal_version",
+    "revocation_list",
+    "authenticate",
     "get_current_user",
     "get_current_active_user",
     "require_admin",
@@ -1,4 +1,21 @@
+"""Password hashing.
+
+bcrypt is deliberately slow, so request handlers must not call
+:func:`verify_password` / :func:`get_password_hash` on the event loop. They
+await :data:`password_hasher` instead, which runs the work in a dedicated
+process pool. At most ``PASSWORD_HASH_WORKERS`` operations run at once and at
+most ``PASSWORD_HASH_MAX_QUEUE`` wait for a slot; beyond that
+:class:`PasswordHasherBusy` is raised (answered with 503) rather than letting
+logins pile up behind each other.
+"""
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
 from passlib.context import CryptContext
+from config import settings
 
 # Password hashing context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -12,3 +29,104 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     """Hash a password for storing."""
     return pwd_context.hash(password)
+
+
+def _timed(func, *args) -> Tuple[object, float]:
+    # Runs in the worker process; measures only the hashing itself
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many password operations are already waiting."""
+
+
+class PasswordHasher:
+    """Bounded process pool for bcrypt hashing and verification."""
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._waiting = 0
+        # Metrics
+        self.completed = 0
+        self.rejected = 0
+        self.queue_wait_seconds = 0.0
+        self.hash_seconds = 0.0
+        self.max_queue_wait_seconds = 0.0
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "waiting": self._waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "queue_wait_seconds": self.queue_wait_seconds,
+            "hash_seconds": self.hash_seconds,
+            "max_queue_wait_seconds": self.max_queue_wait_seconds,
+        }
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password against its hash in the worker pool."""
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        """Hash a password for storing in the worker pool."""
+        return await self._run(get_password_hash, password)
+
+    def _ensure_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process that already runs threads is unsafe
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def prestart(self) -> None:
+        """Start the worker processes now instead of on the first login.
+
+        Spawned workers take a while to import; this does not wait for them.
+        """
+        executor = self._ensure_executor()
+        for _ in range(self.workers):
+            executor.submit(os.getpid)
+
+    async def _run(self, func, *args):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.workers)
+        self._ensure_executor()
+
+        if self._semaphore.locked() and self._waiting >= self.max_queue:
+            self.rejected += 1
+            raise PasswordHasherBusy()
+
+        queued_at = time.perf_counter()
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+        try:
+            wait = time.perf_counter() - queued_at
+            self.queue_wait_seconds += wait
+            self.max_queue_wait_seconds = max(self.max_queue_wait_seconds, wait)
+            result, elapsed = await asyncio.get_running_loop().run_in_executor(self._executor, _timed, func, *args)
+        finally:
+            self._semaphore.release()
+        self.hash_seconds += elapsed
+        self.completed += 1
+        return result
+
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        self._semaphore = None
+
+
+# Process-wide hasher; the pool starts on first use and is shut down with the application
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
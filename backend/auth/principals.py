@@ -0,0 +1,128 @@
+"""In-process cache of authenticated principals.
+
+``get_current_user`` resolves a token's subject to a :class:`Principal`
+(id, email, role, is_active) and would otherwise read ``users`` on every
+request. Principals are cached per worker with a TTL and an LRU bound.
+
+Changes to a user's role or status bump the ``principals`` row in
+``cache_versions`` in the same transaction. Every worker polls that row every
+``PRINCIPAL_CACHE_POLL_SECONDS`` and ignores entries loaded under an older
+version, so a deactivation takes effect everywhere within one poll interval
+(and within the TTL even if polling stops).
+"""
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import settings
+from database import AsyncSessionLocal
+from database.upsert import increment_statement
+from models import CacheVersion, UserRole
+from services.batching import PeriodicFlusher
+
+logger = logging.getLogger(__name__)
+
+PRINCIPALS = "principals"
+
+
+class Principal:
+    """The subset of a user that authorization needs."""
+
+    __slots__ = ("id", "email", "role", "is_active")
+
+    def __init__(self, id: uuid.UUID, email: str, role: UserRole, is_active: bool):
+        self.id = id
+        self.email = email
+        self.role = role
+        self.is_active = is_active
+
+    def __repr__(self):
+        return f"<Principal {self.email}>"
+
+
+class PrincipalCache(PeriodicFlusher):
+    """TTL + LRU cache of principals, invalidated through a polled version counter."""
+
+    def __init__(self, ttl: float, max_entries: int, poll_interval: float):
+        super().__init__(poll_interval)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.version = 0
+        self._entries: "OrderedDict[uuid.UUID, Tuple[Principal, int, float]]" = OrderedDict()
+        # Counters
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self):
+        return {"entries": len(self._entries), "version": self.version, "hits": self.hits, "misses": self.misses}
+
+    def get(self, user_id: uuid.UUID) -> Optional[Principal]:
+        """Return the cached principal, or None if absent, expired or stale."""
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            principal, version, expires_at = entry
+            if version == self.version and expires_at > time.monotonic():
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return principal
+            del self._entries[user_id]
+        self.misses += 1
+        return None
+
+    def put(self, principal: Principal, version: int) -> None:
+        """Cache ``principal``, loaded while the cache was at ``version``.
+
+        Callers read :attr:`version` *before* querying the database, so a row
+        read concurrently with an invalidation is never cached as current.
+        """
+        if version != self.version:
+            return
+        self._entries[principal.id] = (principal, version, time.monotonic() + self.ttl)
+        self._entries.move_to_end(principal.id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: uuid.UUID) -> None:
+        """Drop one user from this worker's cache."""
+        self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def poll(self) -> None:
+        """Pick up invalidations made by other workers."""
+        async with AsyncSessionLocal() as db:
+            version = await db.scalar(select(CacheVersion.version).where(CacheVersion.name == PRINCIPALS)) or 0
+        if version != self.version:
+            self.version = version
+            self.clear()
+
+    async def flush(self) -> None:
+        await self.poll()
+
+
+async def bump_principal_version(db: AsyncSession) -> None:
+    """Invalidate cached principals in every worker (within the caller's transaction)."""
+    await db.execute(
+        increment_statement(
+            db.bind.dialect.name,
+            CacheVersion.__table__,
+            ("name",),
+            "version",
+            [{"name": PRINCIPALS, "version": 1}],
+        )
+    )
+
+
+# Process-wide cache; polling is started and stopped with the application
+principal_cache = PrincipalCache(
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    poll_interval=settings.PRINCIPAL_CACHE_POLL_SECONDS,
+)
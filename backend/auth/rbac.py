@@ -1,39 +1,80 @@
-from typing import Optional
-from fastapi import Depends, HTTPException, status
+import uuid
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.requests import HTTPConnection
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from database import get_db
 from models import User, UserRole
 from auth.jwt import decode_token
+from auth.principals import Principal, principal_cache
+from auth.revocation import revocation_list
+from services.rollups import rollups
+from services.security import security_monitor
 
 security = HTTPBearer()
 
 
 async def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get the current authenticated user from JWT token."""
-    token = credentials.credentials
+    db: AsyncSession = Depends(get_db)
+) -> Principal:
+    """Get the current authenticated principal from JWT token.
+    
+    The principal is served from the in-process cache when possible, so most
+    requests never read the users table.
+    """
+    return await authenticate(request, credentials.credentials, db)
+
+
+async def authenticate(request: HTTPConnection, token: str, db: AsyncSession) -> Principal:
+    """Resolve an access token to its principal, raising 401/403 like ``get_current_user``.
+
+    ``request`` may also be a WebSocket, whose token cannot come from a header.
+    """
     payload = decode_token(token)
     
     if payload is None or payload.get("type") != "access":
+        security_monitor.invalid_token(request, "undecodable" if payload is None else "wrong_type")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user_id: str = payload.get("sub")
+    jti = payload.get("jti")
+    if jti is not None and await revocation_list.is_revoked(db, jti):
+        security_monitor.invalid_token(request, "revoked")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    try:
+        user_id = uuid.UUID(payload.get("sub"))
+    except (TypeError, ValueError):
+        user_id = None
     if user_id is None:
+        security_monitor.invalid_token(request, "bad_subject")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = principal_cache.get(user_id)
+    if user is None:
+        version = principal_cache.version
+        row = (await db.execute(
+            select(User.id, User.email, User.role, User.is_active).where(User.id == user_id)
+        )).first()
+        if row is not None:
+            user = Principal(*row)
+            principal_cache.put(user, version)
     if user is None:
+        security_monitor.invalid_token(request, "unknown_user")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
@@ -46,20 +87,24 @@ async def get_current_user(
             detail="Inactive user"
         )
     
+    # Kept for endpoints that act on the token itself (e.g. logout)
+    request.state.token_payload = payload
+    rollups.mark_active(user.id)
     return user
 
 
 async def get_current_active_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: Principal = Depends(get_current_user)
+) -> Principal:
     """Get current active user."""
     return current_user
 
 
 def require_role(required_role: UserRole):
     """Dependency to require a specific role."""
-    async def role_checker(current_user: User = Depends(get_current_user)) -> User:
+    async def role_checker(request: Request, current_user: Principal = Depends(get_current_user)) -> Principal:
         if current_user.role != required_role and current_user.role != UserRole.ADMIN:
+            security_monitor.forbidden(request, current_user.id, required_role.value)
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Insufficient permissions"
@@ -68,9 +113,10 @@ def require_role(required_role: UserRole):
     return role_checker
 
 
-def require_admin(current_user: User = Depends(get_current_user)) -> User:
+async def require_admin(request: Request, current_user: Principal = Depends(get_current_user)) -> Principal:
     """Dependency to require admin role."""
     if current_user.role != UserRole.ADMIN:
+        security_monitor.forbidden(request, current_user.id, UserRole.ADMIN.value)
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admin access required"
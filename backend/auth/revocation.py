@@ -0,0 +1,180 @@
+"""Server-side JWT revocation.
+
+Every token carries a ``jti``. Revoking a token stores its ``jti`` in
+``revoked_tokens`` until the token's own ``exp``; ``get_current_user`` then
+checks the ``jti`` against :data:`revocation_list` without touching the
+database in the common case:
+
+* a bloom filter holds every unexpired revoked ``jti`` and answers "certainly
+  not revoked" for almost every token;
+* a small exact LRU map holds recent revocations and confirmed lookups, so a
+  bloom positive only reaches the database (one primary-key lookup) the first
+  time a worker sees that ``jti``.
+
+Workers pick up each other's revocations by polling ``revoked_tokens`` for
+rows newer than the last one seen (an index range scan that usually returns
+nothing). The filter is rebuilt every ``REVOCATION_REBUILD_SECONDS``, which is
+also when expired rows are purged. Until the first load completes, lookups
+fall back to the database so nothing is missed at startup.
+"""
+import hashlib
+import math
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import settings
+from database import AsyncSessionLocal
+from database.upsert import dialect_insert
+from models import RevokedToken
+from services.batching import PeriodicFlusher
+
+# Re-read revocations this far behind the newest one seen, to tolerate clock
+# skew between workers and transactions that commit out of order
+POLL_OVERLAP = timedelta(seconds=30)
+
+
+class BloomFilter:
+    """Fixed-size bloom filter over strings (double hashing on one blake2b digest)."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RevocationList(PeriodicFlusher):
+    """Per-worker view of ``revoked_tokens``, refreshed by polling."""
+
+    def __init__(self, capacity: int, error_rate: float, exact_max: int, poll_interval: float, rebuild_interval: float):
+        super().__init__(poll_interval)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.exact_max = exact_max
+        self.rebuild_interval = rebuild_interval
+        self._bloom = BloomFilter(capacity, error_rate)
+        # jti -> (revoked, expires_at)
+        self._exact: "OrderedDict[str, Tuple[bool, Optional[datetime]]]" = OrderedDict()
+        self._loaded = False
+        self._watermark: Optional[datetime] = None
+        self._next_rebuild = 0.0
+        # Counters
+        self.checks = 0
+        self.db_lookups = 0
+
+    def stats(self):
+        return {
+            "loaded": self._loaded,
+            "bloom_entries": self._bloom.count,
+            "exact_entries": len(self._exact),
+            "checks": self.checks,
+            "db_lookups": self.db_lookups,
+        }
+
+    def _remember(self, jti: str, revoked: bool, expires_at: Optional[datetime]) -> None:
+        self._exact[jti] = (revoked, expires_at)
+        self._exact.move_to_end(jti)
+        while len(self._exact) > self.exact_max:
+            self._exact.popitem(last=False)
+
+    def _add(self, jti: str, expires_at: datetime) -> None:
+        self._bloom.add(jti)
+        self._remember(jti, True, expires_at)
+
+    async def is_revoked(self, db: AsyncSession, jti: str) -> bool:
+        """Whether ``jti`` was revoked; reads the database only on a filter hit."""
+        self.checks += 1
+        entry = self._exact.get(jti)
+        if entry is not None:
+            self._exact.move_to_end(jti)
+            return entry[0]
+        if self._loaded and jti not in self._bloom:
+            return False
+
+        self.db_lookups += 1
+        expires_at = await db.scalar(select(RevokedToken.expires_at).where(RevokedToken.jti == jti))
+        self._remember(jti, expires_at is not None, expires_at)
+        return expires_at is not None
+
+    async def revoke(self, db: AsyncSession, jti: str, user_id: Optional[uuid.UUID], expires_at: datetime) -> None:
+        """Revoke a token (within the caller's transaction) and reject it locally at once."""
+        await db.execute(
+            dialect_insert(db.bind.dialect.name, RevokedToken.__table__)
+            .values(jti=jti, user_id=user_id, expires_at=expires_at, revoked_at=datetime.utcnow())
+            .on_conflict_do_nothing()
+        )
+        self._add(jti, expires_at)
+
+    async def load(self) -> None:
+        """Purge expired revocations and rebuild the filter from the table."""
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(RevokedToken).where(RevokedToken.expires_at < now))
+            await db.commit()
+            rows = (await db.execute(
+                select(RevokedToken.jti, RevokedToken.expires_at, RevokedToken.revoked_at)
+                .where(RevokedToken.expires_at >= now)
+            )).all()
+
+        for jti in [jti for jti, (_, expires_at) in self._exact.items() if expires_at is not None and expires_at < now]:
+            del self._exact[jti]
+        # Revocations made locally while loading are only in the exact map so far
+        revoked = {jti for jti, _, _ in rows}
+        revoked.update(jti for jti, (is_revoked, _) in self._exact.items() if is_revoked)
+
+        bloom = BloomFilter(max(self.capacity, 2 * len(revoked)), self.error_rate)
+        for jti in revoked:
+            bloom.add(jti)
+        self._bloom = bloom
+        for jti, expires_at, _ in rows:
+            self._remember(jti, True, expires_at)
+
+        self._watermark = max((revoked_at for _, _, revoked_at in rows), default=now)
+        self._loaded = True
+        self._next_rebuild = time.monotonic() + self.rebuild_interval
+
+    async def poll(self) -> None:
+        """Pick up revocations made by other workers."""
+        if not self._loaded or time.monotonic() >= self._next_rebuild:
+            await self.load()
+            return
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(
+                select(RevokedToken.jti, RevokedToken.expires_at, RevokedToken.revoked_at)
+                .where(RevokedToken.revoked_at > self._watermark - POLL_OVERLAP)
+            )).all()
+        for jti, expires_at, revoked_at in rows:
+            if jti not in self._bloom or not self._exact.get(jti, (False,))[0]:
+                self._add(jti, expires_at)
+            self._watermark = max(self._watermark, revoked_at)
+
+    async def flush(self) -> None:
+        await self.poll()
+
+
+# Process-wide revocation list; polling is started and stopped with the application
+revocation_list = RevocationList(
+    capacity=settings.REVOCATION_BLOOM_CAPACITY,
+    error_rate=settings.REVOCATION_BLOOM_ERROR_RATE,
+    exact_max=settings.REVOCATION_EXACT_MAX,
+    poll_interval=settings.REVOCATION_POLL_SECONDS,
+    rebuild_interval=settings.REVOCATION_REBUILD_SECONDS,
+)
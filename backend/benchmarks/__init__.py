@@ -0,0 +1,8 @@
+"""Performance benchmarks (not part of the test suite).
+
+* ``seed``: bulk dataset seeder;
+* ``loadgen``: HTTP load generator with scenarios;
+* ``startup``: import and startup time against a budget;
+* ``bench_*.py``: pytest-benchmark microbenchmarks (``pytest benchmarks``);
+* ``serialization``, ``middleware``: standalone before/after comparisons.
+"""
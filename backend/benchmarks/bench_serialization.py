@@ -0,0 +1,37 @@
+"""Microbenchmarks: rendering a task list page (see :mod:`benchmarks.serialization`)."""
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+from database.session import Base
+from models import Task
+from schemas.payloads import TASK_RESPONSE_COLUMNS
+from benchmarks.serialization import fast_render, pydantic_render, seed
+
+PAGE_SIZE = 100
+
+
+@pytest.fixture(scope="module")
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.info["user_id"] = seed(session, PAGE_SIZE)
+        yield session
+
+
+@pytest.fixture(scope="module")
+def rows(session):
+    return session.execute(select(*TASK_RESPONSE_COLUMNS).where(Task.user_id == session.info["user_id"])).all()
+
+
+@pytest.fixture(scope="module")
+def tasks(session):
+    return session.scalars(select(Task).where(Task.user_id == session.info["user_id"])).all()
+
+
+def test_rows_orjson(benchmark, rows):
+    benchmark(fast_render, rows)
+
+
+def test_orm_pydantic(benchmark, tasks):
+    benchmark(pydantic_render, tasks)
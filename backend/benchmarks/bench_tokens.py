@@ -0,0 +1,29 @@
+"""Microbenchmarks: the token and principal checks every authenticated request makes."""
+import uuid
+import pytest
+from auth import Principal, create_access_token, decode_token, principal_cache
+from models import UserRole
+
+
+@pytest.fixture(scope="module")
+def token():
+    return create_access_token({"sub": str(uuid.uuid4())})
+
+
+def test_create_access_token(benchmark):
+    subject = {"sub": str(uuid.uuid4())}
+    benchmark(create_access_token, subject)
+
+
+def test_decode_token(benchmark, token):
+    assert benchmark(decode_token, token) is not None
+
+
+def test_decode_invalid_token(benchmark, token):
+    assert benchmark(decode_token, token[:-4] + "AAAA") is None
+
+
+def test_principal_cache_hit(benchmark):
+    principal = Principal(uuid.uuid4(), "bench@example.com", UserRole.USER, True)
+    principal_cache.put(principal, principal_cache.version)
+    assert benchmark(principal_cache.get, principal.id) is principal
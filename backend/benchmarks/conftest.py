@@ -0,0 +1,31 @@
+"""pytest configuration for the microbenchmarks.
+
+The ``bench_*.py`` modules are collected only when ``benchmarks`` is given
+explicitly, so they never run with the test suite::
+
+    python -m pytest benchmarks -o addopts="" --benchmark-autosave
+    python -m pytest benchmarks -o addopts="" --benchmark-compare     # against the last saved run
+    pytest-benchmark compare --group-by=name                          # table of all saved runs
+
+``--benchmark-autosave`` stores results as JSON under ``.benchmarks/``, named
+after the commit they were run on.
+"""
+import os
+from pathlib import Path
+import pytest
+
+# Settings are required at import time; nothing here connects to a database
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+
+
+def _collect_directory(config) -> bool:
+    # Explicitly named files are collected by pytest itself
+    return any(Path(arg.split("::")[0]).resolve() == BENCHMARKS_DIR for arg in config.args)
+
+
+def pytest_collect_file(file_path, parent):
+    if file_path.suffix == ".py" and file_path.name.startswith("bench_") and _collect_directory(parent.config):
+        return pytest.Module.from_parent(parent, path=file_path)
@@ -0,0 +1,281 @@
+"""Async HTTP load generator with scenarios over a seeded dataset.
+
+Each of ``--concurrency`` virtual users logs in as one of the seeded
+accounts (see :mod:`benchmarks.seed`) and issues requests back to back for
+``--duration`` seconds; a scenario is a weighted mix of operations:
+
+* ``login_storm``: password logins only (bcrypt bound);
+* ``dashboard``: first task page, stats and facets, as the dashboard loads them;
+* ``search``: full-text task search, sometimes with status or tag filters;
+* ``mixed``: reads plus creates, updates, status changes and deletes.
+
+Throughput and p50/p95/p99 latency are reported per operation and saved as
+JSON, which ``--compare`` diffs against an earlier run::
+
+    python -m benchmarks.loadgen mixed --base-url http://localhost:8000 --output after.json --compare before.json
+
+``--in-process`` drives the ASGI app directly instead of a server (no
+network, handy on SQLite). Disable rate limiting on the target
+(``RATE_LIMIT_ENABLED=false``), or it will answer most requests with 429.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import subprocess
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+import httpx
+from benchmarks.seed import DEFAULT_PASSWORD, TAGS, WORDS, user_email
+
+API = "/api/v1"
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))]
+
+
+class VirtualUser:
+    """One seeded account issuing requests in a loop."""
+
+    def __init__(self, client: httpx.AsyncClient, email: str, password: str, rng: random.Random):
+        self.client = client
+        self.email = email
+        self.password = password
+        self.rng = rng
+        self.headers: Dict[str, str] = {}
+        self.task_ids: List[str] = []
+
+    async def login(self) -> httpx.Response:
+        response = await self.client.post(f"{API}/auth/login", json={"email": self.email, "password": self.password})
+        if response.status_code == 200:
+            self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        return response
+
+    async def list_tasks(self) -> httpx.Response:
+        response = await self.client.get(f"{API}/tasks", params={"page_size": 20}, headers=self.headers)
+        if response.status_code == 200:
+            self.task_ids = [task["id"] for task in response.json()["tasks"]] or self.task_ids
+        return response
+
+    async def task_stats(self) -> httpx.Response:
+        return await self.client.get(f"{API}/tasks/stats", headers=self.headers)
+
+    async def task_facets(self) -> httpx.Response:
+        return await self.client.get(f"{API}/tasks/facets", headers=self.headers)
+
+    async def search(self) -> httpx.Response:
+        params = {"search": " ".join(self.rng.sample(WORDS, self.rng.choice((1, 1, 2)))), "page_size": 20}
+        roll = self.rng.random()
+        if roll < 0.2:
+            params["status"] = self.rng.choice(["todo", "in_progress"])
+        elif roll < 0.3:
+            params["tags"] = self.rng.choice(TAGS)
+        return await self.client.get(f"{API}/tasks", params=params, headers=self.headers)
+
+    async def get_task(self) -> httpx.Response:
+        if not self.task_ids:
+            return await self.list_tasks()
+        return await self.client.get(f"{API}/tasks/{self.rng.choice(self.task_ids)}", headers=self.headers)
+
+    async def create_task(self) -> httpx.Response:
+        response = await self.client.post(f"{API}/tasks", headers=self.headers, json={
+            "title": " ".join(self.rng.sample(WORDS, 4)).capitalize(),
+            "description": " ".join(self.rng.choices(WORDS, k=20)),
+            "priority": self.rng.choice(["low", "medium", "high"]),
+            "tags": self.rng.sample(TAGS, 2),
+        })
+        if response.status_code == 201:
+            self.task_ids.append(response.json()["id"])
+        return response
+
+    async def update_task(self) -> httpx.Response:
+        if not self.task_ids:
+            return await self.create_task()
+        return await self.client.put(
+            f"{API}/tasks/{self.rng.choice(self.task_ids)}", headers=self.headers,
+            json={"title": " ".join(self.rng.sample(WORDS, 3)).capitalize()},
+        )
+
+    async def change_status(self) -> httpx.Response:
+        if not self.task_ids:
+            return await self.create_task()
+        return await self.client.patch(
+            f"{API}/tasks/{self.rng.choice(self.task_ids)}/status", headers=self.headers,
+            json={"status": self.rng.choice(["todo", "in_progress", "done"])},
+        )
+
+    async def delete_task(self) -> httpx.Response:
+        if not self.task_ids:
+            return await self.create_task()
+        task_id = self.task_ids.pop(self.rng.randrange(len(self.task_ids)))
+        return await self.client.delete(f"{API}/tasks/{task_id}", headers=self.headers)
+
+
+# Scenario -> operation -> weight
+SCENARIOS: Dict[str, Dict[str, int]] = {
+    "login_storm": {"login": 1},
+    "dashboard": {"list_tasks": 5, "task_stats": 2, "task_facets": 1},
+    "search": {"search": 1},
+    "mixed": {
+        "list_tasks": 4, "get_task": 3, "search": 1, "create_task": 2,
+        "update_task": 1, "change_status": 1, "delete_task": 1,
+    },
+}
+
+
+class Recorder:
+    """Latencies and failures per operation."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    def record(self, operation: str, seconds: float, status_code: Optional[int]) -> None:
+        self.latencies[operation].append(seconds)
+        if status_code is not None:
+            self.statuses[operation][status_code] += 1
+        if status_code is None or status_code >= 400:
+            self.errors[operation] += 1
+
+    def summary(self, duration: float) -> Dict[str, Dict]:
+        operations = {}
+        everything = []
+        for operation, latencies in sorted(self.latencies.items()):
+            everything.extend(latencies)
+            operations[operation] = self._stats(sorted(latencies), self.errors[operation], duration)
+            operations[operation]["statuses"] = {str(code): count for code, count in self.statuses[operation].items()}
+        operations["total"] = self._stats(sorted(everything), sum(self.errors.values()), duration)
+        return operations
+
+    @staticmethod
+    def _stats(latencies: List[float], errors: int, duration: float) -> Dict[str, float]:
+        return {
+            "requests": len(latencies),
+            "errors": errors,
+            "rps": round(len(latencies) / duration, 2) if duration else 0.0,
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+            "max_ms": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        }
+
+
+async def run_user(user: VirtualUser, scenario: Dict[str, int], recorder: Recorder,
+                   measure_from: float, deadline: float) -> None:
+    operations, weights = zip(*scenario.items())
+    if operations != ("login",):
+        await user.login()
+    while time.perf_counter() < deadline:
+        operation = user.rng.choices(operations, weights)[0]
+        started = time.perf_counter()
+        try:
+            status_code = (await getattr(user, operation)()).status_code
+        except httpx.HTTPError:
+            status_code = None
+        if started >= measure_from:
+            recorder.record(operation, time.perf_counter() - started, status_code)
+
+
+async def run(args, client_factory: Callable[[], httpx.AsyncClient]) -> Tuple[Dict, float]:
+    rng = random.Random(args.seed)
+    recorder = Recorder()
+    async with client_factory() as client:
+        users = [
+            VirtualUser(client, user_email(rng.randrange(args.users)), args.password, random.Random(rng.random()))
+            for _ in range(args.concurrency)
+        ]
+        started = time.perf_counter()
+        measure_from = started + args.warmup
+        deadline = measure_from + args.duration
+        await asyncio.gather(*(
+            run_user(user, SCENARIOS[args.scenario], recorder, measure_from, deadline) for user in users
+        ))
+    return recorder.summary(args.duration), args.duration
+
+
+async def run_in_process(args) -> Tuple[Dict, float]:
+    from main import app
+
+    async with app.router.lifespan_context(app):
+        return await run(args, lambda: httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://benchmark", timeout=args.timeout,
+        ))
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results: Dict[str, Dict], baseline: Optional[Dict[str, Dict]] = None) -> None:
+    columns = ("requests", "errors", "rps", "p50_ms", "p95_ms", "p99_ms", "max_ms")
+    print(f"{'operation':15s}" + "".join(f"{column:>12s}" for column in columns))
+    for operation, stats in results.items():
+        print(f"{operation:15s}" + "".join(f"{stats[column]:>12}" for column in columns))
+        before = (baseline or {}).get(operation)
+        if before:
+            deltas = []
+            for column in columns[2:]:
+                old, new = before[column], stats[column]
+                deltas.append(f"{(new - old) / old * 100:+11.1f}%" if old else f"{'n/a':>12s}")
+            print(f"{'  vs baseline':15s}{'':24s}" + "".join(deltas))
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="HTTP load generator.")
+    parser.add_argument("scenario", choices=sorted(SCENARIOS))
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--in-process", action="store_true", help="drive main.app over ASGI instead of HTTP")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="unmeasured seconds before that")
+    parser.add_argument("--users", type=int, default=1000, help="seeded accounts to pick from")
+    parser.add_argument("--password", default=DEFAULT_PASSWORD)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    args = parser.parse_args(argv)
+
+    if args.in_process:
+        results, duration = asyncio.run(run_in_process(args))
+    else:
+        results, duration = asyncio.run(run(args, lambda: httpx.AsyncClient(
+            base_url=args.base_url, timeout=args.timeout,
+            limits=httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency),
+        )))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "scenario": args.scenario,
+                "target": "in-process" if args.in_process else args.base_url,
+                "concurrency": args.concurrency,
+                "duration": duration,
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "created_at": datetime.utcnow().isoformat() + "Z",
+                "results": results,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
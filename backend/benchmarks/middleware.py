@@ -0,0 +1,93 @@
+"""Microbenchmark: per-request cost of the security headers middleware.
+
+Calls a minimal ``/health`` app directly over ASGI (no server, no client)
+with no middleware, with the previous ``@app.middleware("http")`` hook
+(Starlette's ``BaseHTTPMiddleware``) and with :class:`SecurityHeadersMiddleware`,
+and reports the overhead each adds per request::
+
+    python -m benchmarks.middleware [--requests 20000]
+"""
+import argparse
+import asyncio
+import time
+from fastapi import FastAPI, Request
+from middleware import DEFAULT_SECURITY_HEADERS, SecurityHeadersMiddleware
+
+
+def build_app(variant: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    if variant == "base_http_middleware":
+        @app.middleware("http")
+        async def add_security_headers(request: Request, call_next):
+            response = await call_next(request)
+            for name, value in DEFAULT_SECURITY_HEADERS.items():
+                response.headers[name] = value
+            return response
+    elif variant == "asgi":
+        app.add_middleware(SecurityHeadersMiddleware)
+    return app
+
+
+async def measure(app, requests: int) -> float:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/health",
+        "raw_path": b"/health",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("bench", 80),
+    }
+
+    never = asyncio.Event()
+
+    async def send(message):
+        pass
+
+    async def request():
+        # Like a server: deliver the (empty) body once, then wait for a disconnect that never comes
+        delivered = False
+
+        async def receive():
+            nonlocal delivered
+            if not delivered:
+                delivered = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await never.wait()
+
+        await app(dict(scope), receive, send)
+
+    for _ in range(200):  # warm up (middleware stack build, route compilation)
+        await request()
+    started = time.perf_counter()
+    for _ in range(requests):
+        await request()
+    return (time.perf_counter() - started) / requests
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Security headers middleware benchmark.")
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    results = {}
+    for variant in ("none", "base_http_middleware", "asgi"):
+        results[variant] = min(asyncio.run(measure(build_app(variant), args.requests)) for _ in range(3))
+
+    baseline = results["none"]
+    for variant, seconds in results.items():
+        print(f"{variant:22s} {seconds * 1e6:8.1f} us/request  (+{(seconds - baseline) * 1e6:6.1f} us)")
+
+
+if __name__ == "__main__":
+    main()
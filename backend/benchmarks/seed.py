@@ -0,0 +1,233 @@
+"""Bulk seeder: realistic users, tasks and activity logs at benchmark scale.
+
+Writes to ``DATABASE_URL`` (SQLite or PostgreSQL), migrating the schema
+first. Rows are generated in batches from a seeded RNG, so a given
+``--seed`` always produces the same dataset, and streamed in with
+PostgreSQL ``COPY`` or, on SQLite, multi-row executemany in one transaction
+per batch. Afterwards the per-user task counters and analytics totals are
+rebuilt so the stats endpoints match the data::
+
+    DATABASE_URL=postgresql://... python -m benchmarks.seed --users 10000 --tasks 1000000
+
+Task ownership is skewed (a few users own many tasks, like real accounts),
+statuses and priorities follow a realistic mix, and every user can log in
+as ``user<N>@bench.example.com`` with ``--password``; ``user0`` is an admin.
+"""
+import argparse
+import asyncio
+import csv
+import io
+import itertools
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List
+from sqlalchemy import Table
+from database import AsyncSessionLocal, async_engine, engine
+from database.migrations import upgrade_database
+from models import ActivityLog, Task, TaskPriority, TaskStatus, User, UserRole
+from auth import get_password_hash
+from services.rollups import reconcile_totals
+from services.task_stats import rebuild_task_stats
+
+DEFAULT_PASSWORD = "benchmark-password"
+EMAIL_DOMAIN = "bench.example.com"
+
+WORDS = (
+    "review update deploy fix write plan migrate refactor test document design release invoice budget "
+    "meeting report customer backlog sprint roadmap onboarding security audit database api frontend "
+    "backend cache search performance incident dashboard analytics billing email notification"
+).split()
+CATEGORIES = ["work", "personal", "finance", "health", "errands", "learning", "ops", "sales",
+              "support", "hiring", "travel", "home"]
+TAGS = ["urgent", "blocked", "waiting", "quick", "deep-work", "q1", "q2", "q3", "q4", "client",
+        "internal", "bug", "feature", "chore", "research", "meeting", "follow-up", "someday", "weekly", "review"]
+ACTIONS = ["task_created", "task_updated", "task_status_changed", "task_deleted"]
+
+STATUS_WEIGHTS = {TaskStatus.TODO: 30, TaskStatus.IN_PROGRESS: 15, TaskStatus.DONE: 55}
+PRIORITY_WEIGHTS = {TaskPriority.LOW: 25, TaskPriority.MEDIUM: 45, TaskPriority.HIGH: 22, TaskPriority.CRITICAL: 8}
+
+
+def user_email(index: int) -> str:
+    return f"user{index}@{EMAIL_DOMAIN}"
+
+
+class DatasetGenerator:
+    """Deterministic row generator for one dataset."""
+
+    def __init__(self, seed: int, users: int, tasks: int, logs_per_task: float, password_hash: str):
+        self.rng = random.Random(seed)
+        self.users = users
+        self.tasks = tasks
+        self.logs_per_task = logs_per_task
+        self.password_hash = password_hash
+        self.now = datetime.utcnow().replace(microsecond=0)
+        self.user_ids: List[uuid.UUID] = []
+        # Pareto weights: a long tail of light users and a few heavy ones
+        weights = [self.rng.paretovariate(1.5) for _ in range(users)]
+        self.cum_weights = list(itertools.accumulate(weights))
+
+    def _uuid(self) -> uuid.UUID:
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def _timestamp(self, days: int) -> datetime:
+        return self.now - timedelta(seconds=self.rng.randrange(days * 86400))
+
+    def _sentence(self, low: int, high: int) -> str:
+        return " ".join(self.rng.choices(WORDS, k=self.rng.randint(low, high))).capitalize()
+
+    def user_rows(self) -> Iterator[Dict]:
+        for index in range(self.users):
+            user_id = self._uuid()
+            self.user_ids.append(user_id)
+            created_at = self._timestamp(730)
+            yield {
+                "id": user_id,
+                "email": user_email(index),
+                "password_hash": self.password_hash,
+                "full_name": f"Bench User {index}",
+                "role": UserRole.ADMIN if index == 0 else UserRole.USER,
+                "is_active": self.rng.random() > 0.02,
+                "created_at": created_at,
+                "updated_at": created_at,
+            }
+
+    def task_and_log_rows(self) -> Iterator[tuple]:
+        """Yield ``(task, logs)`` pairs; users must have been generated first."""
+        rng = self.rng
+        statuses, status_weights = zip(*STATUS_WEIGHTS.items())
+        priorities, priority_weights = zip(*PRIORITY_WEIGHTS.items())
+        for _ in range(self.tasks):
+            user_id = rng.choices(self.user_ids, cum_weights=self.cum_weights)[0]
+            created_at = self._timestamp(365)
+            status = rng.choices(statuses, status_weights)[0]
+            updated_at = min(created_at + timedelta(hours=rng.randrange(24 * 30)), self.now)
+            task = {
+                "id": self._uuid(),
+                "user_id": user_id,
+                "title": self._sentence(2, 7),
+                "description": self._sentence(5, 60) if rng.random() < 0.7 else None,
+                "priority": rng.choices(priorities, priority_weights)[0],
+                "status": status,
+                "category": rng.choice(CATEGORIES) if rng.random() < 0.8 else None,
+                "tags": rng.sample(TAGS, rng.choice((0, 1, 1, 2, 2, 3, 4))),
+                "due_date": created_at + timedelta(days=rng.randrange(-10, 60)) if rng.random() < 0.6 else None,
+                "created_at": created_at,
+                "updated_at": updated_at,
+            }
+            # logs_per_task audit entries per task on average
+            logs = []
+            count = int(self.logs_per_task) + (rng.random() < self.logs_per_task % 1)
+            for index in range(count):
+                logs.append({
+                    "id": self._uuid(),
+                    "user_id": user_id,
+                    "task_id": task["id"],
+                    "action": ACTIONS[0] if index == 0 else rng.choice(ACTIONS[1:3]),
+                    "details": {"title": task["title"]},
+                    "ip_address": f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}",
+                    "user_agent": "benchmarks.seed",
+                    "created_at": min(created_at + timedelta(minutes=index * rng.randrange(1, 600)), self.now),
+                })
+            yield task, logs
+
+
+def batched(rows: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(rows)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def _copy_value(value):
+    if value is None:
+        return None
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if isinstance(value, (TaskStatus, TaskPriority, UserRole)):
+        # SQLAlchemy stores Python enums by member name
+        return value.name
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    return str(value)
+
+
+class BulkWriter:
+    """Writes row batches with COPY on PostgreSQL and executemany elsewhere."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.postgres = connection.dialect.name == "postgresql"
+        if connection.dialect.name == "sqlite":
+            connection.exec_driver_sql("PRAGMA synchronous=OFF")
+
+    def write(self, table: Table, rows: List[Dict]) -> None:
+        if not rows:
+            return
+        if not self.postgres:
+            self.connection.execute(table.insert(), rows)
+            return
+        columns = list(rows[0])
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            # COPY's CSV format reads an unquoted empty field as NULL
+            writer.writerow(["" if (value := _copy_value(row[column])) is None else value for column in columns])
+        buffer.seek(0)
+        cursor = self.connection.connection.cursor()
+        try:
+            cursor.copy_expert(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        finally:
+            cursor.close()
+
+
+async def rebuild_derived_data() -> None:
+    async with AsyncSessionLocal() as db:
+        await rebuild_task_stats(db)
+        await reconcile_totals(db)
+    await async_engine.dispose()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Seed the database with a benchmark dataset.")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--logs-per-task", type=float, default=2.0)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--password", default=DEFAULT_PASSWORD)
+    args = parser.parse_args(argv)
+
+    upgrade_database()
+    generator = DatasetGenerator(args.seed, args.users, args.tasks, args.logs_per_task, get_password_hash(args.password))
+    started = time.perf_counter()
+    counts = {"users": 0, "tasks": 0, "activity_logs": 0}
+
+    with engine.begin() as connection:
+        writer = BulkWriter(connection)
+        for batch in batched(generator.user_rows(), args.batch_size):
+            writer.write(User.__table__, batch)
+            counts["users"] += len(batch)
+
+    for batch in batched(generator.task_and_log_rows(), args.batch_size):
+        # One transaction per batch keeps memory and WAL growth bounded at any scale
+        with engine.begin() as connection:
+            writer = BulkWriter(connection)
+            tasks = [task for task, _ in batch]
+            logs = [log for _, task_logs in batch for log in task_logs]
+            writer.write(Task.__table__, tasks)
+            writer.write(ActivityLog.__table__, logs)
+        counts["tasks"] += len(tasks)
+        counts["activity_logs"] += len(logs)
+        elapsed = time.perf_counter() - started
+        print(f"\r{counts['tasks']:,}/{args.tasks:,} tasks ({counts['tasks'] / elapsed:,.0f}/s)", end="", flush=True)
+    print()
+
+    asyncio.run(rebuild_derived_data())
+    elapsed = time.perf_counter() - started
+    print(", ".join(f"{count:,} {name}" for name, count in counts.items()) + f" in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Cold start budget: how long a new worker takes before it can serve.
+
+Two phases are timed, each in a fresh interpreter so nothing is cached:
+
+* ``import``: ``import main`` (every module the app pulls in; no I/O);
+* ``startup``: the lifespan handler (pool warm-up, cache priming, background
+  tasks) up to the first answered request.
+
+The database must already be migrated. With budgets the script exits 1 when
+the median of ``--runs`` exceeds one, which is how CI keeps cold starts from
+creeping up::
+
+    python -m benchmarks.startup --runs 5 --import-budget-ms 1500 --startup-budget-ms 500
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from typing import Dict
+
+PROBE = """
+import asyncio, json, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def serve():
+    import httpx
+    async with main.app.router.lifespan_context(main.app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://startup") as client:
+            (await client.get("/health")).raise_for_status()
+        ready = time.perf_counter()
+    return ready
+
+ready = asyncio.run(serve())
+print(json.dumps({"import_ms": (imported - started) * 1000, "startup_ms": (ready - imported) * 1000}))
+"""
+
+
+def measure_once() -> Dict[str, float]:
+    result = subprocess.run([sys.executable, "-c", PROBE], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Measure app import and startup time.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-budget-ms", type=float, help="fail when the median import takes longer")
+    parser.add_argument("--startup-budget-ms", type=float, help="fail when the median startup takes longer")
+    args = parser.parse_args(argv)
+
+    runs = [measure_once() for _ in range(args.runs)]
+    over_budget = False
+    for phase, budget in (("import_ms", args.import_budget_ms), ("startup_ms", args.startup_budget_ms)):
+        values = sorted(run[phase] for run in runs)
+        median = statistics.median(values)
+        verdict = ""
+        if budget is not None:
+            verdict = f"  budget {budget:.0f} ms: " + ("OVER" if median > budget else "ok")
+            over_budget |= median > budget
+        print(f"{phase[:-3]:8s} median {median:8.1f} ms  min {values[0]:8.1f}  max {values[-1]:8.1f}{verdict}")
+    if over_budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from typing import Optional
 from pydantic_settings import BaseSettings
 from pydantic import PostgresDsn, field_validator
@@ -19,19 +20,118 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
     
+    # Token revocation
+    REVOCATION_BLOOM_CAPACITY: int = 100000
+    REVOCATION_BLOOM_ERROR_RATE: float = 0.001
+    REVOCATION_EXACT_MAX: int = 10000
+    REVOCATION_POLL_SECONDS: float = 2.0
+    REVOCATION_REBUILD_SECONDS: float = 3600.0
+    
+    # Password hashing pool
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 100
+    
+    # Authenticated-user cache
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 30.0
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+    PRINCIPAL_CACHE_POLL_SECONDS: float = 2.0
+    
     # Database
     DATABASE_URL: str
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0  # seconds to wait for a connection before failing
+    DB_POOL_RECYCLE: int = 1800  # reconnect after this many seconds (-1: never)
+    DB_WARMUP_CONNECTIONS: int = 5  # opened at startup, capped at the pool size
+    MIGRATE_ON_STARTUP: bool = False  # migrate from every worker's lifespan (serialized on PostgreSQL)
+    
+    # Read replicas (read-only routes use them; unset pool options fall back to the primary's)
+    DATABASE_REPLICA_URLS: list[str] = []
+    DB_REPLICA_POOL_SIZE: Optional[int] = None
+    DB_REPLICA_MAX_OVERFLOW: Optional[int] = None
+    DB_REPLICA_POOL_TIMEOUT: Optional[float] = None
+    DB_REPLICA_POOL_RECYCLE: Optional[int] = None
+    REPLICA_HEALTH_CHECK_SECONDS: float = 5.0
+    REPLICA_MAX_LAG_SECONDS: float = 10.0  # eject replicas further behind than this (PostgreSQL)
+    READ_YOUR_WRITES_SECONDS: float = 5.0  # read a user's own writes from the primary for this long
+    
+    # Reverse proxies (addresses or CIDR networks) whose X-Forwarded-For / X-Forwarded-Proto
+    # are trusted; the client address feeds per-IP rate limits, brute-force detection and audit logs
+    TRUSTED_PROXIES: list[str] = []
     
     # CORS
     CORS_ORIGINS: list[str] = ["http://localhost:3000", "http://localhost:5173"]
     
-    # Rate Limiting
-    RATE_LIMIT_PER_MINUTE: int = 60
+    # Task statistics
+    TASK_DUE_SOON_HOURS: int = 48
+    
+    # Delta sync (GET /tasks/changes): deletes are reported for this long
+    TASK_TOMBSTONE_RETENTION_DAYS: int = 30
+    TASK_TOMBSTONE_COMPACT_SECONDS: float = 3600.0
+    
+    # Admin analytics rollups
+    ANALYTICS_FLUSH_SECONDS: float = 5.0
+    ANALYTICS_PRUNE_SECONDS: float = 3600.0
+    ANALYTICS_ACTIVE_USERS_RETENTION_HOURS: int = 48  # must exceed a day bucket
+    
+    # Audit logging
+    AUDIT_QUEUE_MAX: int = 10000
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_MS: int = 250
+    AUDIT_OVERFLOW_POLICY: str = "drop_oldest"
+    
+    # Security event detection
+    SECURITY_WINDOW_SECONDS: int = 300
+    SECURITY_WINDOW_SLOTS: int = 10
+    SECURITY_MAX_TRACKED_KEYS: int = 50000
+    SECURITY_LOGIN_FAILURES_PER_ACCOUNT: int = 5
+    SECURITY_LOGIN_FAILURES_PER_IP: int = 20
+    SECURITY_INVALID_TOKENS_PER_IP: int = 20
+    SECURITY_FORBIDDEN_PER_ACCOUNT: int = 10
+    SECURITY_CRITICAL_MULTIPLIER: int = 5
+    SECURITY_QUEUE_MAX: int = 10000
+    SECURITY_BATCH_SIZE: int = 500
+    SECURITY_FLUSH_MS: int = 500
+    
+    # Rate Limiting (budgets are "<count>/<second|minute|hour|day>")
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_STORAGE: str = "sqlite"  # "sqlite" (shared by workers on a host) or "memory"
+    RATE_LIMIT_SQLITE_PATH: str = os.path.join(tempfile.gettempdir(), "task-manager-ratelimit.sqlite3")
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    RATE_LIMIT_PER_MINUTE: int = 60  # reads budget unless RATE_LIMIT_READS is set
+    RATE_LIMIT_LOGIN: str = "10/minute"
+    RATE_LIMIT_REGISTER: str = "20/hour"
+    RATE_LIMIT_WRITES: str = "120/minute"
+    RATE_LIMIT_READS: Optional[str] = None
     
     # File Upload
     MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10MB
     UPLOAD_DIR: str = "uploads"
     ALLOWED_EXTENSIONS: set[str] = {".pdf", ".png", ".jpg", ".jpeg", ".gif", ".doc", ".docx"}
+    ATTACHMENT_SWEEP_SECONDS: float = 300.0  # how often unreferenced files are deleted
+    # Internal nginx location aliasing UPLOAD_DIR (e.g. "/internal/uploads/"); when set,
+    # downloads are answered with X-Accel-Redirect and nginx sends the file
+    ATTACHMENT_ACCEL_REDIRECT: Optional[str] = None
+    
+    # Live task events (GET /tasks/events); shared across workers with LISTEN/NOTIFY on PostgreSQL
+    TASK_EVENTS_CHANNEL: str = "task_events"
+    TASK_EVENTS_HEARTBEAT_SECONDS: float = 15.0
+    TASK_EVENTS_BUFFER_SIZE: int = 256  # events queued per connection before it is dropped
+    TASK_EVENTS_REPLAY_SIZE: int = 2048  # recent events kept for Last-Event-ID resume
+    
+    # Metrics (GET /metrics; when a token is set Prometheus must send it as a bearer token)
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: Optional[str] = None
+    
+    # Profiling (admin "X-Profile: 1" / "?profile=1") and the slow request log
+    PROFILING_ENABLED: bool = True
+    PROFILE_SAMPLE_INTERVAL_MS: float = 1.0
+    PROFILE_MAX_SECONDS: float = 30.0
+    PROFILE_STORE_SIZE: int = 20
+    SLOW_REQUEST_THRESHOLD_MS: int = 500
+    SLOW_REQUEST_SAMPLE_MS: float = 10.0
+    SLOW_REQUEST_LOG_SIZE: int = 100
+    SLOW_REQUEST_MAX_STATEMENTS: int = 50
     
     # Security Headers
     ENABLE_SECURITY_HEADERS: bool = True
@@ -1,4 +1,4 @@
 """Database package initialization."""
-from database.session import Base, engine, get_db
+from database.session import Base, engine, async_engine, SessionLocal, AsyncSessionLocal, get_db, warm_up_pool
 
-__all__ = ["Base", "engine", "get_db"]
+__all__ = ["Base", "engine", "async_engine", "SessionLocal", "AsyncSessionLocal", "get_db", "warm_up_pool"]
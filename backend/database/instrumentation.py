@@ -0,0 +1,96 @@
+"""Query and connection pool instrumentation for Prometheus.
+
+SQLAlchemy has no event for "started waiting for a connection", so checkout
+wait is measured by a pool subclass around ``_do_get`` (the pool's hook for
+obtaining a connection). Query time comes from the cursor execute events;
+pool occupancy is read from the pool when metrics are scraped.
+"""
+import time
+from typing import Dict, Type
+from prometheus_client import REGISTRY
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import Pool
+from services.metrics import DB_POOL_TIMEOUTS, DB_POOL_WAIT, DB_QUERY_DURATION, current_request_queries
+
+OPERATIONS = frozenset({"SELECT", "INSERT", "UPDATE", "DELETE", "WITH"})
+
+
+def timed_pool_class(base: Type[Pool], engine_name: str) -> Type[Pool]:
+    """Subclass ``base`` so every checkout records how long it waited."""
+    wait = DB_POOL_WAIT.labels(engine_name)
+    timeouts = DB_POOL_TIMEOUTS.labels(engine_name)
+
+    class TimedPool(base):
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                return super()._do_get()
+            except PoolTimeoutError:
+                timeouts.inc()
+                raise
+            finally:
+                wait.observe(time.perf_counter() - started)
+
+    TimedPool.__name__ = f"Timed{base.__name__}"
+    return TimedPool
+
+
+def _operation(statement: str) -> str:
+    keyword = statement.lstrip()[:6].upper()
+    return keyword if keyword in OPERATIONS else "OTHER"
+
+
+class PoolCollector:
+    """Report occupancy of every instrumented engine's pool at scrape time."""
+
+    def __init__(self):
+        self.engines: Dict[str, object] = {}
+
+    def collect(self):
+        gauges = {
+            "size": GaugeMetricFamily("db_pool_size", "Connections the pool keeps open.", labels=("engine",)),
+            "checkedout": GaugeMetricFamily("db_pool_checked_out", "Connections in use.", labels=("engine",)),
+            "checkedin": GaugeMetricFamily("db_pool_checked_in", "Idle connections in the pool.", labels=("engine",)),
+            "overflow": GaugeMetricFamily(
+                "db_pool_overflow", "Connections open beyond pool_size (negative while below it).", labels=("engine",)
+            ),
+        }
+        for name, engine in self.engines.items():
+            pool = engine.pool
+            for method, gauge in gauges.items():
+                # Only queue pools keep these numbers (not e.g. NullPool)
+                if hasattr(pool, method):
+                    gauge.add_metric((name,), getattr(pool, method)())
+        yield from gauges.values()
+
+
+pool_collector = PoolCollector()
+REGISTRY.register(pool_collector)
+
+
+def instrument_engine(engine, engine_name: str) -> None:
+    """Time queries on ``engine`` (sync or async) and report its pool.
+
+    Pass ``poolclass=timed_pool_class(...)`` when creating the engine to also
+    get checkout wait times.
+    """
+    sync_engine = getattr(engine, "sync_engine", engine)
+    pool_collector.engines[engine_name] = sync_engine
+    durations = {operation: DB_QUERY_DURATION.labels(engine_name, operation) for operation in OPERATIONS | {"OTHER"}}
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        context._query_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _stop_timer(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._query_started
+        durations[_operation(statement)].observe(elapsed)
+        queries = current_request_queries.get()
+        if queries is not None:
+            queries.count += 1
+            queries.seconds += elapsed
+            if queries.statements is not None:
+                queries.statements.append((statement, elapsed))
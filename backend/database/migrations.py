@@ -0,0 +1,54 @@
+"""Run the Alembic migrations programmatically.
+
+Deployments run this once per release, before any app worker starts::
+
+    python -m database.migrations
+
+It is ``alembic upgrade head`` plus adoption of databases created by the
+old ``Base.metadata.create_all`` at import: those have the tables but no
+``alembic_version``, so they are stamped at the initial revision first
+instead of having it re-create tables that already exist.
+"""
+import logging
+import os
+from typing import Optional
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, inspect, pool
+from config import settings
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+# Revision matching the schema create_all used to produce
+BASELINE_REVISION = "0001"
+
+
+def alembic_config(url: Optional[str] = None) -> Config:
+    config = Config(ALEMBIC_INI)
+    # Relative to the ini file rather than the working directory
+    config.set_main_option("script_location", os.path.join(os.path.dirname(ALEMBIC_INI), "migrations"))
+    config.attributes["url"] = url or str(settings.DATABASE_URL)
+    config.attributes["configure_logging"] = False
+    return config
+
+
+def upgrade_database(revision: str = "head", url: Optional[str] = None) -> None:
+    """Bring the database at ``url`` (default ``DATABASE_URL``) to ``revision``."""
+    config = alembic_config(url)
+    engine = create_engine(config.attributes["url"], poolclass=pool.NullPool)
+    try:
+        with engine.connect() as connection:
+            tables = set(inspect(connection).get_table_names())
+        if "alembic_version" not in tables and "users" in tables:
+            command.stamp(config, BASELINE_REVISION)
+    finally:
+        engine.dispose()
+    command.upgrade(config, revision)
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(levelname)-5.5s [%(name)s] %(message)s")
+    upgrade_database()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Keyset (cursor) pagination helpers.
+
+A cursor is an opaque, URL-safe token holding the ``(created_at, id)`` of the
+last row on a page. The next page seeks straight past it with
+``WHERE (created_at, id) < (:created_at, :id)`` instead of skipping rows with
+OFFSET, so every page costs the same regardless of how deep it is.
+"""
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import Optional, Tuple
+from sqlalchemy import tuple_
+from sqlalchemy.sql import Select
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a client supplies a malformed cursor."""
+
+
+def encode_cursor(created_at: datetime, row_id: uuid.UUID) -> str:
+    """Encode a row's sort key as an opaque cursor."""
+    raw = json.dumps([created_at.isoformat(), str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """Decode a cursor produced by :func:`encode_cursor`."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), uuid.UUID(row_id)
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursorError("Invalid cursor") from exc
+
+
+def apply_keyset(query: Select, created_at_column, id_column, cursor: Optional[str], limit: int) -> Select:
+    """Order ``query`` newest first and seek past ``cursor``.
+
+    One extra row is fetched so callers can tell whether a next page exists
+    without counting (see :func:`split_page`).
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.where(tuple_(created_at_column, id_column) < tuple_(created_at, row_id))
+    return query.order_by(created_at_column.desc(), id_column.desc()).limit(limit + 1)
+
+
+def split_page(rows: list, limit: int, created_at_attr: str = "created_at", id_attr: str = "id"):
+    """Trim the look-ahead row and return ``(rows, next_cursor)``."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, created_at_attr), getattr(last, id_attr))
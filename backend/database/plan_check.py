@@ -0,0 +1,267 @@
+"""Query plan regression check.
+
+Seeds a throwaway data set inside a transaction, runs ``EXPLAIN`` on the SQL
+each route generates and fails if any of the hot tables is read with a
+sequential scan. Everything is rolled back afterwards, so it is safe to point
+at a development database::
+
+    python -m database.plan_check
+    python -m database.plan_check --database-url postgresql://...
+
+On PostgreSQL ``enable_seqscan`` is switched off for the check: if the planner
+still picks a sequential scan there is no index able to serve the query.
+
+The test suite runs the same cases on SQLite (``tests/test_query_plans.py``).
+"""
+import argparse
+import json
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+from sqlalchemy import create_engine, event, func, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import Select
+from config import settings
+from database.session import Base
+from database.search import get_search_backend
+from models import (
+    User, Task, TaskPriority, TaskStatus, ActivityLog, SecurityEvent, SecurityEventSeverity, CacheVersion, RevokedToken,
+    Attachment, AttachmentBlob, TaskChangeCounter, TaskTombstone, AnalyticsActiveUser,
+)
+
+# Tables that must never be read with a full scan
+WATCHED_TABLES = {
+    "users", "tasks", "activity_logs", "security_events", "task_stat_counters", "cache_versions", "revoked_tokens",
+    "attachments", "attachment_blobs", "task_change_counters", "task_tombstones", "analytics_active_users",
+}
+
+SEED_USERS = 20
+SEED_TASKS_PER_USER = 100
+
+
+def get_plan_cases(dialect_name: str, user_id: uuid.UUID, task_id: uuid.UUID) -> Dict[str, Callable[[], Select]]:
+    """Return the statements to check, keyed by a readable name."""
+    from routes.tasks import build_task_query
+    from routes.admin import build_audit_log_query, build_security_event_query
+    from database.pagination import apply_keyset, encode_cursor
+    from services.task_stats import due_counts_query
+    from auth.principals import PRINCIPALS
+
+    cursor = encode_cursor(datetime.utcnow(), uuid.uuid4())
+    search = get_search_backend(dialect_name)
+    return {
+        "list_tasks": lambda: build_task_query(user_id).order_by(Task.created_at.desc(), Task.id.desc()).limit(20),
+        "list_tasks_cursor": lambda: apply_keyset(build_task_query(user_id), Task.created_at, Task.id, cursor, 20),
+        "list_tasks_by_status": lambda: apply_keyset(
+            build_task_query(user_id, status=TaskStatus.TODO), Task.created_at, Task.id, None, 20
+        ),
+        "list_tasks_by_priority": lambda: apply_keyset(
+            build_task_query(user_id, priority=TaskPriority.HIGH), Task.created_at, Task.id, None, 20
+        ),
+        "list_tasks_by_category": lambda: apply_keyset(
+            build_task_query(user_id, category="work"), Task.created_at, Task.id, None, 20
+        ),
+        "search_tasks": lambda: build_task_query(user_id, search="seeded task").order_by(
+            search.rank("seeded task").desc()
+        ).limit(20),
+        "list_tasks_by_tags": lambda: apply_keyset(
+            build_task_query(user_id, tags=["a", "b"]), Task.created_at, Task.id, None, 20
+        ),
+        "task_facets": lambda: search.facets_query(user_id),
+        "task_due_counts": lambda: due_counts_query(user_id, datetime.utcnow()),
+        "count_tasks": lambda: select(text("count(*)")).select_from(build_task_query(user_id).subquery()),
+        "get_task": lambda: select(Task).where(Task.id == task_id, Task.user_id == user_id),
+        "get_user": lambda: select(User).where(User.id == user_id),
+        "get_principal": lambda: select(User.id, User.email, User.role, User.is_active).where(User.id == user_id),
+        "principal_cache_version": lambda: select(CacheVersion.version).where(CacheVersion.name == PRINCIPALS),
+        "revoked_token_lookup": lambda: select(RevokedToken.expires_at).where(RevokedToken.jti == "plan-check"),
+        "revocations_since": lambda: select(RevokedToken.jti, RevokedToken.expires_at, RevokedToken.revoked_at).where(
+            RevokedToken.revoked_at > datetime.utcnow()
+        ),
+        "get_user_by_email": lambda: select(User).where(User.email == "plan-check-0@example.com"),
+        "audit_logs": lambda: apply_keyset(build_audit_log_query(), ActivityLog.created_at, ActivityLog.id, cursor, 100),
+        "audit_logs_by_user": lambda: apply_keyset(
+            build_audit_log_query(user_id=user_id), ActivityLog.created_at, ActivityLog.id, cursor, 100
+        ),
+        "audit_logs_by_task": lambda: apply_keyset(
+            build_audit_log_query(task_id=task_id), ActivityLog.created_at, ActivityLog.id, cursor, 100
+        ),
+        "audit_logs_by_action": lambda: apply_keyset(
+            build_audit_log_query(action="seed"), ActivityLog.created_at, ActivityLog.id, cursor, 100
+        ),
+        "audit_logs_by_ip": lambda: apply_keyset(
+            build_audit_log_query(ip_address="10.0.0.1"), ActivityLog.created_at, ActivityLog.id, cursor, 100
+        ),
+        "security_events": lambda: apply_keyset(
+            build_security_event_query(), SecurityEvent.created_at, SecurityEvent.id, cursor, 100
+        ),
+        "security_events_by_type": lambda: apply_keyset(
+            build_security_event_query(event_type="seed"), SecurityEvent.created_at, SecurityEvent.id, cursor, 100
+        ),
+        "security_events_by_severity": lambda: apply_keyset(
+            build_security_event_query(severity=SecurityEventSeverity.HIGH), SecurityEvent.created_at, SecurityEvent.id,
+            cursor, 100
+        ),
+        "security_events_by_ip": lambda: apply_keyset(
+            build_security_event_query(ip_address="10.0.0.1"), SecurityEvent.created_at, SecurityEvent.id, cursor, 100
+        ),
+        "attachments_by_task": lambda: select(Attachment).where(Attachment.task_id == task_id).order_by(
+            Attachment.uploaded_at, Attachment.id
+        ),
+        "unreferenced_blobs": lambda: select(AttachmentBlob.sha256).where(AttachmentBlob.ref_count <= 0).limit(500),
+        "task_change_counter": lambda: select(TaskChangeCounter.last_seq, TaskChangeCounter.compacted_seq).where(
+            TaskChangeCounter.user_id == user_id
+        ),
+        "task_changes": lambda: select(Task).where(Task.user_id == user_id, Task.change_seq > 10).order_by(
+            Task.change_seq, Task.id
+        ).limit(101),
+        "task_tombstones_since": lambda: select(TaskTombstone.task_id, TaskTombstone.change_seq).where(
+            TaskTombstone.user_id == user_id, TaskTombstone.change_seq > 10
+        ).order_by(TaskTombstone.change_seq).limit(101),
+        "expired_tombstones": lambda: select(TaskTombstone.user_id, func.max(TaskTombstone.change_seq)).where(
+            TaskTombstone.deleted_at < datetime.utcnow() - timedelta(days=30)
+        ).group_by(TaskTombstone.user_id).limit(500),
+        "expired_active_users": lambda: select(AnalyticsActiveUser.bucket_start).where(
+            AnalyticsActiveUser.granularity == "hour",
+            AnalyticsActiveUser.bucket_start < datetime.utcnow() - timedelta(hours=48),
+        ).distinct().limit(24),
+    }
+
+
+def seed(conn: Connection) -> tuple:
+    """Insert a small but index-worthy data set and return a (user_id, task_id) pair."""
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    users, tasks, logs, events = [], [], [], []
+
+    for u in range(SEED_USERS):
+        user_id = uuid.uuid4()
+        users.append({
+            "id": user_id,
+            "email": f"plan-check-{u}@example.com",
+            "password_hash": "x",
+            "full_name": f"Plan Check {u}",
+            "created_at": now,
+            "updated_at": now,
+        })
+        for t in range(SEED_TASKS_PER_USER):
+            created_at = now - timedelta(minutes=rng.randint(0, 60 * 24 * 90))
+            tasks.append({
+                "id": uuid.uuid4(),
+                "user_id": user_id,
+                "title": f"Task {t}",
+                "description": "seeded by plan_check",
+                "priority": rng.choice(list(TaskPriority)),
+                "status": rng.choice(list(TaskStatus)),
+                "category": rng.choice(["work", "home", "errands", None]),
+                "tags": [],
+                "due_date": created_at + timedelta(days=rng.randint(1, 30)),
+                "created_at": created_at,
+                "updated_at": created_at,
+            })
+        logs.append({"id": uuid.uuid4(), "user_id": user_id, "action": "seed", "details": {}, "created_at": now})
+        events.append({
+            "id": uuid.uuid4(),
+            "user_id": user_id,
+            "event_type": "seed",
+            "severity": SecurityEventSeverity.LOW,
+            "details": {},
+            "created_at": now,
+        })
+
+    conn.execute(User.__table__.insert(), users)
+    conn.execute(Task.__table__.insert(), tasks)
+    conn.execute(ActivityLog.__table__.insert(), logs)
+    conn.execute(SecurityEvent.__table__.insert(), events)
+    conn.execute(text("ANALYZE"))
+    return users[0]["id"], next(t["id"] for t in tasks if t["user_id"] == users[0]["id"])
+
+
+def capture_sql(conn: Connection, statement: Select) -> tuple:
+    """Execute ``statement`` and return the driver-level SQL and parameters it produced."""
+    captured = []
+
+    def capture(conn, cursor, sql, parameters, context, executemany):
+        captured.append((sql, parameters))
+
+    event.listen(conn, "before_cursor_execute", capture)
+    try:
+        conn.execute(statement).all()
+    finally:
+        event.remove(conn, "before_cursor_execute", capture)
+    return captured[-1]
+
+
+def find_seq_scans(conn: Connection, statement: Select) -> List[str]:
+    """Return the watched tables ``statement`` reads with a sequential scan."""
+    dialect = conn.dialect.name
+    sql, params = capture_sql(conn, statement)
+
+    if dialect == "postgresql":
+        plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}", params).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        found = []
+
+        def walk(node):
+            if node.get("Node Type") == "Seq Scan" and node.get("Relation Name") in WATCHED_TABLES:
+                found.append(node["Relation Name"])
+            for child in node.get("Plans", []):
+                walk(child)
+
+        walk(plan[0]["Plan"])
+        return found
+
+    if dialect == "sqlite":
+        found = []
+        for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params).all():
+            words = row[-1].split()
+            # "SCAN tasks" is a full table scan; "SCAN tasks USING INDEX ..." walks an index in order
+            if words[:1] == ["SCAN"] and len(words) >= 2 and words[1] in WATCHED_TABLES and "USING" not in words:
+                found.append(words[1])
+        return found
+
+    raise NotImplementedError(f"EXPLAIN checks are not implemented for {dialect}")
+
+
+def check_plans(database_url: str) -> Dict[str, List[str]]:
+    """Run every plan case and return the failing ones."""
+    engine = create_engine(database_url)
+    failures = {}
+
+    with engine.connect() as conn:
+        trans = conn.begin()
+        try:
+            Base.metadata.create_all(bind=conn)
+            if conn.dialect.name == "postgresql":
+                conn.execute(text("SET LOCAL enable_seqscan = off"))
+            user_id, task_id = seed(conn)
+
+            for name, build in get_plan_cases(conn.dialect.name, user_id, task_id).items():
+                seq_scans = find_seq_scans(conn, build())
+                if seq_scans:
+                    failures[name] = seq_scans
+        finally:
+            trans.rollback()
+
+    engine.dispose()
+    return failures
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Fail if route queries fall back to sequential scans.")
+    parser.add_argument("--database-url", default=str(settings.DATABASE_URL))
+    args = parser.parse_args(argv)
+
+    failures = check_plans(args.database_url)
+    for name, tables in failures.items():
+        print(f"FAIL {name}: sequential scan on {', '.join(sorted(set(tables)))}")
+    if not failures:
+        print("All query plans use indexes.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+"""Read replica routing.
+
+Read-only routes take their session from :func:`get_read_db` instead of
+``get_db``. With ``DATABASE_REPLICA_URLS`` unset that is simply the primary;
+otherwise reads are spread round-robin over the healthy replicas, except:
+
+* read-your-writes: after a user's own successful write (any non-GET
+  request through a router with :func:`track_writes`), that user's reads stay
+  on the primary for ``READ_YOUR_WRITES_SECONDS``, so they never see their
+  change disappear while it replicates. The window travels with the client
+  in a short-lived cookie signed for that user (set by
+  ``ReadYourWritesMiddleware``), so it holds whichever worker or host serves
+  the next read;
+* ejection: :class:`ReplicaSet` checks every replica each
+  ``REPLICA_HEALTH_CHECK_SECONDS`` and takes it out of rotation while it is
+  unreachable or, on PostgreSQL, more than ``REPLICA_MAX_LAG_SECONDS``
+  behind. A connection error during a request ejects it immediately; the
+  next successful check brings it back. Without a healthy replica, reads go
+  to the primary.
+
+Both can be tried locally with two SQLite files or two PostgreSQL instances.
+"""
+import asyncio
+import hashlib
+import hmac
+import logging
+import math
+import time
+from itertools import count
+from typing import Dict, List, Optional
+from fastapi import Request
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from config import settings
+from database.session import AsyncSessionLocal, create_request_engine, primary_pool_options
+from services.batching import PeriodicFlusher
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+# Cookie holding "<unix time the window ends>.<signature>" after a user's write
+READ_YOUR_WRITES_COOKIE = "read_your_writes"
+
+# Seconds since the last replayed transaction, 0 when fully caught up (or not a standby)
+POSTGRES_LAG_QUERY = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+class Replica:
+    """One read replica: its engine, session factory and health."""
+
+    def __init__(self, name: str, url: str, pool_options: Dict):
+        self.name = name
+        self.engine = create_request_engine(url, name, **pool_options)
+        self.sessions = async_sessionmaker(
+            bind=self.engine, class_=AsyncSession, autoflush=False, expire_on_commit=False,
+        )
+        self.healthy = True
+        self.lag_seconds = 0.0
+        self.ejections = 0
+        self.last_error: Optional[str] = None
+
+
+class ReplicaSet(PeriodicFlusher):
+    """Healthy-replica rotation, maintained by periodic health checks."""
+
+    def __init__(self, urls: List[str], pool_options: Dict, interval: float, max_lag: float):
+        super().__init__(interval)
+        self.max_lag = max_lag
+        self.replicas = [Replica(f"replica{index}", url, pool_options) for index, url in enumerate(urls)]
+        self._turn = count()
+        # Sessions served (by engine name), for metrics
+        self.reads: Dict[str, int] = {"primary": 0, **{replica.name: 0 for replica in self.replicas}}
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def choose(self) -> Optional[Replica]:
+        """The next healthy replica, or None when there is none."""
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._turn) % len(healthy)]
+
+    def eject(self, replica: Replica, reason: str) -> None:
+        if replica.healthy:
+            logger.warning("Ejecting %s from read rotation: %s", replica.name, reason)
+            replica.ejections += 1
+        replica.healthy = False
+        replica.last_error = reason
+
+    async def check(self, replica: Replica) -> None:
+        try:
+            async with replica.engine.connect() as conn:
+                if conn.dialect.name == "postgresql":
+                    lag = float(await conn.scalar(POSTGRES_LAG_QUERY) or 0.0)
+                else:
+                    await conn.exec_driver_sql("SELECT 1")
+                    lag = 0.0
+        except Exception as exc:
+            self.eject(replica, f"health check failed: {exc.__class__.__name__}")
+            return
+        replica.lag_seconds = lag
+        if lag > self.max_lag:
+            self.eject(replica, f"{lag:.1f}s behind the primary")
+        elif not replica.healthy:
+            logger.info("%s is back in read rotation", replica.name)
+            replica.healthy = True
+            replica.last_error = None
+
+    async def flush(self) -> None:
+        await asyncio.gather(*(self.check(replica) for replica in self.replicas))
+
+    async def stop(self) -> None:
+        """Stop the health checks (skipping the final run a flusher would do)."""
+        if self._task is not None:
+            self._stopping = True
+            self.wake()
+            await self._task
+            self._task = None
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    def stats(self) -> List[Dict]:
+        return [
+            {
+                "name": replica.name,
+                "healthy": replica.healthy,
+                "lag_seconds": replica.lag_seconds,
+                "ejections": replica.ejections,
+                "reads": self.reads[replica.name],
+                "last_error": replica.last_error,
+            }
+            for replica in self.replicas
+        ]
+
+
+def _signature(user_key: str, until: int) -> str:
+    message = f"read-your-writes:{user_key}:{until}".encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()[:32]
+
+
+def read_your_writes_cookie(user_key: str, now: Optional[float] = None) -> str:
+    """Cookie value keeping ``user_key``'s reads on the primary for the read-your-writes window."""
+    until = math.ceil((time.time() if now is None else now) + settings.READ_YOUR_WRITES_SECONDS)
+    return f"{until}.{_signature(user_key, until)}"
+
+
+def wrote_recently(cookie: Optional[str], user_key: str, now: Optional[float] = None) -> bool:
+    """Whether ``cookie`` is an unexpired read-your-writes cookie issued to ``user_key``."""
+    if not cookie:
+        return False
+    until, _, signature = cookie.partition(".")
+    if not until.isdigit() or int(until) < (time.time() if now is None else now):
+        return False
+    return hmac.compare_digest(signature, _signature(user_key, int(until)))
+
+
+def _user_key(request: Request) -> Optional[str]:
+    # Set by get_current_user; absent when it has not run (yet)
+    payload = getattr(request.state, "token_payload", None)
+    return payload.get("sub") if payload else None
+
+
+async def get_read_db(request: Request):
+    """Dependency for a session meant for reads only.
+
+    Declare it after the ``get_current_user`` dependency: without a known
+    user the session comes from the primary.
+    """
+    user_key = _user_key(request)
+    replica = None
+    if replicas and user_key is not None and not wrote_recently(request.cookies.get(READ_YOUR_WRITES_COOKIE), user_key):
+        replica = replicas.choose()
+    if replica is None:
+        replicas.reads["primary"] += 1
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+
+    replicas.reads[replica.name] += 1
+    async with replica.sessions() as db:
+        try:
+            yield db
+        except DBAPIError as exc:
+            # Connection-level failures; the next successful health check restores the replica
+            if exc.connection_invalidated or isinstance(exc, (OperationalError, InterfaceError)):
+                replicas.eject(replica, f"{exc.__class__.__name__} during a request")
+            raise
+
+
+async def track_writes(request: Request):
+    """Router dependency: keep a user's reads on the primary after their writes.
+
+    Only runs past ``yield`` when the route succeeded; the cookie itself is
+    added to the response by ``ReadYourWritesMiddleware``.
+    """
+    yield
+    if request.method not in SAFE_METHODS and (user_key := _user_key(request)) is not None:
+        request.state.read_your_writes = read_your_writes_cookie(user_key)
+
+
+def _replica_pool_options() -> Dict:
+    overrides = {
+        "pool_size": settings.DB_REPLICA_POOL_SIZE,
+        "max_overflow": settings.DB_REPLICA_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_REPLICA_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_REPLICA_POOL_RECYCLE,
+    }
+    return {option: primary_pool_options[option] if value is None else value for option, value in overrides.items()}
+
+
+# Process-wide replica set; health checks start and stop with the application
+replicas = ReplicaSet(
+    settings.DATABASE_REPLICA_URLS,
+    _replica_pool_options(),
+    interval=settings.REPLICA_HEALTH_CHECK_SECONDS,
+    max_lag=settings.REPLICA_MAX_LAG_SECONDS,
+)
@@ -0,0 +1,206 @@
+"""Full-text search and tag queries over tasks.
+
+Each backend owns the schema objects it needs (created by the migrations,
+and right after the ``tasks`` table by ``create_all`` in scratch databases)
+and knows how to filter and rank a task query:
+
+* PostgreSQL: a generated ``tsvector`` column with a GIN index, ranked with
+  ``ts_rank_cd``, plus a ``pg_trgm`` index on the title for substring and
+  typo-tolerant matches.
+* SQLite: an external-content FTS5 table kept in sync by triggers, matched
+  within the user's tasks and ranked with ``bm25``, with a ``LIKE``
+  fallback on the title for substring matches.
+
+Tag filters use the JSONB ``@>`` / ``?|`` operators (served by a GIN index)
+on PostgreSQL and ``json_each`` on SQLite.
+"""
+import uuid
+from typing import List
+from sqlalchemy import (
+    Float, Integer, Text, Uuid, bindparam, cast, event, exists, func, literal, literal_column, or_, select, text, true,
+)
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import ColumnElement, Select
+from models import Task
+
+
+def escape_like(term: str) -> str:
+    """Escape LIKE wildcards in a user-supplied term (escape character ``/``)."""
+    return term.replace("/", "//").replace("%", "/%").replace("_", "/_")
+
+
+class TaskSearchBackend:
+    """Interface implemented by the dialect-specific search backends."""
+
+    ddl: List[str] = []
+
+    def install(self, connection: Connection) -> None:
+        """Create the search schema objects (idempotent)."""
+        for statement in self.ddl:
+            connection.exec_driver_sql(statement)
+
+    def filter(self, query: Select, term: str, user_id: uuid.UUID) -> Select:
+        """Restrict ``query`` (over ``user_id``'s tasks) to tasks matching ``term``."""
+        raise NotImplementedError
+
+    def rank(self, term: str) -> ColumnElement:
+        """Relevance expression for a query built by :meth:`filter` (higher is better)."""
+        raise NotImplementedError
+
+    def filter_tags(self, query: Select, tags: List[str], match_all: bool = False) -> Select:
+        """Restrict ``query`` to tasks carrying any (or all) of ``tags``."""
+        raise NotImplementedError
+
+    def tag_elements(self):
+        """Table-valued function expanding ``tasks.tags`` into one row per tag."""
+        raise NotImplementedError
+
+    def facets_query(self, user_id: uuid.UUID) -> Select:
+        """Per-tag and per-category task counts for a user, in one statement.
+
+        Rows are ``(facet, value, count)`` with ``facet`` either ``"tag"`` or
+        ``"category"``.
+        """
+        tag = self.tag_elements()
+        tag_counts = (
+            select(literal("tag").label("facet"), tag.c.value.label("value"), func.count().label("count"))
+            .select_from(Task)
+            .join(tag, true())
+            .where(Task.user_id == user_id)
+            .group_by(tag.c.value)
+        )
+        category_counts = (
+            select(literal("category"), Task.category, func.count())
+            .where(Task.user_id == user_id, Task.category.is_not(None))
+            .group_by(Task.category)
+        )
+        return tag_counts.union_all(category_counts)
+
+
+class PostgresTaskSearch(TaskSearchBackend):
+    """tsvector + GIN full-text search with a trigram fallback."""
+
+    ddl = [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+        ") STORED",
+        "CREATE INDEX IF NOT EXISTS ix_tasks_search_vector ON tasks USING gin (search_vector)",
+        "CREATE INDEX IF NOT EXISTS ix_tasks_title_trgm ON tasks USING gin (title gin_trgm_ops)",
+        "CREATE INDEX IF NOT EXISTS ix_tasks_tags_gin ON tasks USING gin (tags)",
+    ]
+
+    search_vector = literal_column("tasks.search_vector")
+
+    text_search_config = literal_column("'english'::regconfig")
+
+    def _tsquery(self, term: str):
+        return func.websearch_to_tsquery(self.text_search_config, term)
+
+    def filter(self, query: Select, term: str, user_id: uuid.UUID) -> Select:
+        return query.where(
+            or_(
+                self.search_vector.op("@@")(self._tsquery(term)),
+                Task.title.op("%")(term),
+                Task.title.ilike(f"%{escape_like(term)}%", escape="/"),
+            )
+        )
+
+    def rank(self, term: str) -> ColumnElement:
+        return func.ts_rank_cd(self.search_vector, self._tsquery(term)) + func.similarity(Task.title, term)
+
+    def filter_tags(self, query: Select, tags: List[str], match_all: bool = False) -> Select:
+        if match_all:
+            return query.where(Task.tags.op("@>")(cast(tags, postgresql.JSONB)))
+        return query.where(Task.tags.op("?|")(cast(postgresql.array(tags), postgresql.ARRAY(Text))))
+
+    def tag_elements(self):
+        return func.jsonb_array_elements_text(Task.tags).table_valued("value").alias("tag")
+
+
+class SQLiteTaskSearch(TaskSearchBackend):
+    """FTS5 full-text search for local development and tests.
+
+    ``tasks_fts`` is an external-content table over ``tasks``, keyed on its
+    rowid, so the triggers update it by rowid. ``VACUUM`` may renumber the
+    implicit rowids of ``tasks``; run
+    ``INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')`` after one.
+    """
+
+    ddl = [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5("
+        "title, description, content = 'tasks', content_rowid = 'rowid', tokenize = 'porter unicode61')",
+        "CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN "
+        "INSERT INTO tasks_fts (rowid, title, description) VALUES (new.rowid, new.title, new.description); END",
+        "CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN "
+        "INSERT INTO tasks_fts (tasks_fts, rowid, title, description) "
+        "VALUES ('delete', old.rowid, old.title, old.description); END",
+        "CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF title, description ON tasks BEGIN "
+        "INSERT INTO tasks_fts (tasks_fts, rowid, title, description) "
+        "VALUES ('delete', old.rowid, old.title, old.description); "
+        "INSERT INTO tasks_fts (rowid, title, description) VALUES (new.rowid, new.title, new.description); END",
+    ]
+
+    @staticmethod
+    def _match_expression(term: str) -> str:
+        # Quote every token so user input cannot inject FTS5 query syntax; prefix-match each one
+        tokens = [token.replace('"', '""') for token in term.split()]
+        return " ".join(f'"{token}"*' for token in tokens if token)
+
+    def filter(self, query: Select, term: str, user_id: uuid.UUID) -> Select:
+        # Titles weigh twice as much as descriptions, like the 'A'/'B' weights on PostgreSQL
+        matches = (
+            text(
+                "SELECT tasks_fts.rowid AS task_rowid, bm25(tasks_fts, 2.0, 1.0) AS rank "
+                "FROM tasks_fts JOIN tasks AS owner ON owner.rowid = tasks_fts.rowid "
+                "WHERE tasks_fts MATCH :match AND owner.user_id = :fts_user_id"
+            )
+            .bindparams(bindparam("fts_user_id", user_id, type_=Uuid()), match=self._match_expression(term) or '""')
+            .columns(task_rowid=Integer(), rank=Float())
+            .subquery("fts")
+        )
+        return query.outerjoin(matches, matches.c.task_rowid == literal_column("tasks.rowid")).where(
+            or_(
+                matches.c.task_rowid.is_not(None),
+                Task.title.ilike(f"%{escape_like(term)}%", escape="/"),
+            )
+        )
+
+    def rank(self, term: str) -> ColumnElement:
+        # bm25() is lower-is-better; unmatched (LIKE-only) rows rank last
+        return -func.coalesce(literal_column("fts.rank"), 0.0)
+
+    def filter_tags(self, query: Select, tags: List[str], match_all: bool = False) -> Select:
+        if match_all:
+            for value in set(tags):
+                tag = self.tag_elements()
+                query = query.where(exists(select(1).select_from(tag).where(tag.c.value == value)))
+            return query
+        tag = self.tag_elements()
+        return query.where(exists(select(1).select_from(tag).where(tag.c.value.in_(tags))))
+
+    def tag_elements(self):
+        return func.json_each(Task.tags).table_valued("value").alias("tag")
+
+
+SEARCH_BACKENDS = {
+    "postgresql": PostgresTaskSearch,
+    "sqlite": SQLiteTaskSearch,
+}
+
+
+def get_search_backend(dialect_name: str) -> TaskSearchBackend:
+    """Return the search backend for a SQLAlchemy dialect name."""
+    try:
+        return SEARCH_BACKENDS[dialect_name]()
+    except KeyError:
+        raise NotImplementedError(f"Task search is not implemented for {dialect_name}")
+
+
+@event.listens_for(Task.__table__, "after_create")
+def install_search_schema(target, connection, **kw):
+    """Create the search schema objects whenever the tasks table is created."""
+    if connection.dialect.name in SEARCH_BACKENDS:
+        get_search_backend(connection.dialect.name).install(connection)
@@ -1,39 +1,142 @@
+import asyncio
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from config import settings
+from database.instrumentation import instrument_engine, timed_pool_class
 
-# Create database engine
-# Create database engine
-connect_args = {}
-engine_args = {}
+# Async drivers used for each sync driver family
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
 
-if str(settings.DATABASE_URL).startswith("sqlite"):
-    connect_args = {"check_same_thread": False}
-else:
-    engine_args = {
+
+def get_async_url(url: str):
+    """Translate a sync database URL into its async driver equivalent."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        return url
+
+    async_url = url.set(drivername=ASYNC_DRIVERS[backend])
+    # asyncpg does not understand libpq's sslmode; it takes ssl instead
+    if "sslmode" in async_url.query:
+        sslmode = async_url.query["sslmode"]
+        async_url = async_url.difference_update_query(["sslmode"]).update_query_dict({"ssl": sslmode})
+    return async_url
+
+
+def pool_args(url: str, pool_size: int, max_overflow: int, pool_timeout: float, pool_recycle: int) -> dict:
+    """Connection pool options for an engine on ``url``.
+
+    SQLite keeps SQLAlchemy's default pools, which do not take these options.
+    """
+    if url.startswith("sqlite"):
+        return {}
+    return {
         "pool_pre_ping": True,
-        "pool_size": 10,
-        "max_overflow": 20
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": pool_timeout,
+        "pool_recycle": pool_recycle,
     }
 
+
+def create_request_engine(url: str, engine_name: str, **pool_options):
+    """Async engine for the request path, with query and pool instrumentation."""
+    args = pool_args(url, **pool_options)
+    if args:
+        # Same queue pool the async dialects default to, timing each checkout
+        args["poolclass"] = timed_pool_class(AsyncAdaptedQueuePool, engine_name)
+    async_engine = create_async_engine(get_async_url(url), **args)
+    instrument_engine(async_engine, engine_name)
+    return async_engine
+
+
+primary_pool_options = {
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+}
+connect_args = {"check_same_thread": False} if str(settings.DATABASE_URL).startswith("sqlite") else {}
+
+# Engines connect lazily: nothing here touches the database at import time.
+# The application opens its first connections in its lifespan handler (see warm_up_pool).
+
+# Sync engine, kept for maintenance scripts
 engine = create_engine(
     str(settings.DATABASE_URL),
     connect_args=connect_args,
-    **engine_args
+    **pool_args(str(settings.DATABASE_URL), **primary_pool_options)
 )
 
-# Create session factory
+# Async engine used by the request path (read replicas: see database.replicas)
+async_engine = create_request_engine(str(settings.DATABASE_URL), "primary", **primary_pool_options)
+
+# Create session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
 
 # Base class for models
 Base = declarative_base()
 
 
-def get_db():
-    """Dependency for getting database session."""
-    db = SessionLocal()
-    try:
+async def get_db():
+    """Dependency for getting an async database session."""
+    async with AsyncSessionLocal() as db:
         yield db
+
+
+async def warm_up_pool(engine, connections: int) -> int:
+    """Open up to ``connections`` pooled connections ahead of the first requests.
+
+    The first connection is opened alone, so a dialect's one-time
+    initialization (server version, type introspection) runs once rather than
+    racing; the rest are opened together and returned to the pool. Pools that
+    keep nothing open (SQLite's NullPool) only get the first. Returns how many
+    connections were opened.
+    """
+    async def touch():
+        async with engine.connect() as conn:
+            await conn.exec_driver_sql("SELECT 1")
+
+    await touch()
+    pool_size = getattr(engine.pool, "size", None)
+    if pool_size is None or connections <= 1:
+        return 1
+    extra = min(connections, pool_size()) - 1
+    if extra <= 0:
+        return 1
+
+    # Hold every connection until all are open, otherwise they would reuse one another
+    opened = 0
+    all_open = asyncio.Event()
+
+    async def hold():
+        nonlocal opened
+        async with engine.connect() as conn:
+            await conn.exec_driver_sql("SELECT 1")
+            opened += 1
+            if opened == extra:
+                all_open.set()
+            await all_open.wait()
+
+    holders = [asyncio.create_task(hold()) for _ in range(extra)]
+    try:
+        await asyncio.gather(*holders)
     finally:
-        db.close()
+        all_open.set()
+        for task in holders:
+            task.cancel()
+    return 1 + extra
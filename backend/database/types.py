@@ -0,0 +1,32 @@
+"""Portable column types shared by the models.
+
+PostgreSQL gets its native ``UUID`` and ``JSONB`` types; other backends
+(SQLite for local development and tests) fall back to the generic
+equivalents so the same metadata can be created everywhere.
+
+Timestamps are stored in naive ``DateTime`` columns holding UTC;
+:func:`naive_utc` converts incoming values to that form.
+"""
+from datetime import datetime, timezone
+from typing import Optional
+from sqlalchemy import JSON, Uuid
+from sqlalchemy.dialects import postgresql
+
+# UUID primary/foreign keys: native UUID on PostgreSQL, CHAR(32) elsewhere
+UUID = Uuid
+
+# JSON documents: JSONB on PostgreSQL, JSON (TEXT) elsewhere
+JSONB = JSON().with_variant(postgresql.JSONB(), "postgresql")
+
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Convert a datetime to naive UTC, like the stored timestamps (naive input is taken as UTC).
+
+    asyncpg refuses timezone-aware values for ``timestamp`` parameters.
+    """
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+__all__ = ["UUID", "JSONB", "naive_utc"]
@@ -0,0 +1,29 @@
+"""Dialect-aware upsert helpers."""
+from typing import Dict, Iterable, List
+from sqlalchemy import Table
+from sqlalchemy.dialects import postgresql, sqlite
+
+INSERT_CONSTRUCTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def dialect_insert(dialect_name: str, table: Table):
+    """Return an INSERT construct supporting ``ON CONFLICT`` for the dialect."""
+    try:
+        return INSERT_CONSTRUCTS[dialect_name](table)
+    except KeyError:
+        raise NotImplementedError(f"Upserts are not implemented for {dialect_name}")
+
+
+def increment_statement(dialect_name: str, table: Table, key_columns: Iterable[str], counter_column: str, rows: List[Dict]):
+    """Build a multi-row ``INSERT ... ON CONFLICT DO UPDATE counter = counter + excluded.counter``.
+    
+    Keys must be unique within ``rows``; aggregate deltas before calling.
+    """
+    stmt = dialect_insert(dialect_name, table).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=list(key_columns),
+        set_={counter_column: table.c[counter_column] + stmt.excluded[counter_column]},
+    )
@@ -1,18 +1,92 @@
-from fastapi import FastAPI, Request, status
+import asyncio
+import logging
+import secrets
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
+from fastapi.responses import JSONResponse, ORJSONResponse
+from prometheus_client import REGISTRY
 from config import settings
-from database import Base, engine
-from routes import auth_router, tasks_router, admin_router
+from database import async_engine, warm_up_pool
+from database.replicas import replicas
+from middleware import (
+    MetricsMiddleware, ProfilingMiddleware, ProxyHeadersMiddleware, ReadYourWritesMiddleware, SecurityHeadersMiddleware,
+)
+from routes import auth_router, tasks_router, admin_router, attachments_router, events_router
+from auth import principal_cache, revocation_list, password_hasher, PasswordHasherBusy
+from services.attachments import blob_sweeper
+from services.audit import audit_writer
+from services.events import task_events
+from services.metrics import ServiceStatsCollector, render_metrics
+from services.profiling import slow_requests
+from services.ratelimit import rate_limiter
+from services.rollups import active_user_pruner, rollups
+from services.security import security_writer
+from services.task_changes import tombstone_compactor
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm the process up before it takes traffic, and drain it afterwards.
+
+    Importing this module does no I/O: the schema is managed by the Alembic
+    migrations (``python -m database.migrations``, run once per deploy), and
+    the first database connections are opened here.
+    """
+    started = time.perf_counter()
+    if settings.MIGRATE_ON_STARTUP:
+        from database.migrations import upgrade_database
+        await asyncio.to_thread(upgrade_database)
+    password_hasher.prestart()
+    connections = await warm_up_pool(async_engine, settings.DB_WARMUP_CONNECTIONS)
+    for replica in replicas.replicas:
+        try:
+            connections += await warm_up_pool(replica.engine, settings.DB_WARMUP_CONNECTIONS)
+        except Exception as exc:
+            # A replica being down must not keep the worker from serving
+            replicas.eject(replica, f"warm-up failed: {exc.__class__.__name__}")
+    # Load the caches now so the first requests do not pay for it
+    await revocation_list.poll()
+    await principal_cache.poll()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+    audit_writer.start()
+    security_writer.start()
+    rollups.start()
+    active_user_pruner.start()
+    blob_sweeper.start()
+    task_events.start()
+    tombstone_compactor.start()
+    principal_cache.start()
+    revocation_list.start()
+    if replicas:
+        replicas.start()
+    if settings.PROFILING_ENABLED:
+        slow_requests.start()
+    app.state.startup_seconds = time.perf_counter() - started
+    logger.info("Startup took %.0f ms (%d database connections opened)", app.state.startup_seconds * 1000, connections)
+
+    yield
+
+    # Flush the in-process write buffers and stop the background tasks
+    await audit_writer.stop()
+    await security_writer.stop()
+    await rollups.stop()
+    await active_user_pruner.stop()
+    await blob_sweeper.stop()
+    await task_events.stop()
+    await tombstone_compactor.stop()
+    await principal_cache.stop()
+    await revocation_list.stop()
+    await replicas.stop()
+    slow_requests.stop()
+    password_hasher.shutdown()
+    rate_limiter.backend.close()
+    await async_engine.dispose()
+    await replicas.dispose()
 
-# Initialize rate limiter
-limiter = Limiter(key_func=get_remote_address)
 
 # Create FastAPI app
 app = FastAPI(
@@ -20,12 +94,21 @@ app = FastAPI(
     version=settings.APP_VERSION,
     docs_url="/api/docs",
     redoc_url="/api/redoc",
-    openapi_url="/api/openapi.json"
+    openapi_url="/api/openapi.json",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
-# Add rate limiting
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    """Shed login/registration load instead of queueing it indefinitely."""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Authentication is temporarily overloaded, please retry"},
+        headers={"Retry-After": "1"},
+    )
+
 
 # CORS middleware
 app.add_middleware(
@@ -37,34 +120,48 @@ app.add_middleware(
 )
 
 
-# Security headers middleware
-@app.middleware("http")
-async def add_security_headers(request: Request, call_next):
-    """Add security headers to all responses."""
-    response = await call_next(request)
-    
-    if settings.ENABLE_SECURITY_HEADERS:
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-        response.headers["Content-Security-Policy"] = (
-            "default-src 'self'; "
-            "script-src 'self'; "
-            "style-src 'self' 'unsafe-inline'; "
-            "img-src 'self' data: https:; "
-            "font-src 'self'; "
-            "connect-src 'self'; "
-            "frame-ancestors 'none';"
-        )
-    
-    return response
+# Keeps a user's reads on the primary after their writes, across workers
+if replicas:
+    app.add_middleware(
+        ReadYourWritesMiddleware, max_age=settings.READ_YOUR_WRITES_SECONDS, path=settings.API_V1_PREFIX,
+    )
+
+
+# Security headers middleware (outside CORS, so preflight responses get them too)
+if settings.ENABLE_SECURITY_HEADERS:
+    app.add_middleware(SecurityHeadersMiddleware)
+
+
+# Slow request log and on-demand profiles
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+
+# Request metrics (added last, so the timing covers the other middleware too)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    REGISTRY.register(ServiceStatsCollector(
+        password_hasher=password_hasher,
+        principal_cache=principal_cache,
+        revocation_list=revocation_list,
+        writers={"audit_logs": audit_writer, "security_events": security_writer},
+        rate_limiter=rate_limiter,
+        replicas=replicas,
+        task_events=task_events,
+    ))
+
+
+# Client address behind nginx (outermost, so everything below sees the real client)
+if settings.TRUSTED_PROXIES:
+    app.add_middleware(ProxyHeadersMiddleware, trusted_proxies=settings.TRUSTED_PROXIES)
 
 
 # Include routers
 app.include_router(auth_router, prefix=settings.API_V1_PREFIX)
+app.include_router(events_router, prefix=settings.API_V1_PREFIX)
 app.include_router(tasks_router, prefix=settings.API_V1_PREFIX)
 app.include_router(admin_router, prefix=settings.API_V1_PREFIX)
+app.include_router(attachments_router, prefix=settings.API_V1_PREFIX)
 
 
 @app.get("/")
@@ -83,6 +180,19 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """Prometheus metrics for this worker process."""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if settings.METRICS_TOKEN and not secrets.compare_digest(
+        request.headers.get("authorization", "").encode(), f"Bearer {settings.METRICS_TOKEN}".encode()
+    ):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    body, content_type = render_metrics()
+    return Response(content=body, headers={"Content-Type": content_type})
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)  # nosec
@@ -0,0 +1,15 @@
+"""ASGI middleware package initialization."""
+from middleware.metrics import MetricsMiddleware
+from middleware.profiling import ProfilingMiddleware
+from middleware.proxy_headers import ProxyHeadersMiddleware
+from middleware.read_your_writes import ReadYourWritesMiddleware
+from middleware.security_headers import SecurityHeadersMiddleware, DEFAULT_SECURITY_HEADERS
+
+__all__ = [
+    "MetricsMiddleware",
+    "ProfilingMiddleware",
+    "ProxyHeadersMiddleware",
+    "ReadYourWritesMiddleware",
+    "SecurityHeadersMiddleware",
+    "DEFAULT_SECURITY_HEADERS",
+]
@@ -0,0 +1,54 @@
+"""Request metrics as a pure ASGI middleware.
+
+Routes are labelled by their template, which FastAPI leaves in
+``scope["route"]`` once the router has matched; the middleware reads it after
+the response, so no routing work is repeated. Requests that match no route
+share a single label, as do non-standard methods. Event streams
+(``text/event-stream``) are timed up to the start of their response.
+"""
+import time
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from services.metrics import (
+    HTTP_REQUEST_DURATION, HTTP_REQUESTS, REQUEST_QUERIES, REQUEST_QUERY_DURATION, UNMATCHED_ROUTE,
+    RequestQueries, current_request_queries, is_event_stream,
+)
+
+METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+
+class MetricsMiddleware:
+    """Record latency, status and database work per route template."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        finished = None
+        status_code = 500
+        queries = RequestQueries()
+        token = current_request_queries.set(queries)
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code, finished
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if is_event_stream(message):
+                    finished = time.perf_counter()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            current_request_queries.reset(token)
+            route = scope.get("route")
+            template = getattr(route, "path", UNMATCHED_ROUTE)
+            method = scope["method"] if scope["method"] in METHODS else "OTHER"
+            HTTP_REQUEST_DURATION.labels(method, template).observe((finished or time.perf_counter()) - started)
+            HTTP_REQUESTS.labels(method, template, str(status_code)).inc()
+            REQUEST_QUERIES.labels(template).observe(queries.count)
+            REQUEST_QUERY_DURATION.labels(template).observe(queries.seconds)
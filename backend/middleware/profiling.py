@@ -0,0 +1,70 @@
+"""Slow request capture and on-demand profiles as a pure ASGI middleware.
+
+Every request is registered with :data:`services.profiling.slow_requests` and
+has its SQL statements collected. Profiles asked for through
+:func:`services.profiling.request_profiling` are stopped when the response
+starts, and their id is added to it as ``X-Profile-Id``. Event streams leave
+the slow request log when their response starts, so the watchdog does not
+sample hours-long connections.
+"""
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from services.metrics import RequestQueries, current_request_queries, is_event_stream
+from services.profiling import profiles, slow_requests
+
+
+class ProfilingMiddleware:
+    """Feed requests to the slow request log and finish on-demand profiles."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        inflight = slow_requests.begin()
+        queries = current_request_queries.get()
+        token = None
+        if queries is None:
+            queries = RequestQueries()
+            token = current_request_queries.set(queries)
+        queries.statements = inflight.statements
+        status_code = 500
+        ended = False
+
+        def end() -> None:
+            route = scope.get("route")
+            slow_requests.end(
+                inflight, scope["method"], scope["path"], scope.get("query_string", b"").decode("latin-1"),
+                getattr(route, "path", None), status_code,
+            )
+
+        async def send_with_profile(message: Message) -> None:
+            nonlocal status_code, ended
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if is_event_stream(message):
+                    end()
+                    ended = True
+                sampler = scope.get("state", {}).pop("profiler", None)
+                if sampler is not None:
+                    route = scope.get("route")
+                    profile_id = profiles.finish(
+                        sampler, scope["method"], scope["path"], getattr(route, "path", None), status_code
+                    )
+                    message["headers"] = [*message.get("headers", ()), (b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            if token is not None:
+                current_request_queries.reset(token)
+            queries.statements = None
+            sampler = scope.get("state", {}).pop("profiler", None)
+            if sampler is not None:
+                # The request failed before a response started
+                sampler.stop()
+            if not ended:
+                end()
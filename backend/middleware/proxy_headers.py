@@ -0,0 +1,69 @@
+"""Client address and scheme from a trusted reverse proxy, as a pure ASGI middleware.
+
+Behind nginx every connection comes from the proxy, so ``request.client``
+would be the proxy's address for all users, and per-IP rate limits, the
+brute-force detector and the audit log would all see one client. When the
+connecting peer is in ``TRUSTED_PROXIES`` (addresses or networks), the
+client is taken from ``X-Forwarded-For``: the right-most address that is
+not itself a trusted proxy, since everything left of it was supplied by the
+client and can be forged. ``X-Forwarded-Proto`` sets the scheme.
+
+Requests from any other peer are left alone, so a client reaching the API
+directly cannot spoof its address. Unlike ``--forwarded-allow-ips`` in the
+pinned uvicorn (single addresses only), networks are accepted, which suits
+container networks whose addresses are assigned at start.
+"""
+import ipaddress
+from typing import Iterable, List, Optional, Union
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+
+def parse_networks(entries: Iterable[str]) -> List[Network]:
+    """Parse addresses and CIDR networks (``"10.0.0.5"``, ``"172.28.0.0/16"``)."""
+    return [ipaddress.ip_network(entry.strip(), strict=False) for entry in entries if entry.strip()]
+
+
+class ProxyHeadersMiddleware:
+    """Trust ``X-Forwarded-For`` / ``X-Forwarded-Proto`` from ``trusted_proxies`` only."""
+
+    def __init__(self, app: ASGIApp, trusted_proxies: Iterable[str]):
+        self.app = app
+        self.networks = parse_networks(trusted_proxies)
+
+    def is_trusted(self, host: Optional[str]) -> bool:
+        if not host:
+            return False
+        try:
+            address = ipaddress.ip_address(host)
+        except ValueError:
+            return False
+        return any(address in network for network in self.networks)
+
+    def client_host(self, forwarded_for: str) -> Optional[str]:
+        hosts = [host.strip() for host in forwarded_for.split(",") if host.strip()]
+        for host in reversed(hosts):
+            if not self.is_trusted(host):
+                return host
+        # Every hop is a proxy: the left-most is the closest we get to the client
+        return hosts[0] if hosts else None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] in ("http", "websocket") and self.networks:
+            client = scope.get("client")
+            if client and self.is_trusted(client[0]):
+                headers = dict(scope["headers"])
+                forwarded_for = headers.get(b"x-forwarded-for")
+                if forwarded_for:
+                    host = self.client_host(forwarded_for.decode("latin-1"))
+                    if host:
+                        scope["client"] = (host, 0)
+                proto = headers.get(b"x-forwarded-proto", b"").decode("latin-1").strip().lower()
+                if proto in ("http", "https", "ws", "wss"):
+                    secure = proto in ("https", "wss")
+                    if scope["type"] == "websocket":
+                        scope["scheme"] = "wss" if secure else "ws"
+                    else:
+                        scope["scheme"] = "https" if secure else "http"
+        await self.app(scope, receive, send)
@@ -0,0 +1,35 @@
+"""Read-your-writes cookie as a pure ASGI middleware.
+
+``track_writes`` leaves a signed cookie value in the request state after a
+successful write; this middleware adds it to the response headers, so the
+client's next reads go to the primary whichever worker serves them (see
+``database.replicas``). Only installed when read replicas are configured.
+"""
+import math
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from database.replicas import READ_YOUR_WRITES_COOKIE, SAFE_METHODS
+
+
+class ReadYourWritesMiddleware:
+    """Set the read-your-writes cookie on responses to successful writes."""
+
+    def __init__(self, app: ASGIApp, max_age: float, path: str = "/"):
+        self.app = app
+        self.attributes = f"Max-Age={math.ceil(max_age)}; Path={path}; HttpOnly; SameSite=Lax"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                value = scope.get("state", {}).get("read_your_writes")
+                if value:
+                    cookie = f"{READ_YOUR_WRITES_COOKIE}={value}; {self.attributes}"
+                    if scope.get("scheme") == "https":
+                        cookie += "; Secure"
+                    message["headers"] = [*message.get("headers", ()), (b"set-cookie", cookie.encode("latin-1"))]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
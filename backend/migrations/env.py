@@ -0,0 +1,76 @@
+"""Alembic environment: migrates the database in ``DATABASE_URL``.
+
+On PostgreSQL the migration transaction first takes an advisory lock, so
+replicas that all run ``upgrade`` at boot apply each revision exactly once.
+"""
+from logging.config import fileConfig
+from alembic import context
+from sqlalchemy import create_engine, pool, text
+from config import settings
+from database.session import Base
+import models  # noqa: F401 (registers every table on Base.metadata)
+
+config = context.config
+if config.config_file_name is not None and config.attributes.get("configure_logging", True):
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+# Arbitrary application-wide key for pg_advisory_xact_lock
+MIGRATION_LOCK_ID = 7_420_135_001
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Leave database objects the models do not describe to the migrations.
+
+    The full-text search schema (FTS5 tables and triggers on SQLite, the
+    ``search_vector`` column and GIN indexes on PostgreSQL) is created with
+    dialect-specific DDL, so autogenerate must not propose dropping it.
+    """
+    return not (reflected and compare_to is None)
+
+
+def _configure(**kwargs) -> None:
+    context.configure(
+        target_metadata=target_metadata,
+        include_object=include_object,
+        compare_type=True,
+        **kwargs,
+    )
+
+
+def run_migrations_offline() -> None:
+    """Emit the migration SQL instead of running it (``alembic upgrade --sql``)."""
+    url = config.attributes.get("url") or str(settings.DATABASE_URL)
+    _configure(url=url, literal_binds=True, dialect_opts={"paramstyle": "named"})
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def _run(connection) -> None:
+    # SQLite cannot ALTER most things; batch mode recreates tables instead
+    _configure(connection=connection, render_as_batch=connection.dialect.name == "sqlite")
+    with context.begin_transaction():
+        if connection.dialect.name == "postgresql":
+            connection.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _run(connection)
+        return
+    url = config.attributes.get("url") or str(settings.DATABASE_URL)
+    engine = create_engine(url, poolclass=pool.NullPool)
+    try:
+        with engine.connect() as connection:
+            _run(connection)
+    finally:
+        engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
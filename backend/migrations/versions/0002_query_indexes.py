@@ -0,0 +1,55 @@
+"""Query-shaped indexes.
+
+Indexes for the task listings and the audit log and security event
+filters (see the models and ``database/plan_check.py``).
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 15:32:40.118204
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_tasks_user_category_created', 'tasks', ['user_id', 'category', sa.text('created_at DESC')], unique=False)
+    op.create_index('ix_tasks_user_created', 'tasks', ['user_id', sa.text('created_at DESC'), sa.text('id DESC')], unique=False)
+    op.create_index('ix_tasks_user_due_open', 'tasks', ['user_id', 'due_date'], unique=False, postgresql_where=sa.text("status != 'DONE'"), sqlite_where=sa.text("status != 'DONE'"))
+    op.create_index('ix_tasks_user_priority_created', 'tasks', ['user_id', 'priority', sa.text('created_at DESC')], unique=False)
+    op.create_index('ix_tasks_user_status_created', 'tasks', ['user_id', 'status', sa.text('created_at DESC')], unique=False)
+    op.create_index('ix_activity_logs_action_created', 'activity_logs', ['action', sa.text('created_at DESC'), sa.text('id DESC')], unique=False)
+    op.create_index('ix_activity_logs_ip_created', 'activity_logs', ['ip_address', sa.text('created_at DESC'), sa.text('id DESC')], unique=False)
+    op.create_index('ix_activity_logs_created', 'activity_logs', [sa.text('created_at DESC'), sa.text('id DESC')], unique=False)
+    op.create_index('ix_activity_logs_task_created', 'activity_logs', ['task_id', sa.text('created_at DESC'), sa.text('id DESC')], unique=False)
+    op.create_index('ix_activity_logs_user_created', 'activity_logs', ['user_id', sa.text('created_at DESC'), sa.text('id DESC')], unique=False)
+    op.create_index('ix_security_events_created', 'security_events', [sa.text('created_at DESC'), sa.text('id DESC')], unique=False)
+    op.create_index('ix_security_events_ip_created', 'security_events', ['ip_address', sa.text('created_at DESC'), sa.text('id DESC')], unique=False)
+    op.create_index('ix_security_events_severity_created', 'security_events', ['severity', sa.text('created_at DESC'), sa.text('id DESC')], unique=False)
+    op.create_index('ix_security_events_type_created', 'security_events', ['event_type', sa.text('created_at DESC'), sa.text('id DESC')], unique=False)
+    op.create_index('ix_security_events_user_created', 'security_events', ['user_id', sa.text('created_at DESC'), sa.text('id DESC')], unique=False)
+    op.create_index('ix_attachments_task', 'attachments', ['task_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_attachments_task', table_name='attachments')
+    op.drop_index('ix_security_events_user_created', table_name='security_events')
+    op.drop_index('ix_security_events_type_created', table_name='security_events')
+    op.drop_index('ix_security_events_severity_created', table_name='security_events')
+    op.drop_index('ix_security_events_ip_created', table_name='security_events')
+    op.drop_index('ix_security_events_created', table_name='security_events')
+    op.drop_index('ix_activity_logs_user_created', table_name='activity_logs')
+    op.drop_index('ix_activity_logs_task_created', table_name='activity_logs')
+    op.drop_index('ix_activity_logs_ip_created', table_name='activity_logs')
+    op.drop_index('ix_activity_logs_created', table_name='activity_logs')
+    op.drop_index('ix_activity_logs_action_created', table_name='activity_logs')
+    op.drop_index('ix_tasks_user_status_created', table_name='tasks')
+    op.drop_index('ix_tasks_user_priority_created', table_name='tasks')
+    op.drop_index('ix_tasks_user_due_open', table_name='tasks')
+    op.drop_index('ix_tasks_user_created', table_name='tasks')
+    op.drop_index('ix_tasks_user_category_created', table_name='tasks')
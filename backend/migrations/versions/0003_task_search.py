@@ -0,0 +1,69 @@
+"""Full-text search schema.
+
+The per-dialect search objects that ``database.search`` installs. On
+PostgreSQL the generated ``search_vector`` column is computed for existing
+rows; on SQLite the FTS5 table is filled from them, since its triggers only
+see later writes.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 15:33:11.540977
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+# Full-text search schema, frozen as of this revision (see database/search.py)
+SEARCH_DDL = {
+    "postgresql": [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+        ") STORED",
+        "CREATE INDEX IF NOT EXISTS ix_tasks_search_vector ON tasks USING gin (search_vector)",
+        "CREATE INDEX IF NOT EXISTS ix_tasks_title_trgm ON tasks USING gin (title gin_trgm_ops)",
+        "CREATE INDEX IF NOT EXISTS ix_tasks_tags_gin ON tasks USING gin (tags)",
+    ],
+    "sqlite": [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5("
+        "task_id UNINDEXED, title, description, tokenize = 'porter unicode61')",
+        "CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN "
+        "INSERT INTO tasks_fts (task_id, title, description) VALUES (new.id, new.title, new.description); END",
+        "CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN "
+        "DELETE FROM tasks_fts WHERE task_id = old.id; END",
+        "CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF title, description ON tasks BEGIN "
+        "UPDATE tasks_fts SET title = new.title, description = new.description WHERE task_id = old.id; END",
+        "INSERT INTO tasks_fts (task_id, title, description) SELECT id, title, description FROM tasks",
+    ],
+}
+
+DROP_DDL = {
+    "postgresql": [
+        "DROP INDEX IF EXISTS ix_tasks_tags_gin",
+        "DROP INDEX IF EXISTS ix_tasks_title_trgm",
+        "DROP INDEX IF EXISTS ix_tasks_search_vector",
+        "ALTER TABLE tasks DROP COLUMN IF EXISTS search_vector",
+    ],
+    "sqlite": [
+        "DROP TRIGGER IF EXISTS tasks_fts_update",
+        "DROP TRIGGER IF EXISTS tasks_fts_delete",
+        "DROP TRIGGER IF EXISTS tasks_fts_insert",
+        "DROP TABLE IF EXISTS tasks_fts",
+    ],
+}
+
+
+def upgrade() -> None:
+    for statement in SEARCH_DDL.get(op.get_bind().dialect.name, []):
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    # The pg_trgm extension stays: other schemas may use it
+    for statement in DROP_DDL.get(op.get_bind().dialect.name, []):
+        op.execute(statement)
@@ -0,0 +1,41 @@
+"""Per-user task stat counters.
+
+The routes only ever adjust counters by deltas, so they are filled here
+from the existing tasks; stored enum names map to the API values by
+lower-casing them (``IN_PROGRESS`` -> ``in_progress``).
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 15:33:45.902316
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('task_stat_counters',
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('dimension', sa.String(length=20), nullable=False),
+    sa.Column('value', sa.String(length=100), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'dimension', 'value')
+    )
+    op.execute(
+        "INSERT INTO task_stat_counters (user_id, dimension, value, count) "
+        "SELECT user_id, 'status', lower(CAST(status AS VARCHAR(20))), count(*) FROM tasks GROUP BY user_id, status "
+        "UNION ALL "
+        "SELECT user_id, 'priority', lower(CAST(priority AS VARCHAR(20))), count(*) FROM tasks GROUP BY user_id, priority "
+        "UNION ALL "
+        "SELECT user_id, 'category', category, count(*) FROM tasks WHERE category IS NOT NULL GROUP BY user_id, category"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('task_stat_counters')
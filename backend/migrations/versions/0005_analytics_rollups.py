@@ -0,0 +1,62 @@
+"""Analytics rollups.
+
+The running totals only move by deltas afterwards, so they start from
+the current counts here (``TOTAL_BUCKET`` in ``services.rollups``).
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 15:34:20.377051
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+# Bucket the running totals are stored under (services.rollups.TOTAL_BUCKET)
+TOTAL_BUCKET = datetime(1970, 1, 1)
+
+
+def upgrade() -> None:
+    op.create_table('analytics_active_users',
+    sa.Column('granularity', sa.String(length=8), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.PrimaryKeyConstraint('granularity', 'bucket_start', 'user_id')
+    )
+    op.create_table('analytics_rollups',
+    sa.Column('granularity', sa.String(length=8), nullable=False),
+    sa.Column('metric', sa.String(length=50), nullable=False),
+    sa.Column('dimension', sa.String(length=50), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('value', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('granularity', 'metric', 'dimension', 'bucket_start')
+    )
+    rollups = sa.table(
+        'analytics_rollups',
+        sa.column('granularity', sa.String), sa.column('metric', sa.String), sa.column('dimension', sa.String),
+        sa.column('bucket_start', sa.DateTime), sa.column('value', sa.BigInteger),
+    )
+    users = sa.table('users', sa.column('is_active', sa.Boolean))
+    tasks = sa.table('tasks')
+    for metric, source, condition in [
+        ("users_total", users, sa.true()),
+        ("users_active", users, users.c.is_active == sa.true()),
+        ("tasks_total", tasks, sa.true()),
+    ]:
+        op.execute(rollups.insert().from_select(
+            ['granularity', 'metric', 'dimension', 'bucket_start', 'value'],
+            sa.select(
+                sa.literal('total'), sa.literal(metric), sa.literal(''), sa.literal(TOTAL_BUCKET, sa.DateTime),
+                sa.func.count(),
+            ).select_from(source).where(condition),
+        ))
+
+
+def downgrade() -> None:
+    op.drop_table('analytics_rollups')
+    op.drop_table('analytics_active_users')
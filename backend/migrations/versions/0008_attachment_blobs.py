@@ -0,0 +1,45 @@
+"""Content-addressed attachment blobs.
+
+Attachments now point at a shared, reference-counted blob by SHA-256
+instead of owning a file each. No upload route existed before this
+revision, so ``attachments`` is empty and the new column can be NOT NULL.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 15:40:02.801238
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('attachment_blobs',
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('sha256')
+    )
+    op.create_index('ix_attachment_blobs_unreferenced', 'attachment_blobs', ['sha256'], unique=False,
+                    postgresql_where=sa.text('ref_count <= 0'), sqlite_where=sa.text('ref_count <= 0'))
+
+    with op.batch_alter_table('attachments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('sha256', sa.String(length=64), nullable=False))
+        batch_op.create_index('ix_attachments_sha256', ['sha256'], unique=False)
+        batch_op.create_foreign_key('fk_attachments_sha256_attachment_blobs', 'attachment_blobs', ['sha256'], ['sha256'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('attachments', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_attachments_sha256_attachment_blobs', type_='foreignkey')
+        batch_op.drop_index('ix_attachments_sha256')
+        batch_op.drop_column('sha256')
+
+    op.drop_index('ix_attachment_blobs_unreferenced', table_name='attachment_blobs')
+    op.drop_table('attachment_blobs')
@@ -0,0 +1,66 @@
+"""Per-user change sequence and tombstones for delta sync.
+
+Existing tasks are numbered in ``updated_at`` order per user and each
+user's counter starts after their last task. Tasks deleted before this
+revision have no tombstones; no client can hold a cursor from before it.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 15:52:09.247737
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('task_change_counters',
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('last_seq', sa.BigInteger(), nullable=False),
+    sa.Column('compacted_seq', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_table('task_tombstones',
+    sa.Column('task_id', sa.Uuid(), nullable=False),
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('change_seq', sa.BigInteger(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('task_id')
+    )
+    with op.batch_alter_table('task_tombstones', schema=None) as batch_op:
+        batch_op.create_index('ix_task_tombstones_deleted_at', ['deleted_at'], unique=False)
+        batch_op.create_index('ix_task_tombstones_user_seq', ['user_id', 'change_seq'], unique=False)
+
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('change_seq', sa.BigInteger(), server_default='0', nullable=False))
+        batch_op.create_index('ix_tasks_user_change_seq', ['user_id', 'change_seq'], unique=False)
+
+    op.execute(
+        "UPDATE tasks SET change_seq = ranked.seq "
+        "FROM (SELECT id, row_number() OVER (PARTITION BY user_id ORDER BY updated_at, id) AS seq FROM tasks) AS ranked "
+        "WHERE tasks.id = ranked.id"
+    )
+    op.execute(
+        "INSERT INTO task_change_counters (user_id, last_seq, compacted_seq) "
+        "SELECT user_id, max(change_seq), 0 FROM tasks GROUP BY user_id"
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.drop_index('ix_tasks_user_change_seq')
+        batch_op.drop_column('change_seq')
+
+    with op.batch_alter_table('task_tombstones', schema=None) as batch_op:
+        batch_op.drop_index('ix_task_tombstones_user_seq')
+        batch_op.drop_index('ix_task_tombstones_deleted_at')
+
+    op.drop_table('task_tombstones')
+    op.drop_table('task_change_counters')
@@ -0,0 +1,69 @@
+"""External-content full-text index on SQLite.
+
+``tasks_fts`` becomes an external-content FTS5 table keyed on the
+``tasks`` rowid, so the triggers update it by rowid instead of scanning it
+for a ``task_id``. It is rebuilt from ``tasks``; a later migration that
+recreates ``tasks`` on SQLite (batch "move and copy") must rebuild it too.
+PostgreSQL is unchanged.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19 09:12:44.630518
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+DROP_DDL = [
+    "DROP TRIGGER IF EXISTS tasks_fts_update",
+    "DROP TRIGGER IF EXISTS tasks_fts_delete",
+    "DROP TRIGGER IF EXISTS tasks_fts_insert",
+    "DROP TABLE IF EXISTS tasks_fts",
+]
+
+# Frozen as of this revision (see database/search.py)
+SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE tasks_fts USING fts5("
+    "title, description, content = 'tasks', content_rowid = 'rowid', tokenize = 'porter unicode61')",
+    "CREATE TRIGGER tasks_fts_insert AFTER INSERT ON tasks BEGIN "
+    "INSERT INTO tasks_fts (rowid, title, description) VALUES (new.rowid, new.title, new.description); END",
+    "CREATE TRIGGER tasks_fts_delete AFTER DELETE ON tasks BEGIN "
+    "INSERT INTO tasks_fts (tasks_fts, rowid, title, description) "
+    "VALUES ('delete', old.rowid, old.title, old.description); END",
+    "CREATE TRIGGER tasks_fts_update AFTER UPDATE OF title, description ON tasks BEGIN "
+    "INSERT INTO tasks_fts (tasks_fts, rowid, title, description) "
+    "VALUES ('delete', old.rowid, old.title, old.description); "
+    "INSERT INTO tasks_fts (rowid, title, description) VALUES (new.rowid, new.title, new.description); END",
+    "INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')",
+]
+
+# Revision 0003's schema
+PREVIOUS_DDL = [
+    "CREATE VIRTUAL TABLE tasks_fts USING fts5("
+    "task_id UNINDEXED, title, description, tokenize = 'porter unicode61')",
+    "CREATE TRIGGER tasks_fts_insert AFTER INSERT ON tasks BEGIN "
+    "INSERT INTO tasks_fts (task_id, title, description) VALUES (new.id, new.title, new.description); END",
+    "CREATE TRIGGER tasks_fts_delete AFTER DELETE ON tasks BEGIN "
+    "DELETE FROM tasks_fts WHERE task_id = old.id; END",
+    "CREATE TRIGGER tasks_fts_update AFTER UPDATE OF title, description ON tasks BEGIN "
+    "UPDATE tasks_fts SET title = new.title, description = new.description WHERE task_id = old.id; END",
+    "INSERT INTO tasks_fts (task_id, title, description) SELECT id, title, description FROM tasks",
+]
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for statement in DROP_DDL + SEARCH_DDL:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for statement in DROP_DDL + PREVIOUS_DDL:
+        op.execute(statement)
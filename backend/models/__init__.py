@@ -1,9 +1,14 @@
 """Models package initialization."""
 from models.user import User, UserRole
 from models.task import Task, TaskPriority, TaskStatus
-from models.attachment import Attachment
+from models.attachment import Attachment, AttachmentBlob
 from models.audit_log import ActivityLog
 from models.security_event import SecurityEvent, SecurityEventSeverity
+from models.task_stats import TaskStatCounter
+from models.task_change import TaskChangeCounter, TaskTombstone
+from models.analytics import AnalyticsRollup, AnalyticsActiveUser
+from models.cache_version import CacheVersion
+from models.revoked_token import RevokedToken
 
 __all__ = [
     "User",
@@ -12,7 +17,15 @@ __all__ = [
     "TaskPriority",
     "TaskStatus",
     "Attachment",
+    "AttachmentBlob",
     "ActivityLog",
     "SecurityEvent",
     "SecurityEventSeverity",
+    "TaskStatCounter",
+    "TaskChangeCounter",
+    "TaskTombstone",
+    "AnalyticsRollup",
+    "AnalyticsActiveUser",
+    "CacheVersion",
+    "RevokedToken",
 ]
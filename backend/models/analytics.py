@@ -0,0 +1,36 @@
+from sqlalchemy import Column, String, BigInteger, DateTime
+from database.types import UUID
+from database.session import Base
+
+
+class AnalyticsRollup(Base):
+    """Pre-aggregated counter for one metric in one time bucket.
+    
+    ``granularity`` is ``hour`` or ``day`` for time series, or ``total`` for
+    running gauges (stored under a fixed epoch bucket). ``dimension`` splits a
+    metric further, e.g. security events by severity; it is empty otherwise.
+    """
+    
+    __tablename__ = "analytics_rollups"
+    
+    granularity = Column(String(8), primary_key=True)
+    metric = Column(String(50), primary_key=True)
+    dimension = Column(String(50), primary_key=True, default="")
+    bucket_start = Column(DateTime, primary_key=True)
+    value = Column(BigInteger, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f"<AnalyticsRollup {self.granularity} {self.metric}/{self.dimension} @ {self.bucket_start}: {self.value}>"
+
+
+class AnalyticsActiveUser(Base):
+    """Distinct users seen in a time bucket, used to count active users once."""
+    
+    __tablename__ = "analytics_active_users"
+    
+    granularity = Column(String(8), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    user_id = Column(UUID(as_uuid=True), primary_key=True)
+    
+    def __repr__(self):
+        return f"<AnalyticsActiveUser {self.user_id} @ {self.bucket_start}>"
@@ -1,11 +1,41 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import BigInteger, Column, String, Integer, DateTime, ForeignKey, Index
+from database.types import UUID
 from sqlalchemy.orm import relationship
 from database.session import Base
 
 
+class AttachmentBlob(Base):
+    """Stored file content, shared by every attachment with the same bytes.
+    
+    Files live under ``UPLOAD_DIR`` addressed by their SHA-256, so uploading
+    the same file to many tasks stores it once. ``ref_count`` counts the
+    attachments using a blob; unreferenced blobs are removed by the sweeper
+    in ``services.attachments``.
+    """
+    
+    __tablename__ = "attachment_blobs"
+    
+    sha256 = Column(String(64), primary_key=True)
+    size = Column(BigInteger, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (
+        # The sweeper only ever looks for unreferenced blobs
+        Index(
+            "ix_attachment_blobs_unreferenced",
+            sha256,
+            postgresql_where=ref_count <= 0,
+            sqlite_where=ref_count <= 0,
+        ),
+    )
+    
+    def __repr__(self):
+        return f"<AttachmentBlob {self.sha256} refs={self.ref_count}>"
+
+
 class Attachment(Base):
     """Attachment model for task file uploads."""
     
@@ -14,11 +44,17 @@ class Attachment(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     task_id = Column(UUID(as_uuid=True), ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False)
     filename = Column(String(255), nullable=False)
-    file_path = Column(String(500), nullable=False)
+    file_path = Column(String(500), nullable=False)  # blob path, relative to UPLOAD_DIR
+    sha256 = Column(String(64), ForeignKey("attachment_blobs.sha256"), nullable=False)
     file_size = Column(Integer, nullable=False)
     mime_type = Column(String(100), nullable=False)
     uploaded_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     
+    __table_args__ = (
+        Index("ix_attachments_task", task_id),
+        Index("ix_attachments_sha256", sha256),
+    )
+    
     # Relationships
     task = relationship("Task", back_populates="attachments")
     
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Index
+from database.types import UUID, JSONB
 from sqlalchemy.orm import relationship
 from database.session import Base
 
@@ -20,6 +20,14 @@ class ActivityLog(Base):
     user_agent = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     
+    __table_args__ = (
+        Index("ix_activity_logs_created", created_at.desc(), id.desc()),
+        Index("ix_activity_logs_user_created", user_id, created_at.desc(), id.desc()),
+        Index("ix_activity_logs_task_created", task_id, created_at.desc(), id.desc()),
+        Index("ix_activity_logs_action_created", action, created_at.desc(), id.desc()),
+        Index("ix_activity_logs_ip_created", ip_address, created_at.desc(), id.desc()),
+    )
+    
     # Relationships
     user = relationship("User", back_populates="activity_logs")
     task = relationship("Task", back_populates="activity_logs")
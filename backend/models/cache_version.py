@@ -0,0 +1,19 @@
+from sqlalchemy import Column, String, BigInteger
+from database.session import Base
+
+
+class CacheVersion(Base):
+    """Version counter for an in-process cache shared by every worker.
+    
+    Writers bump ``version`` in the transaction that changes the cached data;
+    workers poll the row (a primary-key lookup) and drop entries loaded under
+    an older version.
+    """
+    
+    __tablename__ = "cache_versions"
+    
+    name = Column(String(50), primary_key=True)
+    version = Column(BigInteger, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f"<CacheVersion {self.name}={self.version}>"
@@ -0,0 +1,27 @@
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index
+from database.types import UUID
+from database.session import Base
+
+
+class RevokedToken(Base):
+    """A JWT revoked before its expiry, identified by its ``jti`` claim.
+    
+    Rows are only needed until ``expires_at``; after that the token is
+    rejected by its own ``exp`` claim and the row is purged.
+    """
+    
+    __tablename__ = "revoked_tokens"
+    
+    jti = Column(String(64), primary_key=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
+    expires_at = Column(DateTime, nullable=False)
+    revoked_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_revoked_tokens_revoked_at", revoked_at),
+        Index("ix_revoked_tokens_expires_at", expires_at),
+    )
+    
+    def __repr__(self):
+        return f"<RevokedToken {self.jti}>"
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, Enum as SQLEnum, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy import Column, String, DateTime, Enum as SQLEnum, ForeignKey, Index
+from database.types import UUID, JSONB
 import enum
 from database.session import Base
 
@@ -27,5 +27,13 @@ class SecurityEvent(Base):
     ip_address = Column(String(45))
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     
+    __table_args__ = (
+        Index("ix_security_events_created", created_at.desc(), id.desc()),
+        Index("ix_security_events_user_created", user_id, created_at.desc(), id.desc()),
+        Index("ix_security_events_type_created", event_type, created_at.desc(), id.desc()),
+        Index("ix_security_events_severity_created", severity, created_at.desc(), id.desc()),
+        Index("ix_security_events_ip_created", ip_address, created_at.desc(), id.desc()),
+    )
+    
     def __repr__(self):
         return f"<SecurityEvent {self.event_type} - {self.severity}>"
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Text, DateTime, Enum as SQLEnum, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy import BigInteger, Column, String, Text, DateTime, Enum as SQLEnum, ForeignKey, Index
+from database.types import UUID, JSONB
 from sqlalchemy.orm import relationship
 import enum
 from database.session import Base
@@ -38,6 +38,27 @@ class Task(Base):
     due_date = Column(DateTime)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    # Position in the owner's change sequence (see TaskChangeCounter); 0 for rows written in bulk
+    change_seq = Column(BigInteger, default=0, server_default="0", nullable=False)
+    
+    # Indexes follow the query shapes in routes/tasks.py: every query is scoped
+    # to one user and listings are ordered newest first with id as tie-breaker.
+    __table_args__ = (
+        Index("ix_tasks_user_created", user_id, created_at.desc(), id.desc()),
+        Index("ix_tasks_user_status_created", user_id, status, created_at.desc()),
+        Index("ix_tasks_user_priority_created", user_id, priority, created_at.desc()),
+        Index("ix_tasks_user_category_created", user_id, category, created_at.desc()),
+        # Delta sync: a user's tasks changed after a cursor
+        Index("ix_tasks_user_change_seq", user_id, change_seq),
+        # Open tasks by due date (overdue / due-soon lookups)
+        Index(
+            "ix_tasks_user_due_open",
+            user_id,
+            due_date,
+            postgresql_where=status != TaskStatus.DONE,
+            sqlite_where=status != TaskStatus.DONE,
+        ),
+    )
     
     # Relationships
     user = relationship("User", back_populates="tasks")
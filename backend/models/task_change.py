@@ -0,0 +1,45 @@
+from datetime import datetime
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Index
+from database.types import UUID
+from database.session import Base
+
+
+class TaskChangeCounter(Base):
+    """Per-user change sequence for delta sync (``GET /tasks/changes``).
+    
+    Every task write takes the next ``last_seq`` and stamps it on the task
+    (or on its tombstone). Taking it locks this row until the transaction
+    commits, so one user's changes commit in sequence order and a cursor
+    never skips a change that commits late. ``compacted_seq`` is the newest
+    tombstone already compacted away: older cursors can no longer see every
+    delete.
+    """
+    
+    __tablename__ = "task_change_counters"
+    
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    last_seq = Column(BigInteger, nullable=False, default=0)
+    compacted_seq = Column(BigInteger, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<TaskChangeCounter {self.user_id}: {self.last_seq}>"
+
+
+class TaskTombstone(Base):
+    """Record of a deleted task, kept so delta sync can report the delete."""
+    
+    __tablename__ = "task_tombstones"
+    
+    task_id = Column(UUID(as_uuid=True), primary_key=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    change_seq = Column(BigInteger, nullable=False)
+    deleted_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_task_tombstones_user_seq", user_id, change_seq),
+        # Compaction removes the oldest tombstones
+        Index("ix_task_tombstones_deleted_at", deleted_at),
+    )
+    
+    def __repr__(self):
+        return f"<TaskTombstone {self.task_id}>"
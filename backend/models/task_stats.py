@@ -0,0 +1,22 @@
+from sqlalchemy import Column, String, Integer, ForeignKey
+from database.types import UUID
+from database.session import Base
+
+
+class TaskStatCounter(Base):
+    """Per-user task counter for one value of a stats dimension.
+    
+    ``dimension`` is ``status``, ``priority`` or ``category`` and ``value``
+    the corresponding task field value. Rows are maintained incrementally by
+    the task routes and can be rebuilt with ``python -m services.task_stats``.
+    """
+    
+    __tablename__ = "task_stat_counters"
+    
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    dimension = Column(String(20), primary_key=True)
+    value = Column(String(100), primary_key=True)
+    count = Column(Integer, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f"<TaskStatCounter {self.dimension}={self.value}: {self.count}>"
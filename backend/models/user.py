@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 from sqlalchemy import Column, String, Boolean, DateTime, Enum as SQLEnum
-from sqlalchemy.dialects.postgresql import UUID
+from database.types import UUID
 from sqlalchemy.orm import relationship
 import enum
 from database.session import Base
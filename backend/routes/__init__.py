@@ -2,5 +2,7 @@
 from routes.auth import router as auth_router
 from routes.tasks import router as tasks_router
 from routes.admin import router as admin_router
+from routes.attachments import router as attachments_router
+from routes.events import router as events_router
 
-__all__ = ["auth_router", "tasks_router", "admin_router"]
+__all__ = ["auth_router", "tasks_router", "admin_router", "attachments_router", "events_router"]
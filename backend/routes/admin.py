@@ -1,13 +1,39 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import ORJSONResponse, PlainTextResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
 from database import get_db
-from models import User, UserRole, ActivityLog, SecurityEvent
-from schemas import UserResponse
-from auth import require_admin
+from database.replicas import get_read_db, track_writes
+from database.pagination import InvalidCursorError, apply_keyset, split_page
+from database.types import naive_utc
+from models import User, UserRole, ActivityLog, SecurityEvent, SecurityEventSeverity
+from schemas import UserResponse, ActivityLogPage, SecurityEventPage
+from schemas.payloads import USER_RESPONSE_COLUMNS, rows_payload, user_payload
+from auth import Principal, require_admin, bump_principal_version, principal_cache
+from services.audit import audit_writer
+from services.profiling import profiles, render_collapsed, request_profiling, slow_requests
+from services.ratelimit import rate_limit, user_rate_limit
+from services.rollups import rollups, get_series, get_totals, TASKS_TOTAL, USERS_ACTIVE, USERS_TOTAL
 from pydantic import BaseModel
 
-router = APIRouter(prefix="/admin", tags=["Admin"])
+router = APIRouter(
+    prefix="/admin",
+    tags=["Admin"],
+    dependencies=[
+        Depends(rate_limit()), Depends(user_rate_limit()), Depends(request_profiling), Depends(track_writes),
+    ],
+)
+
+# Largest page the audit/security listings will return
+MAX_PAGE_SIZE = 500
+
+# Analytics ranges per granularity
+DEFAULT_ANALYTICS_RANGE = {"hour": timedelta(hours=48), "day": timedelta(days=30)}
+MAX_ANALYTICS_RANGE = {"hour": timedelta(days=31), "day": timedelta(days=366)}
 
 
 class UserRoleUpdate(BaseModel):
@@ -22,22 +48,23 @@ class UserStatusUpdate(BaseModel):
 
 @router.get("/users", response_model=List[UserResponse])
 async def list_users(
-    admin_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    admin_user: Principal = Depends(require_admin),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """List all users (admin only)."""
-    users = db.query(User).all()
-    return users
+    result = await db.execute(select(*USER_RESPONSE_COLUMNS))
+    return ORJSONResponse(rows_payload(result.all()))
 
 
 @router.get("/users/{user_id}", response_model=UserResponse)
 async def get_user(
-    user_id: str,
-    admin_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    user_id: uuid.UUID,
+    admin_user: Principal = Depends(require_admin),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get user details (admin only)."""
-    user = db.query(User).filter(User.id == user_id).first()
+    result = await db.execute(select(*USER_RESPONSE_COLUMNS).where(User.id == user_id))
+    user = result.first()
     
     if not user:
         raise HTTPException(
@@ -45,18 +72,19 @@ async def get_user(
             detail="User not found"
         )
     
-    return user
+    return ORJSONResponse(user._asdict())
 
 
 @router.patch("/users/{user_id}/role", response_model=UserResponse)
 async def update_user_role(
-    user_id: str,
+    user_id: uuid.UUID,
     role_data: UserRoleUpdate,
-    admin_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    request: Request,
+    admin_user: Principal = Depends(require_admin),
+    db: AsyncSession = Depends(get_db)
 ):
     """Update user role (admin only)."""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     
     if not user:
         raise HTTPException(
@@ -64,22 +92,33 @@ async def update_user_role(
             detail="User not found"
         )
     
+    previous_role = user.role
     user.role = role_data.role
-    db.commit()
-    db.refresh(user)
+    await bump_principal_version(db)
+    await db.commit()
+    await db.refresh(user)
+    principal_cache.invalidate(user.id)
     
-    return user
+    audit_writer.record(
+        "admin.user_role_changed",
+        admin_user.id,
+        details={"target_user_id": str(user.id), "from": previous_role.value, "to": user.role.value},
+        request=request,
+    )
+    
+    return ORJSONResponse(user_payload(user))
 
 
 @router.patch("/users/{user_id}/status", response_model=UserResponse)
 async def update_user_status(
-    user_id: str,
+    user_id: uuid.UUID,
     status_data: UserStatusUpdate,
-    admin_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    request: Request,
+    admin_user: Principal = Depends(require_admin),
+    db: AsyncSession = Depends(get_db)
 ):
     """Activate or deactivate user (admin only)."""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     
     if not user:
         raise HTTPException(
@@ -87,50 +126,189 @@ async def update_user_status(
             detail="User not found"
         )
     
+    was_active = user.is_active
     user.is_active = status_data.is_active
-    db.commit()
-    db.refresh(user)
+    await bump_principal_version(db)
+    await db.commit()
+    await db.refresh(user)
+    principal_cache.invalidate(user.id)
+    
+    audit_writer.record(
+        "admin.user_status_changed",
+        admin_user.id,
+        details={"target_user_id": str(user.id), "is_active": user.is_active},
+        request=request,
+    )
+    if was_active != user.is_active:
+        rollups.adjust_total(USERS_ACTIVE, 1 if user.is_active else -1)
     
-    return user
+    return ORJSONResponse(user_payload(user))
+
+
+def build_audit_log_query(
+    user_id: Optional[uuid.UUID] = None,
+    task_id: Optional[uuid.UUID] = None,
+    action: Optional[str] = None,
+    ip_address: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> Select:
+    """Build the filtered (unordered, unpaginated) audit log query."""
+    query = select(ActivityLog)
+    if user_id:
+        query = query.where(ActivityLog.user_id == user_id)
+    if task_id:
+        query = query.where(ActivityLog.task_id == task_id)
+    if action:
+        query = query.where(ActivityLog.action == action)
+    if ip_address:
+        query = query.where(ActivityLog.ip_address == ip_address)
+    if start:
+        query = query.where(ActivityLog.created_at >= naive_utc(start))
+    if end:
+        query = query.where(ActivityLog.created_at < naive_utc(end))
+    return query
+
 
+def build_security_event_query(
+    user_id: Optional[uuid.UUID] = None,
+    event_type: Optional[str] = None,
+    severity: Optional[SecurityEventSeverity] = None,
+    ip_address: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> Select:
+    """Build the filtered (unordered, unpaginated) security event query."""
+    query = select(SecurityEvent)
+    if user_id:
+        query = query.where(SecurityEvent.user_id == user_id)
+    if event_type:
+        query = query.where(SecurityEvent.event_type == event_type)
+    if severity:
+        query = query.where(SecurityEvent.severity == severity)
+    if ip_address:
+        query = query.where(SecurityEvent.ip_address == ip_address)
+    if start:
+        query = query.where(SecurityEvent.created_at >= naive_utc(start))
+    if end:
+        query = query.where(SecurityEvent.created_at < naive_utc(end))
+    return query
 
-@router.get("/audit-logs")
+
+async def fetch_page(db: AsyncSession, query: Select, model, cursor: Optional[str], limit: int) -> dict:
+    """Run a keyset-paginated query, newest first."""
+    try:
+        page_query = apply_keyset(query, model.created_at, model.id, cursor, limit)
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    result = await db.scalars(page_query)
+    items, next_cursor = split_page(result.all(), limit)
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.get("/audit-logs", response_model=ActivityLogPage)
 async def get_audit_logs(
-    limit: int = 100,
-    admin_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    user_id: Optional[uuid.UUID] = None,
+    task_id: Optional[uuid.UUID] = None,
+    action: Optional[str] = None,
+    ip_address: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    admin_user: Principal = Depends(require_admin),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get audit logs (admin only)."""
-    logs = db.query(ActivityLog).order_by(ActivityLog.created_at.desc()).limit(limit).all()
-    return logs
+    """Get audit logs, newest first, with filters and cursor pagination (admin only)."""
+    query = build_audit_log_query(user_id, task_id, action, ip_address, start, end)
+    return await fetch_page(db, query, ActivityLog, cursor, limit)
 
 
-@router.get("/security-events")
+@router.get("/security-events", response_model=SecurityEventPage)
 async def get_security_events(
-    limit: int = 100,
-    admin_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    user_id: Optional[uuid.UUID] = None,
+    event_type: Optional[str] = None,
+    severity: Optional[SecurityEventSeverity] = None,
+    ip_address: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    admin_user: Principal = Depends(require_admin),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get security events (admin only)."""
-    events = db.query(SecurityEvent).order_by(SecurityEvent.created_at.desc()).limit(limit).all()
-    return events
+    """Get security events, newest first, with filters and cursor pagination (admin only)."""
+    query = build_security_event_query(user_id, event_type, severity, ip_address, start, end)
+    return await fetch_page(db, query, SecurityEvent, cursor, limit)
 
 
 @router.get("/analytics")
 async def get_analytics(
-    admin_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    granularity: str = Query("day", pattern="^(hour|day)$"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    admin_user: Principal = Depends(require_admin),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get system analytics (admin only)."""
-    from models import Task
+    """Get system analytics from pre-aggregated rollups (admin only).
+    
+    Returns running totals plus hourly or daily series for ``[start, end)``
+    (default: the last 48 hours or 30 days).
+    """
+    end = naive_utc(end) or datetime.utcnow()
+    start = naive_utc(start) or end - DEFAULT_ANALYTICS_RANGE[granularity]
+    
+    if start >= end or end - start > MAX_ANALYTICS_RANGE[granularity]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range must be positive and at most {MAX_ANALYTICS_RANGE[granularity].days} days for {granularity} granularity"
+        )
     
-    total_users = db.query(User).count()
-    active_users = db.query(User).filter(User.is_active == True).count()
-    total_tasks = db.query(Task).count()
+    totals = await get_totals(db)
+    total_users = totals.get(USERS_TOTAL, 0)
+    active_users = totals.get(USERS_ACTIVE, 0)
     
     return {
         "total_users": total_users,
         "active_users": active_users,
         "inactive_users": total_users - active_users,
-        "total_tasks": total_tasks
+        "total_tasks": totals.get(TASKS_TOTAL, 0),
+        "granularity": granularity,
+        "start": start,
+        "end": end,
+        "series": await get_series(db, granularity, start, end)
+    }
+
+
+@router.get("/slow-requests")
+async def get_slow_requests(admin_user: Principal = Depends(require_admin)):
+    """Recent requests over the slow request threshold, newest first (admin only).
+    
+    Each entry lists the SQL the request ran with timings, and the stacks the
+    event loop was sampled in while the request was running past the threshold.
+    """
+    return {
+        "threshold_ms": slow_requests.threshold * 1000,
+        "requests": slow_requests.records(),
     }
+
+
+@router.get("/profiles")
+async def list_profiles(admin_user: Principal = Depends(require_admin)):
+    """Recent on-demand profiles, newest first (admin only)."""
+    return profiles.list()
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(profile_id: str, admin_user: Principal = Depends(require_admin)):
+    """A profile in collapsed stack format, for flamegraph.pl or speedscope (admin only)."""
+    profile = profiles.get(profile_id)
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    return PlainTextResponse(render_collapsed(profile["stacks"]))
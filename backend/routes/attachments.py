@@ -0,0 +1,244 @@
+import asyncio
+import mimetypes
+import os
+import uuid
+from typing import List
+from urllib.parse import quote
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import settings
+from database import get_db
+from database.replicas import get_read_db, track_writes
+from models import Attachment, Task
+from schemas import AttachmentResponse
+from schemas.payloads import ATTACHMENT_RESPONSE_COLUMNS, attachment_payload, rows_payload
+from auth import Principal, get_current_user
+from services.attachments import (
+    UploadTooLarge, add_blob_reference, allowed_filename, blob_store, clean_filename, release_blob_references,
+)
+from services.audit import audit_writer
+from services.downloads import (
+    BlobFileResponse, RangeNotSatisfiable, content_disposition, http_date, is_not_modified, requested_range,
+    strong_etag,
+)
+from services.profiling import request_profiling
+from services.ratelimit import rate_limit, user_rate_limit
+
+router = APIRouter(
+    prefix="/tasks",
+    tags=["Attachments"],
+    dependencies=[
+        Depends(rate_limit()), Depends(user_rate_limit()), Depends(request_profiling), Depends(track_writes),
+    ],
+)
+
+
+async def ensure_task_owned(db: AsyncSession, task_id: uuid.UUID, user_id: uuid.UUID) -> None:
+    """Raise 404 unless the task exists and belongs to the user."""
+    if await db.scalar(select(Task.id).where(Task.id == task_id, Task.user_id == user_id)) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found"
+        )
+
+
+@router.post(
+    "/{task_id}/attachments",
+    response_model=AttachmentResponse,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra={"requestBody": {"required": True, "content": {"application/octet-stream": {}}}},
+)
+async def upload_attachment(
+    task_id: uuid.UUID,
+    request: Request,
+    filename: str = Query(..., min_length=1, max_length=255),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Attach a file to a task.
+
+    The request body is the file itself (not a multipart form), named by
+    ``filename``; its ``Content-Type`` is stored as the file's type. The body
+    is streamed to disk, so uploads of any size up to ``MAX_UPLOAD_SIZE`` use
+    constant memory. Files with the same content are stored once.
+    """
+    name = clean_filename(filename)
+    if name is None or not allowed_filename(name):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File type not allowed (allowed: {', '.join(sorted(settings.ALLOWED_EXTENSIONS))})"
+        )
+    too_large = HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File too large (max {settings.MAX_UPLOAD_SIZE} bytes)"
+    )
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length.isdigit() and int(content_length) > settings.MAX_UPLOAD_SIZE:
+        raise too_large
+
+    await ensure_task_owned(db, task_id, current_user.id)
+    # Hand the connection back to the pool while the body streams in
+    await db.rollback()
+
+    try:
+        upload = await blob_store.receive(request.stream(), settings.MAX_UPLOAD_SIZE)
+    except UploadTooLarge:
+        raise too_large
+
+    mime_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if not mime_type or mime_type == "application/octet-stream":
+        mime_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+    attachment = Attachment(
+        task_id=task_id,
+        filename=name,
+        file_path=blob_store.relative_path(upload.sha256),
+        file_size=upload.size,
+        mime_type=mime_type[:100],
+        sha256=upload.sha256,
+    )
+    try:
+        # The task may have been deleted meanwhile
+        await ensure_task_owned(db, task_id, current_user.id)
+        await add_blob_reference(db, upload)
+        db.add(attachment)
+        await db.commit()
+    except BaseException:
+        await blob_store.discard(upload)
+        raise
+    # Only now that the blob is referenced is it safe from the sweeper
+    await blob_store.store(upload)
+
+    audit_writer.record(
+        "attachment.uploaded", current_user.id, task_id,
+        {"attachment_id": str(attachment.id), "filename": name, "size": upload.size}, request,
+    )
+
+    return ORJSONResponse(attachment_payload(attachment), status_code=status.HTTP_201_CREATED)
+
+
+@router.get("/{task_id}/attachments", response_model=List[AttachmentResponse])
+async def list_attachments(
+    task_id: uuid.UUID,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """List a task's attachments, oldest first."""
+    await ensure_task_owned(db, task_id, current_user.id)
+    result = await db.execute(
+        select(*ATTACHMENT_RESPONSE_COLUMNS)
+        .where(Attachment.task_id == task_id)
+        .order_by(Attachment.uploaded_at, Attachment.id)
+    )
+    return ORJSONResponse(rows_payload(result.all()))
+
+
+@router.api_route(
+    "/{task_id}/attachments/{attachment_id}",
+    methods=["GET", "HEAD"],
+    response_class=Response,
+    responses={
+        200: {"content": {"application/octet-stream": {}}, "description": "The file"},
+        206: {"description": "The requested byte range"},
+        304: {"description": "Not modified"},
+        416: {"description": "Range not satisfiable"},
+    },
+)
+async def download_attachment(
+    task_id: uuid.UUID,
+    attachment_id: uuid.UUID,
+    request: Request,
+    disposition: str = Query("attachment", pattern="^(attachment|inline)$"),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Download an attachment.
+
+    Supports single ``Range`` requests (``206``), ``If-Range``, and
+    conditional requests against the content-hash ``ETag`` or
+    ``Last-Modified`` (``304``). ``disposition=inline`` lets a browser
+    display the file instead of saving it.
+    """
+    attachment = (await db.execute(
+        select(Attachment.filename, Attachment.mime_type, Attachment.sha256, Attachment.uploaded_at)
+        .join(Task, Task.id == Attachment.task_id)
+        .where(Attachment.id == attachment_id, Attachment.task_id == task_id, Task.user_id == current_user.id)
+    )).first()
+
+    if not attachment:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Attachment not found"
+        )
+
+    etag = strong_etag(attachment.sha256)
+    headers = {
+        "etag": etag,
+        "last-modified": http_date(attachment.uploaded_at),
+        "cache-control": "private, no-cache",
+        "accept-ranges": "bytes",
+        "content-disposition": content_disposition(disposition, attachment.filename),
+    }
+    if is_not_modified(request.headers, etag, attachment.uploaded_at):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    relative_path = blob_store.relative_path(attachment.sha256)
+    if settings.ATTACHMENT_ACCEL_REDIRECT:
+        # nginx sends the file (and handles Range) from its internal location
+        headers["x-accel-redirect"] = settings.ATTACHMENT_ACCEL_REDIRECT + quote(relative_path.replace(os.sep, "/"))
+        return Response(headers=headers, media_type=attachment.mime_type)
+
+    path = blob_store.path(attachment.sha256)
+    try:
+        size = (await asyncio.to_thread(os.stat, path)).st_size
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Attachment file not found"
+        )
+    try:
+        byte_range = requested_range(request.headers, size, etag, attachment.uploaded_at)
+    except RangeNotSatisfiable:
+        return Response(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={"content-range": f"bytes */{size}", "accept-ranges": "bytes"},
+        )
+    return BlobFileResponse(
+        path, size, headers, attachment.mime_type, byte_range, send_body=request.method != "HEAD",
+    )
+
+
+@router.delete("/{task_id}/attachments/{attachment_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_attachment(
+    task_id: uuid.UUID,
+    attachment_id: uuid.UUID,
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Delete an attachment (its file goes once no other attachment uses it)."""
+    attachment = await db.scalar(
+        select(Attachment)
+        .join(Task, Task.id == Attachment.task_id)
+        .where(Attachment.id == attachment_id, Attachment.task_id == task_id, Task.user_id == current_user.id)
+        .with_for_update(of=Attachment)
+    )
+
+    if not attachment:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Attachment not found"
+        )
+
+    await release_blob_references(db, [attachment.sha256])
+    await db.delete(attachment)
+    await db.commit()
+
+    audit_writer.record(
+        "attachment.deleted", current_user.id, task_id,
+        {"attachment_id": str(attachment_id), "filename": attachment.filename}, request,
+    )
+
+    return None
@@ -1,18 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+import uuid
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from database import get_db
 from models import User
 from schemas import UserCreate, UserResponse, LoginRequest, TokenResponse, RefreshTokenRequest, AccessTokenResponse
-from auth import verify_password, get_password_hash, create_access_token, create_refresh_token, decode_token, get_current_user
+from schemas.payloads import USER_RESPONSE_COLUMNS, user_payload
+from services.audit import audit_writer
+from services.rollups import rollups, LOGINS, USERS_ACTIVE, USERS_TOTAL
+from services.ratelimit import rate_limit, user_rate_limit
+from services.security import security_monitor
+from auth import password_hasher, create_access_token, create_refresh_token, decode_token, get_current_user, Principal, revocation_list
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
-@router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+@router.post(
+    "/register",
+    response_model=UserResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(rate_limit("register"))],
+)
+async def register(user_data: UserCreate, request: Request, db: AsyncSession = Depends(get_db)):
     """Register a new user."""
     # Check if user already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await db.scalar(select(User).where(User.email == user_data.email))
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -20,7 +35,7 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await password_hasher.hash(user_data.password)
     new_user = User(
         email=user_data.email,
         full_name=user_data.full_name,
@@ -28,18 +43,23 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     
-    return new_user
+    audit_writer.record("user.registered", new_user.id, request=request)
+    rollups.adjust_total(USERS_TOTAL, 1)
+    rollups.adjust_total(USERS_ACTIVE, 1)
+    
+    return ORJSONResponse(user_payload(new_user), status_code=status.HTTP_201_CREATED)
 
 
-@router.post("/login", response_model=TokenResponse)
-async def login(credentials: LoginRequest, db: Session = Depends(get_db)):
+@router.post("/login", response_model=TokenResponse, dependencies=[Depends(rate_limit("login"))])
+async def login(credentials: LoginRequest, request: Request, db: AsyncSession = Depends(get_db)):
     """Authenticate user and return JWT tokens."""
     # Find user
-    user = db.query(User).filter(User.email == credentials.email).first()
-    if not user or not verify_password(credentials.password, user.password_hash):
+    user = await db.scalar(select(User).where(User.email == credentials.email))
+    if not user or not await password_hasher.verify(credentials.password, user.password_hash):
+        security_monitor.login_failed(request, credentials.email, user.id if user else None)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -52,6 +72,9 @@ async def login(credentials: LoginRequest, db: Session = Depends(get_db)):
             detail="Inactive user account"
         )
     
+    audit_writer.record("user.login", user.id, request=request)
+    rollups.increment(LOGINS)
+    
     # Create tokens
     access_token = create_access_token(data={"sub": str(user.id), "role": user.role.value})
     refresh_token = create_refresh_token(data={"sub": str(user.id)})
@@ -63,19 +86,24 @@ async def login(credentials: LoginRequest, db: Session = Depends(get_db)):
     }
 
 
-@router.post("/refresh", response_model=AccessTokenResponse)
-async def refresh_token(token_data: RefreshTokenRequest, db: Session = Depends(get_db)):
+@router.post("/refresh", response_model=AccessTokenResponse, dependencies=[Depends(rate_limit("writes"))])
+async def refresh_token(token_data: RefreshTokenRequest, db: AsyncSession = Depends(get_db)):
     """Refresh access token using refresh token."""
     payload = decode_token(token_data.refresh_token)
     
-    if payload is None or payload.get("type") != "refresh":
+    if payload is None or payload.get("type") != "refresh" or (
+        payload.get("jti") is not None and await revocation_list.is_revoked(db, payload["jti"])
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid refresh token"
         )
     
-    user_id = payload.get("sub")
-    user = db.query(User).filter(User.id == user_id).first()
+    try:
+        user_id = uuid.UUID(payload.get("sub"))
+    except (TypeError, ValueError):
+        user_id = None
+    user = await db.scalar(select(User).where(User.id == user_id)) if user_id else None
     
     if not user or not user.is_active:
         raise HTTPException(
@@ -92,13 +120,49 @@ async def refresh_token(token_data: RefreshTokenRequest, db: Session = Depends(g
     }
 
 
-@router.get("/profile", response_model=UserResponse)
-async def get_profile(current_user: User = Depends(get_current_user)):
+@router.get(
+    "/profile",
+    response_model=UserResponse,
+    dependencies=[Depends(rate_limit("reads")), Depends(user_rate_limit("reads"))],
+)
+async def get_profile(current_user: Principal = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
     """Get current user profile."""
-    return current_user
+    result = await db.execute(select(*USER_RESPONSE_COLUMNS).where(User.id == current_user.id))
+    user = result.first()
+    
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    return ORJSONResponse(user._asdict())
 
 
-@router.post("/logout")
-async def logout(current_user: User = Depends(get_current_user)):
-    """Logout user (client should discard tokens)."""
+@router.post("/logout", dependencies=[Depends(rate_limit("writes")), Depends(user_rate_limit("writes"))])
+async def logout(
+    request: Request,
+    token_data: Optional[RefreshTokenRequest] = None,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Logout user by revoking the access token (and the refresh token, if sent)."""
+    payloads = [request.state.token_payload]
+    if token_data is not None:
+        refresh_payload = decode_token(token_data.refresh_token)
+        if (
+            refresh_payload is not None
+            and refresh_payload.get("type") == "refresh"
+            and refresh_payload.get("sub") == str(current_user.id)
+        ):
+            payloads.append(refresh_payload)
+    
+    for payload in payloads:
+        if payload.get("jti") is not None:
+            await revocation_list.revoke(
+                db, payload["jti"], current_user.id, datetime.utcfromtimestamp(payload["exp"])
+            )
+    await db.commit()
+    
+    audit_writer.record("user.logout", current_user.id, request=request)
     return {"message": "Successfully logged out"}
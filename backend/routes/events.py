@@ -0,0 +1,83 @@
+import asyncio
+from typing import Optional
+import orjson
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, WebSocket, WebSocketDisconnect, status
+from starlette.websockets import WebSocketState
+from database import AsyncSessionLocal
+from auth import Principal, authenticate, get_current_user
+from services.events import EventStreamResponse, close_on_disconnect, task_events
+from services.ratelimit import rate_limit, user_rate_limit
+
+# Included before the tasks router, so /tasks/events is not taken for a task id
+router = APIRouter(prefix="/tasks", tags=["Task Events"])
+
+# Seconds a WebSocket client has to send its token after connecting
+WEBSOCKET_AUTH_TIMEOUT = 10.0
+
+
+@router.get(
+    "/events",
+    response_class=EventStreamResponse,
+    dependencies=[Depends(rate_limit()), Depends(user_rate_limit())],
+    responses={200: {"content": {"text/event-stream": {}}, "description": "An endless event stream"}},
+)
+async def stream_task_events(
+    request: Request,
+    last_event_id: Optional[str] = Header(None, max_length=64),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Stream the current user's task changes as Server-Sent Events.
+
+    Events are named ``task.created``, ``task.updated``,
+    ``task.status_changed`` and ``task.deleted``; their data is the task
+    (only its ``id`` for deletes, or when it is too large to broadcast). A
+    comment line is sent every ``TASK_EVENTS_HEARTBEAT_SECONDS``. A client
+    reconnecting with ``Last-Event-ID`` gets the events it missed, or a
+    ``reset`` event when they are gone, after which it must catch up with
+    ``GET /tasks/changes`` (or reload its tasks).
+    """
+    return EventStreamResponse(task_events, str(current_user.id), last_event_id)
+
+
+@router.websocket("/events/ws")
+async def task_events_socket(websocket: WebSocket):
+    """The same events over a WebSocket, as JSON text messages.
+
+    Tokens do not belong in URLs, so the first message from the client
+    authenticates: ``{"token": "<access token>", "last_event_id": "<optional>"}``.
+    A reset arrives as ``{"type": "reset", "id": ...}``.
+    """
+    await websocket.accept()
+    try:
+        hello = orjson.loads(await asyncio.wait_for(websocket.receive_text(), WEBSOCKET_AUTH_TIMEOUT))
+        token, last_event_id = str(hello["token"]), hello.get("last_event_id")
+    except (asyncio.TimeoutError, orjson.JSONDecodeError, KeyError, TypeError):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Expected an authentication message")
+        return
+    except WebSocketDisconnect:
+        return
+    async with AsyncSessionLocal() as db:
+        try:
+            current_user = await authenticate(websocket, token, db)
+        except HTTPException as exc:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=exc.detail)
+            return
+
+    subscription = task_events.subscribe(str(current_user.id), str(last_event_id) if last_event_id else None)
+    watcher = asyncio.create_task(close_on_disconnect(websocket.receive, subscription))
+    try:
+        while True:
+            await subscription.wait()
+            if subscription.closed:
+                break
+            # Heartbeats are left to the server's WebSocket pings
+            events, reset, _ = subscription.take()
+            if reset:
+                await websocket.send_text(orjson.dumps({"type": "reset", "id": task_events.latest_id}).decode())
+            for event in events:
+                await websocket.send_text(event.message())
+    finally:
+        watcher.cancel()
+        task_events.unsubscribe(subscription)
+    if websocket.client_state != WebSocketState.DISCONNECTED:
+        await websocket.close()
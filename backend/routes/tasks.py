@@ -1,63 +1,200 @@
-from typing import Optional, List
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
-from database import get_db
-from models import User, Task
-from schemas import TaskCreate, TaskUpdate, TaskStatusUpdate, TaskResponse, TaskListResponse
-from auth import get_current_user
+import uuid
+from typing import Optional, List, Union
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
+from sqlalchemy.sql import Select
+from database import get_db, async_engine
+from database.replicas import get_read_db, track_writes
+from database.pagination import InvalidCursorError, apply_keyset, split_page
+from database.search import get_search_backend
+from models import Task, TaskStatus
+from schemas import (
+    TaskCreate, TaskUpdate, TaskStatusUpdate, TaskResponse, TaskListResponse, TaskCursorPage, TaskFacetsResponse,
+    TaskStatsResponse, TaskChangesResponse,
+)
+from schemas.payloads import TASK_RESPONSE_COLUMNS, rows_payload, task_payload
+from auth import Principal, get_current_user
+from services import task_changes, task_stats
+from services.attachments import release_task_attachments
+from services.audit import audit_writer
+from services.events import TASK_CREATED, TASK_DELETED, TASK_STATUS_CHANGED, TASK_UPDATED, task_events
+from services.profiling import request_profiling
+from services.ratelimit import rate_limit, user_rate_limit
+from services.rollups import rollups, TASKS_COMPLETED, TASKS_CREATED, TASKS_TOTAL
 
-router = APIRouter(prefix="/tasks", tags=["Tasks"])
+router = APIRouter(
+    prefix="/tasks",
+    tags=["Tasks"],
+    dependencies=[
+        Depends(rate_limit()), Depends(user_rate_limit()), Depends(request_profiling), Depends(track_writes),
+    ],
+)
 
+search_backend = get_search_backend(async_engine.dialect.name)
 
-@router.get("", response_model=TaskListResponse)
-async def list_tasks(
-    page: int = Query(1, ge=1),
-    page_size: int = Query(20, ge=1, le=100),
+
+def build_task_query(
+    user_id: uuid.UUID,
     status: Optional[str] = None,
     priority: Optional[str] = None,
     category: Optional[str] = None,
     search: Optional[str] = None,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """List tasks for the current user with filtering and pagination."""
-    query = db.query(Task).filter(Task.user_id == current_user.id)
+    tags: Optional[List[str]] = None,
+    tags_match: str = "any",
+) -> Select:
+    """Build the filtered (unordered, unpaginated) task query for a user.
+    
+    Selects the ``TaskResponse`` columns as plain rows rather than ORM objects.
+    """
+    query = select(*TASK_RESPONSE_COLUMNS).where(Task.user_id == user_id)
     
     # Apply filters
     if status:
-        query = query.filter(Task.status == status)
+        query = query.where(Task.status == status)
     if priority:
-        query = query.filter(Task.priority == priority)
+        query = query.where(Task.priority == priority)
     if category:
-        query = query.filter(Task.category == category)
+        query = query.where(Task.category == category)
     if search:
-        query = query.filter(
-            or_(
-                Task.title.ilike(f"%{search}%"),
-                Task.description.ilike(f"%{search}%")
+        query = search_backend.filter(query, search, user_id)
+    if tags:
+        query = search_backend.filter_tags(query, tags, match_all=tags_match == "all")
+    
+    return query
+
+
+@router.get("", response_model=Union[TaskListResponse, TaskCursorPage])
+async def list_tasks(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    status: Optional[str] = None,
+    priority: Optional[str] = None,
+    category: Optional[str] = None,
+    search: Optional[str] = None,
+    tags: Optional[List[str]] = Query(None),
+    tags_match: str = Query("any", pattern="^(any|all)$"),
+    pagination: str = Query("offset", pattern="^(offset|cursor)$"),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """List tasks for the current user with filtering and pagination.
+    
+    ``pagination=cursor`` (or passing a ``cursor``) switches to keyset
+    pagination: pages are returned with a ``next_cursor`` and the exact
+    ``total`` is only computed when ``include_total`` is set. In offset mode
+    a ``search`` orders results by relevance; cursor pages stay chronological.
+    ``tags`` (repeatable) matches tasks carrying any of the tags, or all of
+    them with ``tags_match=all``.
+    """
+    query = build_task_query(current_user.id, status, priority, category, search, tags, tags_match)
+    
+    if pagination == "cursor" or cursor is not None:
+        try:
+            page_query = apply_keyset(query, Task.created_at, Task.id, cursor, page_size)
+        except InvalidCursorError:
+            raise HTTPException(
+                status_code=400,
+                detail="Invalid cursor"
             )
-        )
+        result = await db.execute(page_query)
+        rows, next_cursor = split_page(result.all(), page_size)
+        total = None
+        if include_total:
+            total = await db.scalar(select(func.count()).select_from(query.subquery()))
+        
+        return ORJSONResponse({
+            "tasks": rows_payload(rows),
+            "next_cursor": next_cursor,
+            "page_size": page_size,
+            "total": total
+        })
     
     # Get total count
-    total = query.count()
+    total = await db.scalar(select(func.count()).select_from(query.subquery()))
     
-    # Apply pagination
-    tasks = query.order_by(Task.created_at.desc()).offset((page - 1) * page_size).limit(page_size).all()
+    # Apply ordering and pagination
+    order_by = [Task.created_at.desc(), Task.id.desc()]
+    if search:
+        order_by.insert(0, search_backend.rank(search).desc())
+    result = await db.execute(
+        query.order_by(*order_by).offset((page - 1) * page_size).limit(page_size)
+    )
     
-    return {
-        "tasks": tasks,
+    return ORJSONResponse({
+        "tasks": rows_payload(result.all()),
         "total": total,
         "page": page,
         "page_size": page_size
-    }
+    })
+
+
+@router.get("/facets", response_model=TaskFacetsResponse)
+async def get_task_facets(
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get per-tag and per-category task counts for the current user."""
+    result = await db.execute(search_backend.facets_query(current_user.id))
+    
+    facets = {"tag": {}, "category": {}}
+    for facet, value, count in result.all():
+        facets[facet][value] = count
+    
+    return ORJSONResponse({
+        "tags": facets["tag"],
+        "categories": facets["category"]
+    })
+
+
+@router.get("/stats", response_model=TaskStatsResponse)
+async def get_task_stats(
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get task counts by status, priority and category plus overdue/due-soon counts."""
+    return ORJSONResponse(await task_stats.get_task_stats(db, current_user.id))
+
+
+@router.get("/changes", response_model=TaskChangesResponse)
+async def list_task_changes(
+    since: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """List tasks changed and deleted since a cursor, for delta sync.
+    
+    Without ``since`` every task is returned (a full sync). Each response
+    carries the ``cursor`` to pass as ``since`` next time; while ``has_more``
+    is set, call again straight away. A cursor older than
+    ``TASK_TOMBSTONE_RETENTION_DAYS`` gets 410 Gone: sync again without ``since``.
+    """
+    try:
+        changes = await task_changes.get_changes(db, current_user.id, since, limit)
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid cursor"
+        )
+    except task_changes.CursorTooOld:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Cursor too old, sync again without since"
+        )
+    
+    return ORJSONResponse(changes)
 
 
 @router.post("", response_model=TaskResponse, status_code=status.HTTP_201_CREATED)
 async def create_task(
     task_data: TaskCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new task."""
     new_task = Task(
@@ -66,20 +203,33 @@ async def create_task(
     )
     
     db.add(new_task)
-    db.commit()
-    db.refresh(new_task)
+    await task_stats.record_task_created(db, new_task)
+    new_task.change_seq = await task_changes.next_change_seq(db, current_user.id)
+    await db.commit()
+    await db.refresh(new_task)
     
-    return new_task
+    payload = task_payload(new_task)
+    audit_writer.record("task.created", current_user.id, new_task.id, request=request)
+    task_events.publish(TASK_CREATED, current_user.id, payload)
+    rollups.increment(TASKS_CREATED)
+    rollups.adjust_total(TASKS_TOTAL, 1)
+    if new_task.status == TaskStatus.DONE:
+        rollups.increment(TASKS_COMPLETED)
+    
+    return ORJSONResponse(payload, status_code=status.HTTP_201_CREATED)
 
 
 @router.get("/{task_id}", response_model=TaskResponse)
 async def get_task(
-    task_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    task_id: uuid.UUID,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get a specific task by ID."""
-    task = db.query(Task).filter(Task.id == task_id, Task.user_id == current_user.id).first()
+    result = await db.execute(
+        select(*TASK_RESPONSE_COLUMNS).where(Task.id == task_id, Task.user_id == current_user.id)
+    )
+    task = result.first()
     
     if not task:
         raise HTTPException(
@@ -87,18 +237,21 @@ async def get_task(
             detail="Task not found"
         )
     
-    return task
+    return ORJSONResponse(task._asdict())
 
 
 @router.put("/{task_id}", response_model=TaskResponse)
 async def update_task(
-    task_id: str,
+    task_id: uuid.UUID,
     task_data: TaskUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """Update a task."""
-    task = db.query(Task).filter(Task.id == task_id, Task.user_id == current_user.id).first()
+    task = await db.scalar(
+        select(Task).where(Task.id == task_id, Task.user_id == current_user.id).with_for_update()
+    )
     
     if not task:
         raise HTTPException(
@@ -107,25 +260,38 @@ async def update_task(
         )
     
     # Update only provided fields
+    before = task_stats.task_dimensions(task)
+    was_done = task.status == TaskStatus.DONE
     update_data = task_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(task, field, value)
     
-    db.commit()
-    db.refresh(task)
+    await task_stats.record_task_changed(db, current_user.id, before, task_stats.task_dimensions(task))
+    task.change_seq = await task_changes.next_change_seq(db, current_user.id)
+    await db.commit()
+    await db.refresh(task)
     
-    return task
+    payload = task_payload(task)
+    audit_writer.record("task.updated", current_user.id, task.id, {"fields": sorted(update_data)}, request)
+    task_events.publish(TASK_UPDATED, current_user.id, payload)
+    if not was_done and task.status == TaskStatus.DONE:
+        rollups.increment(TASKS_COMPLETED)
+    
+    return ORJSONResponse(payload)
 
 
 @router.patch("/{task_id}/status", response_model=TaskResponse)
 async def update_task_status(
-    task_id: str,
+    task_id: uuid.UUID,
     status_data: TaskStatusUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """Update only the status of a task."""
-    task = db.query(Task).filter(Task.id == task_id, Task.user_id == current_user.id).first()
+    task = await db.scalar(
+        select(Task).where(Task.id == task_id, Task.user_id == current_user.id).with_for_update()
+    )
     
     if not task:
         raise HTTPException(
@@ -133,21 +299,41 @@ async def update_task_status(
             detail="Task not found"
         )
     
+    before = task_stats.task_dimensions(task)
+    previous_status = task.status
+    was_done = previous_status == TaskStatus.DONE
     task.status = status_data.status
-    db.commit()
-    db.refresh(task)
+    await task_stats.record_task_changed(db, current_user.id, before, task_stats.task_dimensions(task))
+    task.change_seq = await task_changes.next_change_seq(db, current_user.id)
+    await db.commit()
+    await db.refresh(task)
+    
+    audit_writer.record(
+        "task.status_changed",
+        current_user.id,
+        task.id,
+        {"from": previous_status.value, "to": task.status.value},
+        request,
+    )
+    payload = task_payload(task)
+    task_events.publish(TASK_STATUS_CHANGED, current_user.id, payload)
+    if not was_done and task.status == TaskStatus.DONE:
+        rollups.increment(TASKS_COMPLETED)
     
-    return task
+    return ORJSONResponse(payload)
 
 
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_task(
-    task_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    task_id: uuid.UUID,
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete a task."""
-    task = db.query(Task).filter(Task.id == task_id, Task.user_id == current_user.id).first()
+    task = await db.scalar(
+        select(Task).where(Task.id == task_id, Task.user_id == current_user.id).with_for_update()
+    )
     
     if not task:
         raise HTTPException(
@@ -155,7 +341,15 @@ async def delete_task(
             detail="Task not found"
         )
     
-    db.delete(task)
-    db.commit()
+    await task_stats.record_task_deleted(db, task)
+    await release_task_attachments(db, task.id)
+    await task_changes.record_task_deleted(db, task)
+    await db.delete(task)
+    await db.commit()
+    
+    # The task row is gone, so the event keeps its id in the details instead
+    audit_writer.record("task.deleted", current_user.id, None, {"task_id": str(task_id), "title": task.title}, request)
+    task_events.publish(TASK_DELETED, current_user.id, {"id": task_id})
+    rollups.adjust_total(TASKS_TOTAL, -1)
     
     return None
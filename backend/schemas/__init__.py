@@ -1,7 +1,12 @@
 """Schemas package initialization."""
 from schemas.user import UserCreate, UserUpdate, UserResponse
 from schemas.auth import LoginRequest, TokenResponse, RefreshTokenRequest, AccessTokenResponse
-from schemas.task import TaskCreate, TaskUpdate, TaskStatusUpdate, TaskResponse, TaskListResponse
+from schemas.task import (
+    TaskCreate, TaskUpdate, TaskStatusUpdate, TaskResponse, TaskListResponse, TaskCursorPage, TaskFacetsResponse,
+    TaskStatsResponse, TaskChangesResponse,
+)
+from schemas.audit import ActivityLogResponse, SecurityEventResponse, ActivityLogPage, SecurityEventPage
+from schemas.attachment import AttachmentResponse
 
 __all__ = [
     "UserCreate",
@@ -16,4 +21,13 @@ __all__ = [
     "TaskStatusUpdate",
     "TaskResponse",
     "TaskListResponse",
+    "TaskCursorPage",
+    "TaskFacetsResponse",
+    "TaskStatsResponse",
+    "TaskChangesResponse",
+    "ActivityLogResponse",
+    "SecurityEventResponse",
+    "ActivityLogPage",
+    "SecurityEventPage",
+    "AttachmentResponse",
 ]
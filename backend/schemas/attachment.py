@@ -0,0 +1,21 @@
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict, field_validator
+
+
+class AttachmentResponse(BaseModel):
+    """Schema for attachment response."""
+    id: str
+    task_id: str
+    filename: str
+    file_size: int
+    mime_type: str
+    sha256: str
+    uploaded_at: datetime
+    
+    model_config = ConfigDict(from_attributes=True)
+
+    @field_validator("id", "task_id", mode="before")
+    @classmethod
+    def stringify_uuid(cls, value):
+        """Render UUID keys as strings."""
+        return str(value) if value is not None else value
@@ -0,0 +1,55 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, ConfigDict, field_validator
+from models.security_event import SecurityEventSeverity
+
+
+class ActivityLogResponse(BaseModel):
+    """Schema for an audit log entry."""
+    id: str
+    user_id: str
+    task_id: Optional[str] = None
+    action: str
+    details: Optional[Dict[str, Any]] = None
+    ip_address: Optional[str] = None
+    user_agent: Optional[str] = None
+    created_at: datetime
+    
+    model_config = ConfigDict(from_attributes=True)
+
+    @field_validator("id", "user_id", "task_id", mode="before")
+    @classmethod
+    def stringify_uuid(cls, value):
+        """Render UUID keys as strings."""
+        return str(value) if value is not None else value
+
+
+class SecurityEventResponse(BaseModel):
+    """Schema for a security event."""
+    id: str
+    user_id: Optional[str] = None
+    event_type: str
+    severity: SecurityEventSeverity
+    details: Optional[Dict[str, Any]] = None
+    ip_address: Optional[str] = None
+    created_at: datetime
+    
+    model_config = ConfigDict(from_attributes=True)
+
+    @field_validator("id", "user_id", mode="before")
+    @classmethod
+    def stringify_uuid(cls, value):
+        """Render UUID keys as strings."""
+        return str(value) if value is not None else value
+
+
+class ActivityLogPage(BaseModel):
+    """Schema for a cursor-paginated page of audit log entries."""
+    items: List[ActivityLogResponse]
+    next_cursor: Optional[str] = None
+
+
+class SecurityEventPage(BaseModel):
+    """Schema for a cursor-paginated page of security events."""
+    items: List[SecurityEventResponse]
+    next_cursor: Optional[str] = None
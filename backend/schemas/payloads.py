@@ -0,0 +1,66 @@
+"""Validation-free response payloads for the hot read paths.
+
+Read endpoints select exactly the columns of ``TaskResponse`` /
+``UserResponse`` / ``AttachmentResponse`` as plain rows and return them as dicts in an
+``ORJSONResponse``. orjson renders UUIDs, datetimes and enums natively, so
+the JSON is the same as going through the Pydantic models, without building
+ORM instances or re-validating every field. Routes keep their
+``response_model`` for the OpenAPI schema; FastAPI skips it when a response
+object is returned.
+"""
+from typing import Any, Dict, List
+from models import Attachment, Task, User
+
+TASK_RESPONSE_COLUMNS = (
+    Task.id,
+    Task.user_id,
+    Task.title,
+    Task.description,
+    Task.priority,
+    Task.status,
+    Task.category,
+    Task.tags,
+    Task.due_date,
+    Task.created_at,
+    Task.updated_at,
+)
+
+USER_RESPONSE_COLUMNS = (
+    User.id,
+    User.email,
+    User.full_name,
+    User.role,
+    User.is_active,
+    User.created_at,
+    User.updated_at,
+)
+
+ATTACHMENT_RESPONSE_COLUMNS = (
+    Attachment.id,
+    Attachment.task_id,
+    Attachment.filename,
+    Attachment.file_size,
+    Attachment.mime_type,
+    Attachment.sha256,
+    Attachment.uploaded_at,
+)
+
+
+def task_payload(task) -> Dict[str, Any]:
+    """``TaskResponse`` fields of a row (or ORM instance) as a dict."""
+    return {column.key: getattr(task, column.key) for column in TASK_RESPONSE_COLUMNS}
+
+
+def user_payload(user) -> Dict[str, Any]:
+    """``UserResponse`` fields of a row (or ORM instance) as a dict."""
+    return {column.key: getattr(user, column.key) for column in USER_RESPONSE_COLUMNS}
+
+
+def attachment_payload(attachment) -> Dict[str, Any]:
+    """``AttachmentResponse`` fields of a row (or ORM instance) as a dict."""
+    return {column.key: getattr(attachment, column.key) for column in ATTACHMENT_RESPONSE_COLUMNS}
+
+
+def rows_payload(rows) -> List[Dict[str, Any]]:
+    """Rows selected with one of the column tuples above, as dicts."""
+    return [row._asdict() for row in rows]
@@ -1,6 +1,7 @@
 from datetime import datetime
-from typing import Optional, List
-from pydantic import BaseModel, Field, ConfigDict
+from typing import Dict, Optional, List
+from pydantic import BaseModel, Field, ConfigDict, field_validator
+from database.types import naive_utc
 from models.task import TaskPriority, TaskStatus
 
 
@@ -14,6 +15,12 @@ class TaskBase(BaseModel):
     tags: List[str] = Field(default_factory=list)
     due_date: Optional[datetime] = None
 
+    @field_validator("due_date")
+    @classmethod
+    def due_date_naive_utc(cls, value):
+        """Store due dates as naive UTC, e.g. ``...Z`` from ``toISOString()``."""
+        return naive_utc(value)
+
 
 class TaskCreate(TaskBase):
     """Schema for task creation."""
@@ -30,6 +37,12 @@ class TaskUpdate(BaseModel):
     tags: Optional[List[str]] = None
     due_date: Optional[datetime] = None
 
+    @field_validator("due_date")
+    @classmethod
+    def due_date_naive_utc(cls, value):
+        """Store due dates as naive UTC, e.g. ``...Z`` from ``toISOString()``."""
+        return naive_utc(value)
+
 
 class TaskStatusUpdate(BaseModel):
     """Schema for task status update only."""
@@ -45,6 +58,12 @@ class TaskResponse(TaskBase):
     
     model_config = ConfigDict(from_attributes=True)
 
+    @field_validator("id", "user_id", mode="before")
+    @classmethod
+    def stringify_uuid(cls, value):
+        """Render UUID primary/foreign keys as strings."""
+        return str(value) if value is not None else value
+
 
 class TaskListResponse(BaseModel):
     """Schema for paginated task list response."""
@@ -52,3 +71,35 @@ class TaskListResponse(BaseModel):
     total: int
     page: int
     page_size: int
+
+
+class TaskCursorPage(BaseModel):
+    """Schema for keyset-paginated task list response."""
+    tasks: List[TaskResponse]
+    next_cursor: Optional[str] = None
+    page_size: int
+    total: Optional[int] = None
+
+
+class TaskChangesResponse(BaseModel):
+    """Schema for a delta sync page: tasks changed and deleted since a cursor."""
+    tasks: List[TaskResponse]
+    deleted: List[str]
+    cursor: str
+    has_more: bool
+
+
+class TaskFacetsResponse(BaseModel):
+    """Schema for per-tag and per-category task counts."""
+    tags: Dict[str, int]
+    categories: Dict[str, int]
+
+
+class TaskStatsResponse(BaseModel):
+    """Schema for per-user task statistics."""
+    total: int
+    by_status: Dict[str, int]
+    by_priority: Dict[str, int]
+    by_category: Dict[str, int]
+    overdue: int
+    due_soon: int
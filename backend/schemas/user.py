@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Optional
-from pydantic import BaseModel, EmailStr, Field, ConfigDict
+from pydantic import BaseModel, EmailStr, Field, ConfigDict, field_validator
 from models.user import UserRole
 
 
@@ -31,6 +31,12 @@ class UserResponse(UserBase):
     
     model_config = ConfigDict(from_attributes=True)
 
+    @field_validator("id", mode="before")
+    @classmethod
+    def stringify_uuid(cls, value):
+        """Render the UUID primary key as a string."""
+        return str(value) if value is not None else value
+
 
 class UserInDB(UserResponse):
     """Schema for user in database (includes password hash)."""
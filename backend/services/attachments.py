@@ -0,0 +1,241 @@
+"""Content-addressed attachment storage.
+
+Uploads are streamed straight from the request body into a temporary file
+under ``UPLOAD_DIR/tmp`` in fixed-size chunks, hashed as they are written,
+and cut off with :class:`UploadTooLarge` as soon as they pass
+``MAX_UPLOAD_SIZE``; at no point is more than one chunk held in memory.
+
+A finished upload is stored as ``UPLOAD_DIR/blobs/<first two hex digits>/<sha256>``.
+Identical content is stored once however many tasks it is attached to:
+``attachment_blobs.ref_count`` counts the attachments using each blob.
+Deleting an attachment (or its task) only decrements the count;
+:class:`BlobSweeper` later deletes blobs nobody references, together with
+temporary files left behind by interrupted uploads.
+
+The ordering keeps blobs and rows consistent without a global lock: an
+upload takes its reference (committed) *before* moving its file into place,
+and the sweeper locks a blob's row while it deletes the file, so a
+concurrent upload of the same content either waits for the sweep and puts
+the file back, or keeps the blob alive.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from collections import Counter
+from typing import AsyncIterator, Iterable, Optional
+from sqlalchemy import bindparam, delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import settings
+from database import AsyncSessionLocal
+from database.upsert import increment_statement
+from models import Attachment, AttachmentBlob
+from services.batching import PeriodicFlusher
+
+logger = logging.getLogger(__name__)
+
+# Bytes handed to the disk (and the hash) at a time
+CHUNK_SIZE = 256 * 1024
+# Temporary files older than this belong to uploads that died
+STALE_UPLOAD_SECONDS = 3600
+# Unreferenced blobs removed per sweeper transaction
+SWEEP_BATCH_SIZE = 500
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds the size limit mid-stream."""
+
+
+class StagedUpload:
+    """An upload written to a temporary file, not yet stored as a blob."""
+
+    __slots__ = ("temp_path", "sha256", "size")
+
+    def __init__(self, temp_path: str, sha256: str, size: int):
+        self.temp_path = temp_path
+        self.sha256 = sha256
+        self.size = size
+
+
+class BlobStore:
+    """Blob files under one upload directory."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.temp_dir = os.path.join(root, "tmp")
+
+    @staticmethod
+    def relative_path(sha256: str) -> str:
+        return os.path.join("blobs", sha256[:2], sha256)
+
+    def path(self, sha256: str) -> str:
+        return os.path.join(self.root, self.relative_path(sha256))
+
+    async def receive(self, chunks: AsyncIterator[bytes], max_size: int) -> StagedUpload:
+        """Write ``chunks`` to a temporary file, hashing them on the way."""
+        await asyncio.to_thread(os.makedirs, self.temp_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.temp_dir, suffix=".upload")
+        digest = hashlib.sha256()
+        size = 0
+        buffer = bytearray()
+
+        def write(data: bytes) -> None:
+            # hashlib and file writes release the GIL, so this runs off the event loop
+            digest.update(data)
+            # os.write may write less than asked (signals, some filesystems); finish the rest
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLarge()
+                buffer += chunk
+                if len(buffer) >= CHUNK_SIZE:
+                    await asyncio.to_thread(write, bytes(buffer))
+                    buffer.clear()
+            if buffer:
+                await asyncio.to_thread(write, bytes(buffer))
+            await asyncio.to_thread(os.fsync, fd)
+        except BaseException:
+            os.close(fd)
+            await asyncio.to_thread(_unlink_quietly, temp_path)
+            raise
+        os.close(fd)
+        return StagedUpload(temp_path, digest.hexdigest(), size)
+
+    async def store(self, upload: StagedUpload) -> None:
+        """Move a staged upload into place (or drop it if the blob exists).
+
+        Call only after the upload's blob reference has been committed.
+        """
+        def move() -> None:
+            path = self.path(upload.sha256)
+            if os.path.exists(path):
+                _unlink_quietly(upload.temp_path)
+                return
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(upload.temp_path, path)
+
+        await asyncio.to_thread(move)
+
+    async def discard(self, upload: StagedUpload) -> None:
+        await asyncio.to_thread(_unlink_quietly, upload.temp_path)
+
+    def remove_stale_uploads(self, older_than: float) -> int:
+        """Delete temporary files last written more than ``older_than`` seconds ago."""
+        removed = 0
+        cutoff = time.time() - older_than
+        try:
+            entries = list(os.scandir(self.temp_dir))
+        except FileNotFoundError:
+            return 0
+        for entry in entries:
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+
+def _unlink_quietly(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+async def add_blob_reference(db: AsyncSession, upload: StagedUpload) -> None:
+    """Count one more attachment using the upload's blob (creating the row if needed)."""
+    await db.execute(increment_statement(
+        db.bind.dialect.name, AttachmentBlob.__table__, ["sha256"], "ref_count",
+        [{"sha256": upload.sha256, "size": upload.size, "ref_count": 1}],
+    ))
+
+
+async def release_blob_references(db: AsyncSession, sha256s: Iterable[str]) -> None:
+    """Count one attachment fewer for each hash in ``sha256s`` (repeats allowed)."""
+    blobs = AttachmentBlob.__table__
+    params = [{"blob_sha256": sha256, "released": count} for sha256, count in Counter(sha256s).items()]
+    if params:
+        await db.execute(
+            blobs.update()
+            .where(blobs.c.sha256 == bindparam("blob_sha256"))
+            .values(ref_count=blobs.c.ref_count - bindparam("released")),
+            params,
+        )
+
+
+async def release_task_attachments(db: AsyncSession, task_id) -> None:
+    """Release the blobs of a task's attachments before the task is deleted.
+
+    The attachment rows themselves go with the task (``ON DELETE CASCADE``).
+    """
+    sha256s = (await db.scalars(select(Attachment.sha256).where(Attachment.task_id == task_id))).all()
+    await release_blob_references(db, sha256s)
+
+
+class BlobSweeper(PeriodicFlusher):
+    """Delete unreferenced blobs and abandoned temporary uploads."""
+
+    def __init__(self, store: BlobStore, interval: float):
+        super().__init__(interval)
+        self.store = store
+        self.removed_blobs = 0
+
+    async def sweep_blobs(self) -> int:
+        """Remove one batch of unreferenced blobs; returns how many."""
+        async with AsyncSessionLocal() as db:
+            batch = select(AttachmentBlob.sha256).where(AttachmentBlob.ref_count <= 0).limit(SWEEP_BATCH_SIZE)
+            if db.bind.dialect.name == "postgresql":
+                # Other workers' sweepers skip the rows this one is deleting
+                batch = batch.with_for_update(skip_locked=True)
+            # Deleting the rows first locks them (the whole database on SQLite) until the
+            # files are gone, so an upload of the same content waits and then restores its file
+            sha256s = (await db.scalars(
+                delete(AttachmentBlob)
+                .where(AttachmentBlob.sha256.in_(batch.scalar_subquery()))
+                .returning(AttachmentBlob.sha256)
+            )).all()
+            if not sha256s:
+                return 0
+            await asyncio.to_thread(lambda: [_unlink_quietly(self.store.path(sha256)) for sha256 in sha256s])
+            await db.commit()
+        self.removed_blobs += len(sha256s)
+        return len(sha256s)
+
+    async def flush(self) -> None:
+        while await self.sweep_blobs() == SWEEP_BATCH_SIZE:
+            pass
+        removed = await asyncio.to_thread(self.store.remove_stale_uploads, STALE_UPLOAD_SECONDS)
+        if removed:
+            logger.info("Removed %d abandoned uploads", removed)
+
+    async def stop(self) -> None:
+        """Stop sweeping (a final sweep is not needed on shutdown)."""
+        if self._task is not None:
+            self._stopping = True
+            self.wake()
+            await self._task
+            self._task = None
+
+
+# Process-wide store and sweeper; the sweeper starts and stops with the application
+blob_store = BlobStore(settings.UPLOAD_DIR)
+blob_sweeper = BlobSweeper(blob_store, interval=settings.ATTACHMENT_SWEEP_SECONDS)
+
+
+def allowed_filename(filename: str) -> bool:
+    return os.path.splitext(filename)[1].lower() in settings.ALLOWED_EXTENSIONS
+
+
+def clean_filename(filename: str) -> Optional[str]:
+    """The display name of an uploaded file: its base name, or None if empty."""
+    name = os.path.basename(filename.replace("\\", "/")).strip()
+    return name[:255] or None
@@ -0,0 +1,75 @@
+"""Asynchronous, batched audit logging.
+
+Routes call :meth:`AuditWriter.record`, which only appends a small dict to a
+bounded in-process queue. A background flusher drains the queue with
+multi-row INSERTs into ``activity_logs`` whenever ``AUDIT_BATCH_SIZE`` events
+are waiting or every ``AUDIT_FLUSH_MS`` milliseconds, and once more on
+shutdown. When the queue is full the ``AUDIT_OVERFLOW_POLICY`` decides what
+is lost: ``drop_oldest`` (default) or ``drop_new``. Both are counted.
+"""
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from fastapi import Request
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from config import settings
+from database import AsyncSessionLocal
+from models import ActivityLog, Task
+from services.batching import BatchInsertWriter
+
+
+class AuditWriter(BatchInsertWriter):
+    """Bounded queue of audit events with a batching background writer."""
+
+    def __init__(self, max_queue: int, batch_size: int, interval: float, overflow_policy: str = "drop_oldest"):
+        super().__init__(ActivityLog.__table__, max_queue, batch_size, interval, overflow_policy)
+
+    def record(
+        self,
+        action: str,
+        user_id: uuid.UUID,
+        task_id: Optional[uuid.UUID] = None,
+        details: Optional[Dict[str, Any]] = None,
+        request: Optional[Request] = None,
+    ) -> bool:
+        """Queue an audit event; returns False if it was dropped."""
+        return self.enqueue({
+            "id": uuid.uuid4(),
+            "user_id": user_id,
+            "task_id": task_id,
+            "action": action,
+            "details": details or {},
+            "ip_address": request.client.host if request is not None and request.client else None,
+            "user_agent": request.headers.get("user-agent") if request is not None else None,
+            "created_at": datetime.utcnow(),
+        })
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> None:
+        async with AsyncSessionLocal() as db:
+            try:
+                await db.execute(ActivityLog.__table__.insert().values(batch))
+                await db.commit()
+                return
+            except IntegrityError:
+                await db.rollback()
+
+            # A referenced task was deleted before the batch was written: keep the
+            # event but move the dangling task id into its details
+            task_ids = {row["task_id"] for row in batch if row["task_id"] is not None}
+            existing = set((await db.scalars(select(Task.id).where(Task.id.in_(task_ids)))).all())
+            for row in batch:
+                if row["task_id"] is not None and row["task_id"] not in existing:
+                    row["details"] = {**row["details"], "task_id": str(row["task_id"])}
+                    row["task_id"] = None
+            await db.execute(ActivityLog.__table__.insert().values(batch))
+            await db.commit()
+
+
+# Process-wide writer, started and stopped with the application
+audit_writer = AuditWriter(
+    max_queue=settings.AUDIT_QUEUE_MAX,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    interval=settings.AUDIT_FLUSH_MS / 1000,
+    overflow_policy=settings.AUDIT_OVERFLOW_POLICY,
+)
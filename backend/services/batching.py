@@ -0,0 +1,134 @@
+"""Background flushing for in-process write buffers."""
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Dict, List, Optional
+from database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicFlusher:
+    """Run :meth:`flush` every ``interval`` seconds on the event loop.
+
+    Subclasses buffer work in memory and implement :meth:`flush`; callers can
+    also :meth:`wake` the flusher early (e.g. when a batch fills up). A final
+    flush runs on :meth:`stop`, so buffered work survives a graceful shutdown.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+
+    async def flush(self) -> None:
+        raise NotImplementedError
+
+    def wake(self) -> None:
+        """Ask the background task to flush now rather than at the next tick."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def start(self) -> None:
+        """Start the background flush loop on the running event loop."""
+        if self._task is None:
+            self._stopping = False
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run(), name=type(self).__name__)
+
+    async def stop(self) -> None:
+        """Stop the loop and flush whatever is still buffered."""
+        if self._task is not None:
+            self._stopping = True
+            self.wake()
+            await self._task
+            self._task = None
+        await self._flush_safely()
+
+    async def _flush_safely(self) -> None:
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("%s flush failed", type(self).__name__)
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if not self._stopping:
+                await self._flush_safely()
+
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_new")
+
+
+class BatchInsertWriter(PeriodicFlusher):
+    """Bounded queue of rows written to ``table`` with multi-row INSERTs.
+
+    Rows are flushed whenever ``batch_size`` are waiting or every ``interval``
+    seconds. When the queue is full ``overflow_policy`` decides what is lost:
+    ``drop_oldest`` or ``drop_new``. Both are counted.
+    """
+
+    def __init__(self, table, max_queue: int, batch_size: int, interval: float, overflow_policy: str = "drop_oldest"):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+        super().__init__(interval)
+        self.table = table
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.overflow_policy = overflow_policy
+        self._queue: deque = deque()
+        # Counters
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+
+    @property
+    def queued(self) -> int:
+        """Rows waiting to be written."""
+        return len(self._queue)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": self.queued,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "written": self.written,
+            "failed": self.failed,
+        }
+
+    def enqueue(self, row: Dict[str, Any]) -> bool:
+        """Queue a row; returns False if it was dropped."""
+        if len(self._queue) >= self.max_queue:
+            self.dropped += 1
+            if self.overflow_policy == "drop_new":
+                return False
+            self._queue.popleft()
+
+        self._queue.append(row)
+        self.enqueued += 1
+
+        if len(self._queue) >= self.batch_size:
+            self.wake()
+        return True
+
+    async def flush(self) -> None:
+        while self._queue:
+            batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+            try:
+                await self._write(batch)
+                self.written += len(batch)
+            except Exception:
+                self.failed += len(batch)
+                logger.exception("Dropped %d %s rows after a failed write", len(batch), self.table.name)
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.execute(self.table.insert().values(batch))
+            await db.commit()
@@ -0,0 +1,189 @@
+"""File responses for attachment downloads.
+
+:class:`BlobFileResponse` serves a byte range of a stored blob:
+
+* with the ASGI ``http.response.zerocopysend`` extension, when the server
+  offers it, the file descriptor is handed to the server, which sends it
+  with ``sendfile``;
+* otherwise the file is read in fixed-size chunks with ``pread`` in a worker
+  thread, so the event loop never blocks on disk.
+
+Blobs are immutable and named by their SHA-256, so the hash is a strong
+ETag. :func:`is_not_modified` and :func:`requested_range` implement the
+``If-None-Match`` / ``If-Modified-Since`` and ``Range`` / ``If-Range`` rules
+of RFC 9110 for a single range; multi-range requests get the whole file,
+which the RFC allows.
+
+With ``ATTACHMENT_ACCEL_REDIRECT`` set the API does not send bytes at all:
+after authorizing the request it answers with an ``X-Accel-Redirect`` to an
+internal nginx location (see ``nginx.conf``), and nginx serves the file
+(with ``sendfile``, ranges and all) without tying up a worker.
+"""
+import asyncio
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Mapping, NamedTuple, Optional
+from urllib.parse import quote
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+# Bytes read and sent at a time without zero-copy support
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+
+
+class ByteRange(NamedTuple):
+    """Inclusive byte positions, as in ``Content-Range``."""
+    start: int
+    end: int
+
+    @property
+    def length(self) -> int:
+        return self.end - self.start + 1
+
+
+class RangeNotSatisfiable(Exception):
+    """Raised for a well-formed range that lies outside the file (answered with 416)."""
+
+
+def strong_etag(sha256: str) -> str:
+    return f'"{sha256}"'
+
+
+def http_date(value: datetime) -> str:
+    """Format a naive UTC datetime as an HTTP date."""
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+
+def _parse_http_date(value: str) -> Optional[datetime]:
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _etags(header: str):
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def is_not_modified(headers: Mapping[str, str], etag: str, last_modified: datetime) -> bool:
+    """Whether a GET/HEAD with these headers should be answered with 304.
+
+    ``If-None-Match`` (weak comparison) takes precedence over
+    ``If-Modified-Since``, as RFC 9110 requires.
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        return any(tag == "*" or tag.removeprefix("W/") == etag for tag in _etags(if_none_match))
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since is not None:
+        since = _parse_http_date(if_modified_since)
+        # HTTP dates have one-second resolution
+        return since is not None and last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def requested_range(headers: Mapping[str, str], size: int, etag: str, last_modified: datetime) -> Optional[ByteRange]:
+    """The single byte range to serve, or None for the whole file.
+
+    Raises :class:`RangeNotSatisfiable` when the range starts past the end.
+    """
+    header = headers.get("range")
+    if header is None:
+        return None
+    if_range = headers.get("if-range")
+    if if_range is not None:
+        if if_range.startswith(('"', "W/")):
+            # Strong comparison: a weak validator never matches
+            if if_range != etag:
+                return None
+        elif _parse_http_date(if_range) != last_modified.replace(microsecond=0):
+            return None
+
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, dash, last = spec.strip().partition("-")
+    if not dash:
+        return None
+    try:
+        if first == "":
+            # Suffix range: the last N bytes
+            suffix = int(last)
+            if suffix == 0 or size == 0:
+                raise RangeNotSatisfiable()
+            return ByteRange(max(0, size - suffix), size - 1)
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    if end < start:
+        return None
+    return ByteRange(start, min(end, size - 1))
+
+
+def content_disposition(disposition: str, filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"{disposition}; filename*=utf-8''{quoted}"
+    return f'{disposition}; filename="{filename}"'
+
+
+class BlobFileResponse(Response):
+    """Send ``byte_range`` (or all ``size`` bytes) of the file at ``path``."""
+
+    def __init__(
+        self,
+        path: str,
+        size: int,
+        headers: Mapping[str, str],
+        media_type: str,
+        byte_range: Optional[ByteRange] = None,
+        send_body: bool = True,
+    ):
+        self.path = path
+        self.byte_range = byte_range or ByteRange(0, size - 1)
+        self.send_body = send_body
+        super().__init__(status_code=206 if byte_range else 200, headers=dict(headers), media_type=media_type)
+        if byte_range:
+            self.headers["content-range"] = f"bytes {byte_range.start}-{byte_range.end}/{size}"
+        self.headers["content-length"] = str(self.byte_range.length if size else 0)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if not self.send_body or self.byte_range.length <= 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        if ZEROCOPY_EXTENSION in scope.get("extensions", {}):
+            with open(self.path, "rb") as file:
+                await send({
+                    "type": ZEROCOPY_EXTENSION,
+                    "file": file,
+                    "offset": self.byte_range.start,
+                    "count": self.byte_range.length,
+                    "more_body": False,
+                })
+            return
+
+        fd = await asyncio.to_thread(os.open, self.path, os.O_RDONLY)
+        try:
+            offset, remaining = self.byte_range.start, self.byte_range.length
+            while remaining > 0:
+                chunk = await asyncio.to_thread(os.pread, fd, min(DOWNLOAD_CHUNK_SIZE, remaining), offset)
+                if not chunk:
+                    # The file is shorter than recorded; the client sees a truncated body
+                    break
+                offset += len(chunk)
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            os.close(fd)
@@ -0,0 +1,430 @@
+"""Live task change events.
+
+The mutating task routes :meth:`~TaskEventBroker.publish` an event after each
+commit, and ``GET /tasks/events`` (Server-Sent Events, or its WebSocket twin)
+streams the current user's events as they happen, so clients no longer need
+to poll the task list.
+
+Fan-out is in-process. Each open connection is a :class:`Subscription`
+registered under its user, and publishing costs one dict lookup plus one
+append per connection of that user. An idle connection holds only its
+subscription (a few slots and an empty list), the server's request task and
+a task waiting for the disconnect. It has no timer of its own: a single
+broker-wide tick flags every connection for a heartbeat. A connection whose
+client falls ``TASK_EVENTS_BUFFER_SIZE`` events behind is closed, and the
+client reconnects and resumes.
+
+On PostgreSQL, events travel through ``NOTIFY`` on ``TASK_EVENTS_CHANNEL``
+(see :class:`PostgresEventBridge`). Every worker, on every host, LISTENs on
+the primary and delivers what it hears, its own events included, so all
+workers see the same events in the same order. Replicas do not replay
+notifications, which is why the connection is to the primary. With SQLite
+(a single worker) events are delivered directly.
+
+To resume, every worker keeps the last ``TASK_EVENTS_REPLAY_SIZE`` events.
+A client that reconnects with ``Last-Event-ID`` gets the events it missed.
+If that id is no longer known, it gets a ``reset`` event instead and must
+reload its tasks. This happens when the id is too old, or when the worker
+lost its LISTEN connection in the meantime.
+"""
+import asyncio
+import logging
+import uuid
+from collections import deque
+from contextlib import suppress
+from itertools import count
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+import orjson
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+from config import settings
+from database import async_engine
+from services.batching import PeriodicFlusher
+
+logger = logging.getLogger(__name__)
+
+TASK_CREATED = "task.created"
+TASK_UPDATED = "task.updated"
+TASK_STATUS_CHANGED = "task.status_changed"
+TASK_DELETED = "task.deleted"
+
+# PostgreSQL rejects NOTIFY payloads of 8000 bytes or more
+MAX_NOTIFY_PAYLOAD = 7900
+# Events waiting to be sent with NOTIFY before the oldest are dropped
+MAX_NOTIFY_QUEUE = 10000
+NOTIFY_BATCH_SIZE = 500
+# How often the idle LISTEN connection is checked, and the pause before reconnecting it
+LISTEN_CHECK_SECONDS = 30.0
+LISTEN_RETRY_SECONDS = 2.0
+# How long EventSource clients wait before reconnecting
+SSE_RETRY_MS = 3000
+
+NOTIFY_STATEMENT = text("SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload")
+
+
+class TaskEvent:
+    """One change, encoded once for every connection that receives it."""
+
+    __slots__ = ("id", "type", "user_key", "data", "frame")
+
+    def __init__(self, event_id: str, event_type: str, user_key: str, data: bytes):
+        self.id = event_id
+        self.type = event_type
+        self.user_key = user_key
+        # JSON, as bytes
+        self.data = data
+        self.frame = b"id: %s\nevent: %s\ndata: %s\n\n" % (event_id.encode(), event_type.encode(), data)
+
+    def message(self) -> str:
+        """The event as a WebSocket text message."""
+        return '{"id":"%s","type":"%s","data":%s}' % (self.id, self.type, self.data.decode())
+
+    def encode(self) -> str:
+        """The event as a NOTIFY payload."""
+        return '{"id":"%s","type":"%s","user":"%s","data":%s}' % (self.id, self.type, self.user_key, self.data.decode())
+
+    @classmethod
+    def decode(cls, payload: str) -> "TaskEvent":
+        fields = orjson.loads(payload)
+        return cls(fields["id"], fields["type"], fields["user"], orjson.dumps(fields["data"]))
+
+
+class Subscription:
+    """The events waiting to be sent on one live connection."""
+
+    __slots__ = ("user_key", "max_pending", "pending", "heartbeat", "reset", "closed", "_waiter")
+
+    def __init__(self, user_key: str, max_pending: int):
+        self.user_key = user_key
+        self.max_pending = max_pending
+        self.pending: List[TaskEvent] = []
+        self.heartbeat = False
+        self.reset = False
+        self.closed = False
+        self._waiter: Optional[asyncio.Future] = None
+
+    def push(self, event: TaskEvent) -> bool:
+        """Queue an event; returns False (and closes) when the client is too far behind."""
+        if len(self.pending) >= self.max_pending:
+            self.close()
+            return False
+        self.pending.append(event)
+        self._wake()
+        return True
+
+    def ping(self) -> None:
+        self.heartbeat = True
+        self._wake()
+
+    def request_reset(self) -> None:
+        self.pending = []
+        self.reset = True
+        self._wake()
+
+    def close(self) -> None:
+        self.closed = True
+        self._wake()
+
+    def _wake(self) -> None:
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    async def wait(self) -> None:
+        """Wait until there is something to send, or the connection should end."""
+        if self.pending or self.heartbeat or self.reset or self.closed:
+            return
+        self._waiter = asyncio.get_running_loop().create_future()
+        try:
+            await self._waiter
+        finally:
+            self._waiter = None
+
+    def take(self) -> Tuple[List[TaskEvent], bool, bool]:
+        """The queued events and whether a reset and a heartbeat are due."""
+        events, self.pending = self.pending, []
+        reset, heartbeat = self.reset, self.heartbeat
+        self.reset = self.heartbeat = False
+        return events, reset, heartbeat
+
+
+class TaskEventBroker(PeriodicFlusher):
+    """Per-user fan-out of task events to live connections.
+
+    It runs as a flusher whose tick is the heartbeat.
+    """
+
+    def __init__(self, engine: AsyncEngine, channel: str, heartbeat: float, buffer_size: int, replay_size: int):
+        super().__init__(heartbeat)
+        self.engine = engine
+        self.channel = channel
+        self.buffer_size = buffer_size
+        self.replay_size = replay_size
+        self.bridge: Optional["PostgresEventBridge"] = None
+        self._subscriptions: Dict[str, Set[Subscription]] = {}
+        # Recently delivered events with their position, for Last-Event-ID
+        self._recent: Deque[Tuple[int, TaskEvent]] = deque()
+        self._positions: Dict[str, int] = {}
+        self._sequence = count()
+        # Counters
+        self.connections = 0
+        self.published = 0
+        self.delivered = 0
+        self.dropped_connections = 0
+        self.resets = 0
+
+    def publish(self, event_type: str, user_id: uuid.UUID, data: Dict[str, Any]) -> None:
+        """Announce a committed change to the user's live connections on every worker."""
+        event = TaskEvent(uuid.uuid4().hex, event_type, str(user_id), orjson.dumps(data))
+        self.published += 1
+        if self.bridge is not None:
+            self.bridge.send(event)
+        else:
+            self.deliver(event)
+
+    def deliver(self, event: TaskEvent) -> None:
+        """Hand an event to this worker's connections of its user."""
+        position = next(self._sequence)
+        self._recent.append((position, event))
+        self._positions[event.id] = position
+        if len(self._recent) > self.replay_size:
+            _, expired = self._recent.popleft()
+            self._positions.pop(expired.id, None)
+
+        for subscription in self._subscriptions.get(event.user_key, ()):
+            if subscription.closed:
+                continue
+            if subscription.push(event):
+                self.delivered += 1
+            else:
+                self.dropped_connections += 1
+
+    @property
+    def latest_id(self) -> Optional[str]:
+        return self._recent[-1][1].id if self._recent else None
+
+    def subscribe(self, user_key: str, last_event_id: Optional[str] = None) -> Subscription:
+        """Register a connection, queueing what it missed since ``last_event_id``."""
+        subscription = Subscription(user_key, self.buffer_size)
+        if last_event_id:
+            position = self._positions.get(last_event_id)
+            missed = [] if position is None else [
+                event for event_position, event in self._recent
+                if event_position > position and event.user_key == user_key
+            ]
+            if position is None or len(missed) > self.buffer_size:
+                subscription.reset = True
+                self.resets += 1
+            else:
+                subscription.pending = missed
+        self._subscriptions.setdefault(user_key, set()).add(subscription)
+        self.connections += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions = self._subscriptions.get(subscription.user_key)
+        if subscriptions is None or subscription not in subscriptions:
+            return
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self._subscriptions[subscription.user_key]
+        self.connections -= 1
+
+    def resync(self) -> None:
+        """Events may have been missed: make every client reload, and forget the replay history."""
+        self._recent.clear()
+        self._positions.clear()
+        for subscriptions in self._subscriptions.values():
+            for subscription in subscriptions:
+                subscription.request_reset()
+                self.resets += 1
+
+    async def flush(self) -> None:
+        for subscriptions in self._subscriptions.values():
+            for subscription in subscriptions:
+                subscription.ping()
+
+    def start(self) -> None:
+        """Start the heartbeat and, on PostgreSQL, the LISTEN/NOTIFY bridge."""
+        super().start()
+        if self.bridge is None and self.engine.dialect.name == "postgresql":
+            self.bridge = PostgresEventBridge(self.engine, self.channel, self)
+            self.bridge.start()
+
+    async def stop(self) -> None:
+        """Stop the heartbeat and the bridge, and end every live connection."""
+        if self._task is not None:
+            self._stopping = True
+            self.wake()
+            await self._task
+            self._task = None
+        if self.bridge is not None:
+            await self.bridge.stop()
+            self.bridge = None
+        for subscriptions in self._subscriptions.values():
+            for subscription in subscriptions:
+                subscription.close()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "connections": self.connections,
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped_connections": self.dropped_connections,
+            "resets": self.resets,
+            "notify_dropped": self.bridge.dropped if self.bridge is not None else 0,
+            "notify_failed": self.bridge.failed if self.bridge is not None else 0,
+        }
+
+
+class PostgresEventBridge(PeriodicFlusher):
+    """Carry events between workers with LISTEN/NOTIFY on the primary.
+
+    The flusher loop sends queued events with ``pg_notify``. A second task
+    holds one connection (taken from the pool and never returned to it) that
+    LISTENs and hands every notification to the broker.
+    """
+
+    def __init__(self, engine: AsyncEngine, channel: str, broker: TaskEventBroker, interval: float = 1.0):
+        super().__init__(interval)
+        self.engine = engine
+        self.channel = channel
+        self.broker = broker
+        self._queue: Deque[str] = deque()
+        self._listener: Optional[asyncio.Task] = None
+        # Counters
+        self.notified = 0
+        self.dropped = 0
+        self.failed = 0
+        self.reconnects = 0
+
+    def send(self, event: TaskEvent) -> None:
+        payload = event.encode()
+        if len(payload.encode()) > MAX_NOTIFY_PAYLOAD:
+            # Too big for NOTIFY: send the task id only, and clients fetch the task
+            task_id = orjson.loads(event.data)["id"]
+            payload = TaskEvent(event.id, event.type, event.user_key, orjson.dumps({"id": task_id})).encode()
+        if len(self._queue) >= MAX_NOTIFY_QUEUE:
+            self._queue.popleft()
+            self.dropped += 1
+        self._queue.append(payload)
+        self.wake()
+
+    async def flush(self) -> None:
+        while self._queue:
+            batch = [self._queue.popleft() for _ in range(min(NOTIFY_BATCH_SIZE, len(self._queue)))]
+            try:
+                async with self.engine.begin() as conn:
+                    await conn.execute(NOTIFY_STATEMENT, {"channel": self.channel, "payloads": batch})
+                self.notified += len(batch)
+            except Exception:
+                self.failed += len(batch)
+                logger.exception("Dropped %d task events after a failed NOTIFY", len(batch))
+
+    def _notified(self, connection, pid: int, channel: str, payload: str) -> None:
+        try:
+            self.broker.deliver(TaskEvent.decode(payload))
+        except Exception:
+            logger.exception("Ignored a malformed task event notification")
+
+    async def _listen(self) -> None:
+        listened = False
+        while True:
+            try:
+                async with self.engine.connect() as conn:
+                    driver_connection = (await conn.get_raw_connection()).driver_connection
+                    lost = asyncio.Event()
+                    driver_connection.add_termination_listener(lambda _: lost.set())
+                    try:
+                        await driver_connection.add_listener(self.channel, self._notified)
+                        if listened:
+                            # Whatever was published while the connection was down is gone
+                            self.broker.resync()
+                        listened = True
+                        while not lost.is_set():
+                            with suppress(asyncio.TimeoutError):
+                                await asyncio.wait_for(lost.wait(), LISTEN_CHECK_SECONDS)
+                            if not lost.is_set():
+                                await driver_connection.execute("SELECT 1")
+                    finally:
+                        # Never hand a LISTENing connection back to the pool
+                        with suppress(Exception):
+                            await conn.invalidate()
+            except Exception as exc:
+                logger.warning("Task event listener lost its connection: %s", exc.__class__.__name__)
+            self.reconnects += 1
+            await asyncio.sleep(LISTEN_RETRY_SECONDS)
+
+    def start(self) -> None:
+        super().start()
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen(), name="TaskEventListener")
+
+    async def stop(self) -> None:
+        """Stop listening, then send what is still queued."""
+        if self._listener is not None:
+            self._listener.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._listener
+            self._listener = None
+        await super().stop()
+
+
+async def close_on_disconnect(receive: Receive, subscription: Subscription) -> None:
+    """Close ``subscription`` once the client goes away."""
+    while not (await receive())["type"].endswith(".disconnect"):
+        pass
+    subscription.close()
+
+
+HEARTBEAT_FRAME = b": heartbeat\n\n"
+
+
+class EventStreamResponse(Response):
+    """Stream a user's task events as Server-Sent Events until the client goes away."""
+
+    media_type = "text/event-stream"
+
+    def __init__(self, broker: TaskEventBroker, user_key: str, last_event_id: Optional[str] = None):
+        # Proxies must pass events through as they come (nginx: X-Accel-Buffering)
+        super().__init__(headers={"cache-control": "no-cache", "x-accel-buffering": "no"})
+        del self.headers["content-length"]
+        self.broker = broker
+        self.user_key = user_key
+        self.last_event_id = last_event_id
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        subscription = self.broker.subscribe(self.user_key, self.last_event_id)
+        watcher = asyncio.create_task(close_on_disconnect(receive, subscription))
+        try:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            await send({"type": "http.response.body", "body": b"retry: %d\n\n" % SSE_RETRY_MS, "more_body": True})
+            while True:
+                await subscription.wait()
+                if subscription.closed:
+                    break
+                events, reset, heartbeat = subscription.take()
+                frames = [self.reset_frame()] if reset else []
+                frames.extend(event.frame for event in events)
+                if heartbeat and not frames:
+                    frames.append(HEARTBEAT_FRAME)
+                await send({"type": "http.response.body", "body": b"".join(frames), "more_body": True})
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            watcher.cancel()
+            self.broker.unsubscribe(subscription)
+
+    def reset_frame(self) -> bytes:
+        # Moves the client's Last-Event-ID to now (or clears it), so its next reconnect resumes from here
+        return b"id: %s\nevent: reset\ndata: {}\n\n" % (self.broker.latest_id or "").encode()
+
+
+# Process-wide broker; the heartbeat (and bridge) start and stop with the application
+task_events = TaskEventBroker(
+    async_engine,
+    settings.TASK_EVENTS_CHANNEL,
+    heartbeat=settings.TASK_EVENTS_HEARTBEAT_SECONDS,
+    buffer_size=settings.TASK_EVENTS_BUFFER_SIZE,
+    replay_size=settings.TASK_EVENTS_REPLAY_SIZE,
+)
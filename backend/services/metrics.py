@@ -0,0 +1,194 @@
+"""Prometheus metrics.
+
+Three sources feed ``GET /metrics``:
+
+* :class:`middleware.MetricsMiddleware` times every request, labelled by
+  method, route template (``/api/v1/tasks/{task_id}``, never the raw path)
+  and status code, and reports how many queries each request ran and how long
+  they took in total;
+* ``database.instrumentation`` times every query and every pool checkout and
+  reports pool occupancy (see :func:`database.instrumentation.instrument_engine`);
+* :class:`ServiceStatsCollector` reads the counters the in-process services
+  already keep (bcrypt pool, principal and revocation caches, write buffers,
+  rate limiter, read replica routing, live event streams) at scrape time, so
+  none of them pays anything per request.
+
+Request latency minus query time minus pool wait is time spent in Python.
+Metrics are per worker process.
+"""
+import contextvars
+from typing import Dict, Optional
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, SummaryMetricFamily
+
+# Label for requests no route matched (404s, scanners), so raw paths never become labels
+UNMATCHED_ROUTE = "unmatched"
+
+
+def is_event_stream(message) -> bool:
+    """Whether a response start opens a long-lived event stream.
+
+    Streams are timed up to their start: their full length says nothing about the server.
+    """
+    return any(
+        name.lower() == b"content-type" and value.startswith(b"text/event-stream")
+        for name, value in message.get("headers", ())
+    )
+
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route template and status code.",
+    ("method", "route", "status"),
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request to sending the end of its response.",
+    ("method", "route"),
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries",
+    "Database queries run while handling one request.",
+    ("route",),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55),
+)
+REQUEST_QUERY_DURATION = Histogram(
+    "http_request_db_duration_seconds",
+    "Total database query time of one request.",
+    ("route",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Database statement execution time, by statement kind.",
+    ("engine", "operation"),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+DB_POOL_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the pool.",
+    ("engine",),
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+DB_POOL_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts_total",
+    "Pool checkouts that gave up after pool_timeout.",
+    ("engine",),
+)
+
+
+class RequestQueries:
+    """Queries run on behalf of the current request.
+
+    ``statements`` collects ``(sql, seconds)`` pairs when set to a list (the
+    slow request log does).
+    """
+
+    __slots__ = ("count", "seconds", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Optional[list] = None
+
+
+# Set by the metrics (or profiling) middleware for the duration of each request
+current_request_queries: contextvars.ContextVar[Optional[RequestQueries]] = contextvars.ContextVar(
+    "current_request_queries", default=None
+)
+
+
+class ServiceStatsCollector:
+    """Expose the counters kept by the in-process services at scrape time."""
+
+    def __init__(self, password_hasher, principal_cache, revocation_list, writers: Dict[str, object], rate_limiter,
+                 replicas=None, task_events=None):
+        self.password_hasher = password_hasher
+        self.principal_cache = principal_cache
+        self.revocation_list = revocation_list
+        self.writers = writers
+        self.rate_limiter = rate_limiter
+        self.replicas = replicas
+        self.task_events = task_events
+
+    def collect(self):
+        hasher = self.password_hasher.stats()
+        yield SummaryMetricFamily(
+            "password_hash_duration_seconds", "bcrypt time spent in the worker pool.",
+            count_value=hasher["completed"], sum_value=hasher["hash_seconds"],
+        )
+        yield SummaryMetricFamily(
+            "password_hash_queue_wait_seconds", "Time password operations waited for a worker.",
+            count_value=hasher["completed"], sum_value=hasher["queue_wait_seconds"],
+        )
+        yield GaugeMetricFamily(
+            "password_hash_waiting", "Password operations waiting for a worker.", value=hasher["waiting"],
+        )
+        yield CounterMetricFamily(
+            "password_hash_rejected", "Password operations shed with 503.", value=hasher["rejected"],
+        )
+
+        # A revocation check "hits" when it is answered without the database
+        revocations = self.revocation_list.stats()
+        lookups = CounterMetricFamily("cache_lookups", "In-process cache lookups.", labels=("cache", "result"))
+        lookups.add_metric(("principals", "hit"), self.principal_cache.hits)
+        lookups.add_metric(("principals", "miss"), self.principal_cache.misses)
+        lookups.add_metric(("revocations", "hit"), revocations["checks"] - revocations["db_lookups"])
+        lookups.add_metric(("revocations", "miss"), revocations["db_lookups"])
+        yield lookups
+        entries = GaugeMetricFamily("cache_entries", "Entries held by in-process caches.", labels=("cache",))
+        entries.add_metric(("principals",), len(self.principal_cache))
+        entries.add_metric(("revocations",), revocations["exact_entries"])
+        entries.add_metric(("revocations_bloom",), revocations["bloom_entries"])
+        yield entries
+
+        queued = GaugeMetricFamily("write_buffer_queued_rows", "Rows waiting in write buffers.", labels=("buffer",))
+        rows = CounterMetricFamily("write_buffer_rows", "Rows handled by write buffers.", labels=("buffer", "outcome"))
+        for name, writer in self.writers.items():
+            stats = writer.stats()
+            queued.add_metric((name,), stats["queued"])
+            for outcome in ("enqueued", "dropped", "written", "failed"):
+                rows.add_metric((name, outcome), stats[outcome])
+        yield queued
+        yield rows
+
+        yield CounterMetricFamily(
+            "rate_limited_requests", "Requests rejected with 429.", value=self.rate_limiter.limited,
+        )
+
+        if self.replicas is not None:
+            reads = CounterMetricFamily("db_read_sessions", "Read-only sessions by engine.", labels=("engine",))
+            for engine_name, count in self.replicas.reads.items():
+                reads.add_metric((engine_name,), count)
+            yield reads
+            healthy = GaugeMetricFamily("db_replica_healthy", "1 while a replica is in read rotation.", labels=("replica",))
+            lag = GaugeMetricFamily("db_replica_lag_seconds", "Replication lag at the last health check.", labels=("replica",))
+            ejections = CounterMetricFamily("db_replica_ejections", "Times a replica left read rotation.", labels=("replica",))
+            for replica in self.replicas.stats():
+                healthy.add_metric((replica["name"],), int(replica["healthy"]))
+                lag.add_metric((replica["name"],), replica["lag_seconds"])
+                ejections.add_metric((replica["name"],), replica["ejections"])
+            yield healthy
+            yield lag
+            yield ejections
+
+        if self.task_events is not None:
+            events = self.task_events.stats()
+            yield GaugeMetricFamily(
+                "task_event_connections", "Open task event streams.", value=events["connections"],
+            )
+            handled = CounterMetricFamily("task_events", "Task events by outcome.", labels=("outcome",))
+            for outcome in ("published", "delivered", "notify_dropped", "notify_failed"):
+                handled.add_metric((outcome,), events[outcome])
+            yield handled
+            yield CounterMetricFamily(
+                "task_event_streams_dropped", "Streams closed for falling behind.", value=events["dropped_connections"],
+            )
+            yield CounterMetricFamily(
+                "task_event_resets", "Streams told to reload instead of resuming.", value=events["resets"],
+            )
+
+
+def render_metrics():
+    """The current metrics in the Prometheus text format, with its content type."""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,265 @@
+"""Request profiling: on-demand sampling profiles and a slow request log.
+
+Both sample the event loop thread's Python stack from a separate thread
+(``sys._current_frames``), so the request path itself runs unmodified:
+
+* **On demand.** An admin adds ``X-Profile: 1`` (or ``?profile=1``) to a
+  request on a router that includes :func:`request_profiling`. The request is
+  sampled every ``PROFILE_SAMPLE_INTERVAL_MS`` until its response starts; the
+  profile is kept in :data:`profiles` and its id is returned in the
+  ``X-Profile-Id`` header. Profiles are in the collapsed stack format read by
+  ``flamegraph.pl``, speedscope and most flame graph viewers. They sample the
+  whole event loop, so concurrent requests can show up in them.
+* **Always on.** :data:`slow_requests` tracks in-flight requests and the SQL
+  they run. A watchdog thread starts sampling once a request has run longer
+  than ``SLOW_REQUEST_THRESHOLD_MS``, counting a sample towards the request
+  only while its own task is running (otherwise it is waiting on I/O or on
+  other requests). Requests that finish over the threshold are kept, with
+  their statements and hottest stacks, in a bounded ring buffer.
+
+Per request this costs a dict insert and delete plus one list append per
+query; no sampling happens until a request is slow or a profile is asked for.
+Statement parameters are never captured.
+"""
+import asyncio
+import itertools
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from fastapi import Depends, Request
+from config import settings
+from auth import Principal, get_current_user, require_admin
+
+# Longest stack kept per sample (innermost frames are dropped beyond this)
+MAX_STACK_DEPTH = 128
+# Longest SQL statement kept in the slow request log
+MAX_STATEMENT_LENGTH = 2000
+
+_PATH_PREFIXES = sorted({os.getcwd() + os.sep, *(path + os.sep for path in sys.path if path)}, key=len, reverse=True)
+
+
+def _short_path(filename: str) -> str:
+    for prefix in _PATH_PREFIXES:
+        if filename.startswith(prefix):
+            return filename[len(prefix):]
+    return filename
+
+
+def collapse_stack(frame) -> str:
+    """A frame and its callers as ``outer;...;inner`` (functions, not lines)."""
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        # ";" separates frames in the collapsed format
+        names.append(f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})".replace(";", ":"))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def render_collapsed(stacks: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+class StackSampler(threading.Thread):
+    """Sample one thread's stack at a fixed interval until stopped."""
+
+    def __init__(self, thread_id: int, interval: float, max_seconds: float):
+        super().__init__(name="profiler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        deadline = self.started + self.max_seconds
+        while not self._stopped.wait(self.interval) and time.perf_counter() < deadline:
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse_stack(frame)] += 1
+                self.samples += 1
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join()
+        self.elapsed = time.perf_counter() - self.started
+
+
+class ProfileStore:
+    """The most recent on-demand profiles."""
+
+    def __init__(self, interval: float, max_seconds: float, size: int):
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self._profiles: "deque[Dict[str, Any]]" = deque(maxlen=size)
+
+    def start(self) -> StackSampler:
+        """Start sampling the calling (event loop) thread."""
+        sampler = StackSampler(threading.get_ident(), self.interval, self.max_seconds)
+        sampler.start()
+        return sampler
+
+    def finish(self, sampler: StackSampler, method: str, path: str, route: Optional[str], status_code: int) -> str:
+        """Stop ``sampler`` and keep its profile; returns the profile id."""
+        sampler.stop()
+        profile_id = uuid.uuid4().hex
+        self._profiles.append({
+            "id": profile_id,
+            "created_at": datetime.utcnow(),
+            "method": method,
+            "path": path,
+            "route": route,
+            "status": status_code,
+            "duration_ms": round(sampler.elapsed * 1000, 3),
+            "interval_ms": self.interval * 1000,
+            "samples": sampler.samples,
+            "stacks": sampler.stacks,
+        })
+        return profile_id
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Profile summaries, newest first."""
+        return [{key: value for key, value in profile.items() if key != "stacks"} for profile in reversed(self._profiles)]
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        return next((profile for profile in self._profiles if profile["id"] == profile_id), None)
+
+
+class InFlightRequest:
+    """Bookkeeping for one request while it runs."""
+
+    __slots__ = ("id", "started", "task", "statements", "stacks", "samples", "waiting")
+
+    def __init__(self, request_id: int, task: Optional[asyncio.Task]):
+        self.id = request_id
+        self.started = time.perf_counter()
+        self.task = task
+        self.statements: List = []
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.waiting = 0
+
+
+class SlowRequestRecorder:
+    """Capture SQL and hot stacks of requests slower than ``threshold`` seconds."""
+
+    def __init__(self, threshold: float, sample_interval: float, size: int, max_statements: int, top_stacks: int = 10):
+        self.threshold = threshold
+        self.sample_interval = sample_interval
+        self.max_statements = max_statements
+        self.top_stacks = top_stacks
+        self._records: "deque[Dict[str, Any]]" = deque(maxlen=size)
+        self._inflight: Dict[int, InFlightRequest] = {}
+        self._ids = itertools.count()
+        # Guards the sample counters, which the watchdog updates from its thread
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread_id: Optional[int] = None
+
+    def start(self) -> None:
+        """Start the watchdog for the running event loop."""
+        if self._thread is None:
+            self._loop = asyncio.get_running_loop()
+            self._thread_id = threading.get_ident()
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._watch, name="slow-request-watchdog", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stopped.set()
+            self._thread.join()
+            self._thread = None
+
+    def begin(self) -> InFlightRequest:
+        """Register a request; called on the event loop."""
+        request = InFlightRequest(next(self._ids), asyncio.current_task())
+        self._inflight[request.id] = request
+        return request
+
+    def end(self, request: InFlightRequest, method: str, path: str, query_string: str,
+            route: Optional[str], status_code: int) -> None:
+        """Unregister a request and keep it if it was slow."""
+        del self._inflight[request.id]
+        duration = time.perf_counter() - request.started
+        if duration < self.threshold:
+            return
+        with self._lock:
+            hot_stacks = request.stacks.most_common(self.top_stacks)
+            samples, waiting = request.samples, request.waiting
+        self._records.append({
+            "started_at": datetime.utcnow().isoformat() + "Z",
+            "method": method,
+            "path": path,
+            "query_string": query_string,
+            "route": route,
+            "status": status_code,
+            "duration_ms": round(duration * 1000, 3),
+            "query_count": len(request.statements),
+            "query_ms": round(sum(seconds for _, seconds in request.statements) * 1000, 3),
+            "statements": [
+                {"sql": statement[:MAX_STATEMENT_LENGTH], "ms": round(seconds * 1000, 3)}
+                for statement, seconds in request.statements[:self.max_statements]
+            ],
+            "samples": samples,
+            "waiting_samples": waiting,
+            "hot_stacks": [{"stack": stack, "samples": count} for stack, count in hot_stacks],
+        })
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Slow requests, newest first."""
+        return list(reversed(self._records))
+
+    def _watch(self) -> None:
+        while not self._stopped.wait(self.sample_interval):
+            now = time.perf_counter()
+            # list() copies the dict in one step, so the loop thread may keep mutating it
+            slow = [request for request in list(self._inflight.values()) if now - request.started >= self.threshold]
+            if not slow:
+                continue
+            running = asyncio.current_task(self._loop)
+            frame = sys._current_frames().get(self._thread_id) if running is not None else None
+            stack = collapse_stack(frame) if frame is not None else None
+            with self._lock:
+                for request in slow:
+                    request.samples += 1
+                    if stack is not None and request.task is running:
+                        request.stacks[stack] += 1
+                    else:
+                        request.waiting += 1
+
+
+def profiler_requested(request: Request) -> bool:
+    return request.headers.get("x-profile") == "1" or request.query_params.get("profile") == "1"
+
+
+async def request_profiling(request: Request, current_user: Principal = Depends(get_current_user)) -> None:
+    """Dependency starting an on-demand profile when an admin asks for one."""
+    if not settings.PROFILING_ENABLED or not profiler_requested(request):
+        return
+    await require_admin(request, current_user)
+    request.state.profiler = profiles.start()
+
+
+# Process-wide stores; the watchdog is started and stopped with the application
+profiles = ProfileStore(
+    interval=settings.PROFILE_SAMPLE_INTERVAL_MS / 1000,
+    max_seconds=settings.PROFILE_MAX_SECONDS,
+    size=settings.PROFILE_STORE_SIZE,
+)
+slow_requests = SlowRequestRecorder(
+    threshold=settings.SLOW_REQUEST_THRESHOLD_MS / 1000,
+    sample_interval=settings.SLOW_REQUEST_SAMPLE_MS / 1000,
+    size=settings.SLOW_REQUEST_LOG_SIZE,
+    max_statements=settings.SLOW_REQUEST_MAX_STATEMENTS,
+)
@@ -0,0 +1,214 @@
+"""Request rate limiting (GCRA) with per-route-class budgets.
+
+Every route belongs to a class with its own budget, e.g. ``10/minute`` for
+``login``. Requests are counted per client IP and, on authenticated routes,
+per user as well. The generic cell rate algorithm keeps a single number per
+key (its theoretical arrival time, TAT), so memory per key is constant and a
+key whose TAT has passed is indistinguishable from a fresh one and can be
+evicted.
+
+Backends (``RATE_LIMIT_STORAGE``):
+
+* ``sqlite`` (default): a WAL-mode SQLite file shared by every worker on the
+  host, updated with one atomic upsert per check.
+* ``memory``: per-process, bounded LRU; only correct with a single worker.
+
+Other shared stores (e.g. for several hosts) plug in by subclassing
+:class:`RateLimitBackend` and adding it to ``BACKENDS``.
+"""
+import asyncio
+import logging
+import math
+import sqlite3
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+from fastapi import Depends, HTTPException, Request, status
+from config import settings
+from auth import Principal, get_current_user
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+def parse_rate(rate: str) -> Tuple[int, float]:
+    """Parse ``"<count>/<period>"`` (e.g. ``"10/minute"``) into ``(count, seconds)``."""
+    count, _, period = rate.partition("/")
+    try:
+        return int(count), PERIODS[period.strip().rstrip("s")]
+    except (KeyError, ValueError):
+        raise ValueError(f"Invalid rate limit: {rate!r}")
+
+
+class RateLimitBackend:
+    """Storage for GCRA state (one TAT per key)."""
+
+    async def hit(self, key: str, now: float, interval: float, tolerance: float) -> float:
+        """Admit one request for ``key`` if allowed.
+
+        Returns 0 when the request is admitted, otherwise the number of
+        seconds until it would be.
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Per-process store; keys are evicted when idle or least recently used."""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._tats: "OrderedDict[str, float]" = OrderedDict()
+
+    async def hit(self, key: str, now: float, interval: float, tolerance: float) -> float:
+        tat = max(self._tats.get(key, now), now)
+        if tat - now > tolerance:
+            return tat - now - tolerance
+        self._tats[key] = tat + interval
+        self._tats.move_to_end(key)
+        # Least recently used keys sit at the front: drop those that went idle, and
+        # over capacity drop active ones too (which only forgives their debt)
+        while self._tats:
+            oldest_tat = next(iter(self._tats.values()))
+            if oldest_tat > now and len(self._tats) <= self.max_keys:
+                break
+            self._tats.popitem(last=False)
+        return 0.0
+
+
+class SQLiteRateLimitBackend(RateLimitBackend):
+    """Store shared by all workers on one host through a WAL-mode SQLite file."""
+
+    # Drop idle keys (TAT in the past) at most this often
+    CLEANUP_SECONDS = 60.0
+
+    def __init__(self, path: str):
+        self.path = path
+        # sqlite3 connections are bound to a thread; run every call on one
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ratelimit")
+        self._connection: Optional[sqlite3.Connection] = None
+        self._next_cleanup = 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=1.0, isolation_level=None, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=OFF")
+        connection.execute("CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tat REAL NOT NULL)")
+        return connection
+
+    def _hit(self, key: str, now: float, interval: float, tolerance: float) -> float:
+        if self._connection is None:
+            self._connection = self._connect()
+        db = self._connection
+        if now >= self._next_cleanup:
+            self._next_cleanup = now + self.CLEANUP_SECONDS
+            db.execute("DELETE FROM rate_limits WHERE tat < ?", (now,))
+
+        # Admit and advance the TAT in one statement; no row comes back when over the limit
+        admitted = db.execute(
+            "INSERT INTO rate_limits (key, tat) VALUES (:key, :now + :interval) "
+            "ON CONFLICT (key) DO UPDATE SET tat = max(tat, :now) + :interval "
+            "WHERE max(tat, :now) - :now <= :tolerance "
+            "RETURNING tat",
+            {"key": key, "now": now, "interval": interval, "tolerance": tolerance},
+        ).fetchone()
+        if admitted is not None:
+            return 0.0
+        row = db.execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+        return max(row[0] - now - tolerance, 0.0) if row else 0.0
+
+    async def hit(self, key: str, now: float, interval: float, tolerance: float) -> float:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._hit, key, now, interval, tolerance)
+
+    def close(self) -> None:
+        def _close():
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+        self._executor.submit(_close).result()
+
+
+BACKENDS = {
+    "memory": lambda: MemoryRateLimitBackend(settings.RATE_LIMIT_MAX_KEYS),
+    "sqlite": lambda: SQLiteRateLimitBackend(settings.RATE_LIMIT_SQLITE_PATH),
+}
+
+
+class RateLimiter:
+    """Applies per-route-class budgets on top of a backend."""
+
+    def __init__(self, backend: RateLimitBackend, budgets: Dict[str, str], enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+        self.budgets = {}
+        for route_class, rate in budgets.items():
+            count, period = parse_rate(rate)
+            interval = period / count
+            # Allow the whole budget as a burst, then one request per interval
+            self.budgets[route_class] = (interval, interval * (count - 1))
+        # Counters
+        self.limited = 0
+
+    async def check(self, route_class: str, scope: str, identity: Optional[str]) -> None:
+        """Raise 429 if ``identity`` has exhausted its ``route_class`` budget."""
+        if not self.enabled or identity is None:
+            return
+        interval, tolerance = self.budgets[route_class]
+        try:
+            retry_after = await self.backend.hit(f"{route_class}:{scope}:{identity}", time.time(), interval, tolerance)
+        except Exception:
+            # Fail open: a broken limiter store must not take the API down
+            logger.exception("Rate limit check failed")
+            return
+        if retry_after > 0:
+            self.limited += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+
+def _route_class(request: Request, route_class: Optional[str]) -> str:
+    if route_class is not None:
+        return route_class
+    return "reads" if request.method in READ_METHODS else "writes"
+
+
+def rate_limit(route_class: Optional[str] = None):
+    """Dependency enforcing a route class budget per client IP.
+
+    Without ``route_class`` the request method decides between ``reads`` and
+    ``writes``.
+    """
+    async def limit_by_ip(request: Request) -> None:
+        await rate_limiter.check(
+            _route_class(request, route_class), "ip", request.client.host if request.client else None
+        )
+    return limit_by_ip
+
+
+def user_rate_limit(route_class: Optional[str] = None):
+    """Dependency enforcing a route class budget per authenticated user."""
+    async def limit_by_user(request: Request, current_user: Principal = Depends(get_current_user)) -> None:
+        await rate_limiter.check(_route_class(request, route_class), "user", str(current_user.id))
+    return limit_by_user
+
+
+# Process-wide limiter; the backend is closed with the application
+rate_limiter = RateLimiter(
+    BACKENDS[settings.RATE_LIMIT_STORAGE](),
+    {
+        "login": settings.RATE_LIMIT_LOGIN,
+        "register": settings.RATE_LIMIT_REGISTER,
+        "writes": settings.RATE_LIMIT_WRITES,
+        "reads": settings.RATE_LIMIT_READS or f"{settings.RATE_LIMIT_PER_MINUTE}/minute",
+    },
+    enabled=settings.RATE_LIMIT_ENABLED,
+)
@@ -0,0 +1,266 @@
+"""Time-bucketed analytics rollups for the admin dashboard.
+
+Handlers record events into an in-process buffer (a dict increment); a
+background flusher folds the buffer into ``analytics_rollups`` with one
+multi-row upsert per flush. Every event is counted in both an hourly and a
+daily bucket, and running totals (users, tasks) live under the ``total``
+granularity, so ``GET /admin/analytics`` never has to count the base tables.
+
+Active users are de-duplicated per bucket: each worker remembers who it has
+already reported, and ``analytics_active_users`` absorbs duplicates across
+workers (the counter only grows by rows actually inserted).
+
+``ActiveUserPruner`` deletes those de-duplication rows once their bucket
+is over; only the counts in ``analytics_rollups`` are kept.
+
+Totals are seeded by the migration that creates the tables and can be
+reconciled with the base tables with::
+
+    python -m services.rollups reconcile-totals
+"""
+import argparse
+import asyncio
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import settings
+from database import AsyncSessionLocal
+from database.upsert import dialect_insert, increment_statement
+from models import AnalyticsActiveUser, AnalyticsRollup, Task, User
+from services.batching import PeriodicFlusher
+
+GRANULARITIES = ("hour", "day")
+TOTAL = "total"
+TOTAL_BUCKET = datetime(1970, 1, 1)
+
+# Time-series metrics
+TASKS_CREATED = "tasks_created"
+TASKS_COMPLETED = "tasks_completed"
+LOGINS = "logins"
+ACTIVE_USERS = "active_users"
+SECURITY_EVENTS = "security_events"
+
+# Running totals
+USERS_TOTAL = "users_total"
+USERS_ACTIVE = "users_active"
+TASKS_TOTAL = "tasks_total"
+
+# Past buckets whose de-duplication rows are deleted per statement
+PRUNE_BATCH_SIZE = 24
+
+
+def bucket_start(at: datetime, granularity: str) -> datetime:
+    """Truncate ``at`` to the start of its bucket."""
+    if granularity == "hour":
+        return at.replace(minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        return at.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Unknown granularity: {granularity}")
+
+
+class RollupRecorder(PeriodicFlusher):
+    """Buffers rollup increments in memory and flushes them periodically."""
+
+    def __init__(self, interval: float):
+        super().__init__(interval)
+        self._pending: Counter = Counter()
+        self._active_pending: Set[Tuple[str, datetime, uuid.UUID]] = set()
+        self._active_seen: Dict[Tuple[str, datetime], Set[uuid.UUID]] = {}
+
+    def increment(self, metric: str, dimension: str = "", amount: int = 1, at: Optional[datetime] = None) -> None:
+        """Count ``amount`` occurrences of ``metric`` in the current hour and day."""
+        at = at or datetime.utcnow()
+        for granularity in GRANULARITIES:
+            self._pending[(granularity, metric, dimension, bucket_start(at, granularity))] += amount
+
+    def adjust_total(self, metric: str, delta: int) -> None:
+        """Move a running total up or down."""
+        self._pending[(TOTAL, metric, "", TOTAL_BUCKET)] += delta
+
+    def mark_active(self, user_id: uuid.UUID, at: Optional[datetime] = None) -> None:
+        """Note that ``user_id`` was active; cheap enough for every request."""
+        at = at or datetime.utcnow()
+        for granularity in GRANULARITIES:
+            bucket = bucket_start(at, granularity)
+            seen = self._active_seen.get((granularity, bucket))
+            if seen is None:
+                # A new bucket started: forget older ones for this granularity
+                for key in [k for k in self._active_seen if k[0] == granularity]:
+                    del self._active_seen[key]
+                seen = self._active_seen[(granularity, bucket)] = set()
+            if user_id not in seen:
+                seen.add(user_id)
+                self._active_pending.add((granularity, bucket, user_id))
+
+    async def flush(self) -> None:
+        if not self._pending and not self._active_pending:
+            return
+
+        pending, self._pending = self._pending, Counter()
+        active, self._active_pending = self._active_pending, set()
+
+        try:
+            async with AsyncSessionLocal() as db:
+                dialect_name = db.bind.dialect.name
+                for granularity, bucket in {(g, b) for g, b, _ in active}:
+                    rows = [
+                        {"granularity": g, "bucket_start": b, "user_id": u}
+                        for g, b, u in active
+                        if g == granularity and b == bucket
+                    ]
+                    result = await db.execute(
+                        dialect_insert(dialect_name, AnalyticsActiveUser.__table__).values(rows).on_conflict_do_nothing()
+                    )
+                    if result.rowcount:
+                        pending[(granularity, ACTIVE_USERS, "", bucket)] += result.rowcount
+
+                rows = [
+                    {"granularity": g, "metric": m, "dimension": d, "bucket_start": b, "value": v}
+                    for (g, m, d, b), v in pending.items()
+                    if v
+                ]
+                if rows:
+                    await db.execute(
+                        increment_statement(
+                            dialect_name,
+                            AnalyticsRollup.__table__,
+                            ("granularity", "metric", "dimension", "bucket_start"),
+                            "value",
+                            rows,
+                        )
+                    )
+                await db.commit()
+        except Exception:
+            # Put the counts back so the next flush retries them
+            self._pending.update(pending)
+            self._active_pending |= active
+            raise
+
+
+async def get_series(
+    db: AsyncSession, granularity: str, start: datetime, end: datetime
+) -> Dict[str, List[Dict]]:
+    """Return every metric's buckets in ``[start, end)``, keyed by metric (and dimension)."""
+    result = await db.execute(
+        select(AnalyticsRollup.metric, AnalyticsRollup.dimension, AnalyticsRollup.bucket_start, AnalyticsRollup.value)
+        .where(
+            AnalyticsRollup.granularity == granularity,
+            AnalyticsRollup.bucket_start >= bucket_start(start, granularity),
+            AnalyticsRollup.bucket_start < end,
+        )
+        .order_by(AnalyticsRollup.metric, AnalyticsRollup.dimension, AnalyticsRollup.bucket_start)
+    )
+    series: Dict[str, List[Dict]] = {}
+    for metric, dimension, bucket, value in result.all():
+        name = f"{metric}:{dimension}" if dimension else metric
+        series.setdefault(name, []).append({"bucket": bucket, "value": value})
+    return series
+
+
+async def get_totals(db: AsyncSession) -> Dict[str, int]:
+    """Return the running totals."""
+    result = await db.execute(
+        select(AnalyticsRollup.metric, AnalyticsRollup.value).where(AnalyticsRollup.granularity == TOTAL)
+    )
+    return dict(result.all())
+
+
+async def reconcile_totals(db: AsyncSession) -> Dict[str, int]:
+    """Recompute running totals from the base tables (an occasional maintenance job)."""
+    totals = {
+        USERS_TOTAL: await db.scalar(select(func.count()).select_from(User)),
+        USERS_ACTIVE: await db.scalar(select(func.count()).select_from(User).where(User.is_active.is_(True))),
+        TASKS_TOTAL: await db.scalar(select(func.count()).select_from(Task)),
+    }
+    await db.execute(delete(AnalyticsRollup).where(AnalyticsRollup.granularity == TOTAL))
+    await db.execute(
+        AnalyticsRollup.__table__.insert(),
+        [
+            {"granularity": TOTAL, "metric": metric, "dimension": "", "bucket_start": TOTAL_BUCKET, "value": value}
+            for metric, value in totals.items()
+        ],
+    )
+    await db.commit()
+    return totals
+
+
+class ActiveUserPruner(PeriodicFlusher):
+    """Delete ``analytics_active_users`` rows of buckets older than ``retention``.
+
+    The rows only de-duplicate users within a bucket that is still being
+    counted, so ``retention`` must exceed the longest bucket (a day) plus
+    however late a worker may flush.
+    """
+
+    def __init__(self, interval: float, retention: timedelta):
+        super().__init__(interval)
+        self.retention = retention
+        self.removed = 0
+
+    async def prune(self) -> int:
+        """Delete one batch of past buckets per granularity; returns how many buckets."""
+        cutoff = datetime.utcnow() - self.retention
+        pruned = 0
+        async with AsyncSessionLocal() as db:
+            for granularity in GRANULARITIES:
+                buckets = (await db.scalars(
+                    select(AnalyticsActiveUser.bucket_start)
+                    .where(AnalyticsActiveUser.granularity == granularity, AnalyticsActiveUser.bucket_start < cutoff)
+                    .distinct()
+                    .limit(PRUNE_BATCH_SIZE)
+                )).all()
+                if not buckets:
+                    continue
+                result = await db.execute(
+                    delete(AnalyticsActiveUser).where(
+                        AnalyticsActiveUser.granularity == granularity, AnalyticsActiveUser.bucket_start.in_(buckets)
+                    )
+                )
+                self.removed += max(result.rowcount, 0)
+                pruned = max(pruned, len(buckets))
+            await db.commit()
+        return pruned
+
+    async def flush(self) -> None:
+        while await self.prune() == PRUNE_BATCH_SIZE:
+            pass
+
+    async def stop(self) -> None:
+        """Stop pruning (a final run is not needed on shutdown)."""
+        if self._task is not None:
+            self._stopping = True
+            self.wake()
+            await self._task
+            self._task = None
+
+
+# Process-wide recorder and pruner, started and stopped with the application
+rollups = RollupRecorder(interval=settings.ANALYTICS_FLUSH_SECONDS)
+active_user_pruner = ActiveUserPruner(
+    interval=settings.ANALYTICS_PRUNE_SECONDS,
+    retention=timedelta(hours=settings.ANALYTICS_ACTIVE_USERS_RETENTION_HOURS),
+)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Analytics rollup maintenance.")
+    parser.add_argument("command", choices=["reconcile-totals"])
+    parser.parse_args(argv)
+
+    from database import async_engine
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            totals = await reconcile_totals(db)
+        await async_engine.dispose()
+        return totals
+
+    for metric, value in asyncio.run(run()).items():
+        print(f"{metric}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""Streaming security event detection.
+
+Failed logins, invalid tokens and forbidden-role hits are reported to
+:data:`security_monitor`. Each signal is written to ``security_events`` (via
+a batching background writer, like audit logs) and fed to in-memory sliding
+window counters keyed by client IP or account. When a counter crosses a
+rule's threshold a severity-tagged alert event is raised as well, escalating
+to ``critical`` at ``SECURITY_CRITICAL_MULTIPLIER`` times the threshold.
+
+Every counter is a fixed ring of ``SECURITY_WINDOW_SLOTS`` buckets, so
+recording a signal is O(1) and never touches the database. At most
+``SECURITY_MAX_TRACKED_KEYS`` keys are tracked; the least recently seen key is
+evicted first. Counters are per worker process, so thresholds apply per
+worker.
+"""
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from fastapi import Request
+from config import settings
+from models import SecurityEvent, SecurityEventSeverity
+from services.batching import BatchInsertWriter
+from services.rollups import rollups, SECURITY_EVENTS
+
+# Signals
+LOGIN_FAILED = "login_failed"
+INVALID_TOKEN = "invalid_token"
+FORBIDDEN = "forbidden"
+
+
+class DetectionRule(NamedTuple):
+    """Raise ``event_type`` when ``signal`` repeats ``threshold`` times per ``scope`` key."""
+    event_type: str
+    signal: str
+    scope: str  # "ip" or "account"
+    threshold: int
+    severity: SecurityEventSeverity
+
+
+DEFAULT_RULES = (
+    DetectionRule("brute_force_account", LOGIN_FAILED, "account",
+                  settings.SECURITY_LOGIN_FAILURES_PER_ACCOUNT, SecurityEventSeverity.MEDIUM),
+    DetectionRule("brute_force_ip", LOGIN_FAILED, "ip",
+                  settings.SECURITY_LOGIN_FAILURES_PER_IP, SecurityEventSeverity.HIGH),
+    DetectionRule("token_probing_ip", INVALID_TOKEN, "ip",
+                  settings.SECURITY_INVALID_TOKENS_PER_IP, SecurityEventSeverity.HIGH),
+    DetectionRule("privilege_probing_account", FORBIDDEN, "account",
+                  settings.SECURITY_FORBIDDEN_PER_ACCOUNT, SecurityEventSeverity.MEDIUM),
+)
+
+
+def client_ip(request: Optional[Request]) -> Optional[str]:
+    return request.client.host if request is not None and request.client else None
+
+
+class SlidingWindowCounter:
+    """Event count over the last ``len(counts)`` time slots."""
+
+    __slots__ = ("counts", "slot_ids", "alert_level", "alerted_at")
+
+    def __init__(self, slots: int):
+        self.counts = [0] * slots
+        self.slot_ids = [-1] * slots
+        # Highest alert tier raised and when, so a sustained attack alerts once per window
+        self.alert_level = 0
+        self.alerted_at = 0.0
+
+    def add(self, slot_id: int) -> int:
+        """Count one event in ``slot_id`` and return the windowed total."""
+        slots = len(self.counts)
+        index = slot_id % slots
+        if self.slot_ids[index] != slot_id:
+            self.slot_ids[index] = slot_id
+            self.counts[index] = 0
+        self.counts[index] += 1
+        return sum(count for count, sid in zip(self.counts, self.slot_ids) if slot_id - sid < slots)
+
+
+class WindowedCounters:
+    """Bounded LRU map of sliding window counters."""
+
+    def __init__(self, window_seconds: float, slots: int, max_keys: int):
+        self.slot_seconds = window_seconds / slots
+        self.slots = slots
+        self.max_keys = max_keys
+        self._counters: "OrderedDict[Tuple, SlidingWindowCounter]" = OrderedDict()
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+    def hit(self, key: Tuple, now: float) -> Tuple[SlidingWindowCounter, int]:
+        """Count an event for ``key``; returns the counter and its windowed total."""
+        counter = self._counters.get(key)
+        if counter is None:
+            if len(self._counters) >= self.max_keys:
+                self._counters.popitem(last=False)
+                self.evicted += 1
+            counter = self._counters[key] = SlidingWindowCounter(self.slots)
+        else:
+            self._counters.move_to_end(key)
+        return counter, counter.add(int(now // self.slot_seconds))
+
+
+class SecurityEventWriter(BatchInsertWriter):
+    """Bounded queue of security events with a batching background writer."""
+
+    def __init__(self, max_queue: int, batch_size: int, interval: float):
+        super().__init__(SecurityEvent.__table__, max_queue, batch_size, interval)
+
+    def record(
+        self,
+        event_type: str,
+        severity: SecurityEventSeverity,
+        user_id: Optional[uuid.UUID] = None,
+        ip_address: Optional[str] = None,
+        details: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """Queue a security event; returns False if it was dropped."""
+        queued = self.enqueue({
+            "id": uuid.uuid4(),
+            "user_id": user_id,
+            "event_type": event_type,
+            "severity": severity,
+            "details": details or {},
+            "ip_address": ip_address,
+            "created_at": datetime.utcnow(),
+        })
+        if queued:
+            rollups.increment(SECURITY_EVENTS, severity.value)
+        return queued
+
+
+class SecurityMonitor:
+    """Records authentication signals and raises alerts when rules trip."""
+
+    def __init__(self, writer: SecurityEventWriter, rules=DEFAULT_RULES, window_seconds: float = 300,
+                 slots: int = 10, max_keys: int = 50000, critical_multiplier: int = 5):
+        self.writer = writer
+        self.window_seconds = window_seconds
+        self.critical_multiplier = critical_multiplier
+        self.counters = WindowedCounters(window_seconds, slots, max_keys)
+        self._rules: Dict[str, List[DetectionRule]] = {}
+        for rule in rules:
+            self._rules.setdefault(rule.signal, []).append(rule)
+        self.alerts = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"tracked_keys": len(self.counters), "evicted": self.counters.evicted, "alerts": self.alerts}
+
+    def login_failed(self, request: Optional[Request], email: str, user_id: Optional[uuid.UUID] = None) -> None:
+        """A login attempt with a wrong password or unknown email."""
+        self._observe(
+            LOGIN_FAILED, SecurityEventSeverity.LOW, client_ip(request),
+            account=email.lower(), user_id=user_id, details={"email": email},
+        )
+
+    def invalid_token(self, request: Optional[Request], reason: str) -> None:
+        """A bearer token that failed validation."""
+        self._observe(
+            INVALID_TOKEN, SecurityEventSeverity.LOW, client_ip(request),
+            details={"reason": reason, "path": request.url.path if request is not None else None},
+        )
+
+    def forbidden(self, request: Optional[Request], user_id: uuid.UUID, required_role: str) -> None:
+        """An authenticated user hit an endpoint their role does not allow."""
+        self._observe(
+            FORBIDDEN, SecurityEventSeverity.MEDIUM, client_ip(request),
+            account=str(user_id), user_id=user_id,
+            details={"required_role": required_role, "path": request.url.path if request is not None else None},
+        )
+
+    def _observe(
+        self,
+        signal: str,
+        severity: SecurityEventSeverity,
+        ip_address: Optional[str],
+        account: Optional[str] = None,
+        user_id: Optional[uuid.UUID] = None,
+        details: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.writer.record(signal, severity, user_id=user_id, ip_address=ip_address, details=details)
+
+        now = time.monotonic()
+        keys = {"ip": ip_address, "account": account}
+        for rule in self._rules.get(signal, ()):
+            key = keys[rule.scope]
+            if key is None:
+                continue
+            counter, count = self.counters.hit((rule.event_type, key), now)
+            if count >= rule.threshold * self.critical_multiplier:
+                level, alert_severity = 2, SecurityEventSeverity.CRITICAL
+            elif count >= rule.threshold:
+                level, alert_severity = 1, rule.severity
+            else:
+                continue
+            if level <= counter.alert_level and now - counter.alerted_at < self.window_seconds:
+                continue
+            counter.alert_level = level
+            counter.alerted_at = now
+            self.alerts += 1
+            self.writer.record(
+                rule.event_type,
+                alert_severity,
+                user_id=user_id if rule.scope == "account" else None,
+                ip_address=ip_address,
+                details={
+                    "scope": rule.scope,
+                    "key": key,
+                    "count": count,
+                    "threshold": rule.threshold,
+                    "window_seconds": self.window_seconds,
+                },
+            )
+
+
+# Process-wide writer and detector; the writer is started and stopped with the application
+security_writer = SecurityEventWriter(
+    max_queue=settings.SECURITY_QUEUE_MAX,
+    batch_size=settings.SECURITY_BATCH_SIZE,
+    interval=settings.SECURITY_FLUSH_MS / 1000,
+)
+security_monitor = SecurityMonitor(
+    security_writer,
+    window_seconds=settings.SECURITY_WINDOW_SECONDS,
+    slots=settings.SECURITY_WINDOW_SLOTS,
+    max_keys=settings.SECURITY_MAX_TRACKED_KEYS,
+    critical_multiplier=settings.SECURITY_CRITICAL_MULTIPLIER,
+)
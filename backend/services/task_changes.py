@@ -0,0 +1,212 @@
+"""Delta sync: what changed in a user's tasks since a cursor.
+
+Each user has a change sequence in ``task_change_counters``. Every task
+write takes the next number in its own transaction (:func:`next_change_seq`)
+and stamps it on the task's ``change_seq``, or on a ``task_tombstones`` row
+when the task is deleted. ``GET /tasks/changes?since=<cursor>`` then returns
+the tasks and tombstones numbered after the cursor, in order, through the
+``ix_tasks_user_change_seq`` and ``ix_task_tombstones_user_seq`` indexes.
+
+The numbers come from the database rather than the clock, so skew between
+API hosts cannot open gaps. Taking a number locks the user's counter until
+commit, so a user's changes also commit in sequence order, and a cursor can
+never move past a change that has yet to commit.
+
+Tombstones are kept for ``TASK_TOMBSTONE_RETENTION_DAYS``.
+:class:`TombstoneCompactor` deletes older ones and advances the user's
+``compacted_seq``. A cursor from before that point may have missed a delete,
+so the endpoint answers it with 410 and the client syncs from scratch.
+
+A full sync (no ``since``) that takes several pages hands out cursors
+carrying the sequence number its scan started from. Those pages need no
+tombstones and are never too old; the last page's cursor is a plain one at
+the scan's start, so the first delta afterwards reports every change and
+delete made while the client was paging.
+"""
+import base64
+import json
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy import and_, bindparam, func, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import settings
+from database import AsyncSessionLocal
+from database.pagination import InvalidCursorError
+from database.upsert import dialect_insert
+from models import Task, TaskChangeCounter, TaskTombstone
+from schemas.payloads import TASK_RESPONSE_COLUMNS, task_payload
+from services.batching import PeriodicFlusher
+
+# Users whose old tombstones are compacted per transaction
+COMPACT_BATCH_SIZE = 500
+
+
+class CursorTooOld(Exception):
+    """Raised when tombstones a cursor still needs have been compacted away."""
+
+
+def encode_change_cursor(
+    change_seq: int, task_id: Optional[uuid.UUID] = None, full_sync_seq: Optional[int] = None
+) -> str:
+    """Encode a position in a user's change sequence as an opaque cursor.
+
+    The task id only breaks ties between tasks written in bulk, which all
+    have ``change_seq`` 0. ``full_sync_seq`` marks a page boundary of a full
+    sync that started at that sequence number.
+    """
+    fields = [change_seq, str(task_id) if task_id else None]
+    if full_sync_seq is not None:
+        fields.append(full_sync_seq)
+    raw = json.dumps(fields, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_change_cursor(cursor: str) -> Tuple[int, Optional[uuid.UUID], Optional[int]]:
+    """Decode a cursor produced by :func:`encode_change_cursor`."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        change_seq, task_id, *rest = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        full_sync_seq = rest.pop() if rest else None
+        if rest or not isinstance(change_seq, int) or not isinstance(full_sync_seq, (int, type(None))):
+            raise TypeError("change cursor")
+        return change_seq, uuid.UUID(task_id) if task_id else None, full_sync_seq
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursorError("Invalid cursor") from exc
+
+
+async def next_change_seq(db: AsyncSession, user_id: uuid.UUID) -> int:
+    """Take the user's next change number (within the caller's transaction).
+
+    The counter row stays locked until the transaction ends, so take the
+    number after any other counters the transaction updates.
+    """
+    counters = TaskChangeCounter.__table__
+    stmt = dialect_insert(db.bind.dialect.name, counters).values(user_id=user_id, last_seq=1, compacted_seq=0)
+    stmt = stmt.on_conflict_do_update(index_elements=["user_id"], set_={"last_seq": counters.c.last_seq + 1})
+    return await db.scalar(stmt.returning(counters.c.last_seq))
+
+
+async def record_task_deleted(db: AsyncSession, task: Task) -> None:
+    """Leave a tombstone for a task about to be deleted."""
+    change_seq = await next_change_seq(db, task.user_id)
+    await db.execute(insert(TaskTombstone).values(
+        task_id=task.id, user_id=task.user_id, change_seq=change_seq, deleted_at=datetime.utcnow(),
+    ))
+
+
+async def get_changes(db: AsyncSession, user_id: uuid.UUID, since: Optional[str], limit: int) -> Dict[str, Any]:
+    """Up to ``limit`` task changes after the ``since`` cursor, oldest first.
+
+    Without ``since`` every task is returned and no deletes are, as are the
+    following pages of that full sync.
+    """
+    counter = (await db.execute(
+        select(TaskChangeCounter.last_seq, TaskChangeCounter.compacted_seq).where(TaskChangeCounter.user_id == user_id)
+    )).first()
+    last_seq = counter.last_seq if counter else 0
+
+    tasks = select(*TASK_RESPONSE_COLUMNS, Task.change_seq).where(Task.user_id == user_id)
+    if since is None:
+        since_seq, since_id, full_sync_seq = -1, None, last_seq
+    else:
+        since_seq, since_id, full_sync_seq = decode_change_cursor(since)
+        # A full sync in progress reads no tombstones, so compaction cannot have taken any from it
+        if full_sync_seq is None and counter is not None and since_seq < counter.compacted_seq:
+            raise CursorTooOld()
+    if since_id is not None:
+        tasks = tasks.where(or_(Task.change_seq > since_seq, and_(Task.change_seq == since_seq, Task.id > since_id)))
+    else:
+        tasks = tasks.where(Task.change_seq > since_seq)
+    task_rows = (await db.execute(tasks.order_by(Task.change_seq, Task.id).limit(limit + 1))).all()
+    tombstone_rows = []
+    if full_sync_seq is None:
+        tombstone_rows = (await db.execute(
+            select(TaskTombstone.task_id, TaskTombstone.change_seq)
+            .where(TaskTombstone.user_id == user_id, TaskTombstone.change_seq > since_seq)
+            .order_by(TaskTombstone.change_seq)
+            .limit(limit + 1)
+        )).all()
+
+    # Both lists are in sequence order; the first ``limit`` of the merge is the page
+    changes = sorted(
+        [(row.change_seq, row.id, row) for row in task_rows]
+        + [(row.change_seq, row.task_id, None) for row in tombstone_rows],
+        key=lambda change: (change[0], change[1]),
+    )
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    if has_more:
+        change_seq, task_id, row = changes[-1]
+        cursor = encode_change_cursor(change_seq, task_id if row is not None else None, full_sync_seq)
+    elif full_sync_seq is not None:
+        # Changes made while the scan ran may have been passed over; the next delta picks them up
+        cursor = encode_change_cursor(full_sync_seq)
+    else:
+        cursor = encode_change_cursor(max([last_seq, since_seq] + [change[0] for change in changes[-1:]]))
+
+    return {
+        "tasks": [task_payload(row) for _, _, row in changes if row is not None],
+        "deleted": [task_id for _, task_id, row in changes if row is None],
+        "cursor": cursor,
+        "has_more": has_more,
+    }
+
+
+class TombstoneCompactor(PeriodicFlusher):
+    """Delete tombstones past their retention, remembering how far each user's were compacted."""
+
+    def __init__(self, interval: float, retention: timedelta):
+        super().__init__(interval)
+        self.retention = retention
+        self.removed = 0
+
+    async def compact(self) -> int:
+        """Compact one batch of users' old tombstones; returns how many users."""
+        counters = TaskChangeCounter.__table__
+        tombstones = TaskTombstone.__table__
+        cutoff = datetime.utcnow() - self.retention
+        async with AsyncSessionLocal() as db:
+            horizons = (await db.execute(
+                select(TaskTombstone.user_id, func.max(TaskTombstone.change_seq))
+                .where(TaskTombstone.deleted_at < cutoff)
+                .group_by(TaskTombstone.user_id)
+                .limit(COMPACT_BATCH_SIZE)
+            )).all()
+            if not horizons:
+                return 0
+            params = [{"owner": user_id, "horizon": change_seq} for user_id, change_seq in horizons]
+            await db.execute(
+                counters.update()
+                .where(counters.c.user_id == bindparam("owner"))
+                .values(compacted_seq=bindparam("horizon")),
+                params,
+            )
+            result = await db.execute(
+                tombstones.delete().where(
+                    tombstones.c.user_id == bindparam("owner"), tombstones.c.change_seq <= bindparam("horizon")
+                ),
+                params,
+            )
+            await db.commit()
+        self.removed += max(result.rowcount, 0)
+        return len(horizons)
+
+    async def flush(self) -> None:
+        while await self.compact() == COMPACT_BATCH_SIZE:
+            pass
+
+    async def stop(self) -> None:
+        """Stop compacting (a final run is not needed on shutdown)."""
+        if self._task is not None:
+            self._stopping = True
+            self.wake()
+            await self._task
+            self._task = None
+
+
+# Process-wide compactor; it starts and stops with the application
+tombstone_compactor = TombstoneCompactor(
+    interval=settings.TASK_TOMBSTONE_COMPACT_SECONDS,
+    retention=timedelta(days=settings.TASK_TOMBSTONE_RETENTION_DAYS),
+)
@@ -0,0 +1,163 @@
+"""Incrementally maintained per-user task statistics.
+
+Counts by status, priority and category live in ``task_stat_counters`` and are
+adjusted in the same transaction as every task mutation, so reading them is a
+single primary-key range lookup no matter how many tasks a user has. Overdue
+and due-soon counts depend on the clock and cannot be kept as counters; they
+are answered from the partial ``ix_tasks_user_due_open`` index instead.
+
+Drift (e.g. from manual SQL) can be reconciled with::
+
+    python -m services.task_stats rebuild [--user-id UUID]
+"""
+import argparse
+import asyncio
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+from config import settings
+from database.upsert import increment_statement
+from models import Task, TaskPriority, TaskStatus, TaskStatCounter
+
+DIMENSIONS = ("status", "priority", "category")
+
+
+def _value(value) -> Optional[str]:
+    return value.value if hasattr(value, "value") else value
+
+
+def task_dimensions(task) -> Tuple[Tuple[str, str], ...]:
+    """Return the ``(dimension, value)`` pairs a task is counted under."""
+    pairs = []
+    for dimension in DIMENSIONS:
+        value = _value(getattr(task, dimension))
+        if value is not None:
+            pairs.append((dimension, value))
+    return tuple(pairs)
+
+
+def diff_dimensions(before: Iterable[Tuple[str, str]], after: Iterable[Tuple[str, str]]) -> Counter:
+    """Return counter deltas for a task moving from ``before`` to ``after``."""
+    deltas = Counter(after)
+    deltas.subtract(Counter(before))
+    return deltas
+
+
+async def apply_deltas(db: AsyncSession, user_id: uuid.UUID, deltas: Counter) -> None:
+    """Add ``deltas`` to a user's counters (within the caller's transaction)."""
+    rows = [
+        {"user_id": user_id, "dimension": dimension, "value": value, "count": delta}
+        for (dimension, value), delta in deltas.items()
+        if delta
+    ]
+    if not rows:
+        return
+    await db.execute(
+        increment_statement(
+            db.bind.dialect.name,
+            TaskStatCounter.__table__,
+            ("user_id", "dimension", "value"),
+            "count",
+            rows,
+        )
+    )
+
+
+async def record_task_created(db: AsyncSession, task: Task) -> None:
+    """Count a newly created task."""
+    await apply_deltas(db, task.user_id, Counter(task_dimensions(task)))
+
+
+async def record_task_changed(db: AsyncSession, user_id: uuid.UUID, before: Tuple, after: Tuple) -> None:
+    """Move a task's counts from its old dimension values to its new ones."""
+    await apply_deltas(db, user_id, diff_dimensions(before, after))
+
+
+async def record_task_deleted(db: AsyncSession, task: Task) -> None:
+    """Stop counting a deleted task."""
+    await apply_deltas(db, task.user_id, diff_dimensions(task_dimensions(task), ()))
+
+
+def due_counts_query(user_id: uuid.UUID, now: datetime) -> Select:
+    """Overdue and due-soon counts, served by the partial ``(user_id, due_date)`` index."""
+    due_soon_until = now + timedelta(hours=settings.TASK_DUE_SOON_HOURS)
+    return select(
+        func.count().filter(Task.due_date < now),
+        func.count().filter(Task.due_date >= now),
+    ).where(
+        Task.user_id == user_id,
+        Task.status != TaskStatus.DONE,
+        Task.due_date < due_soon_until,
+    )
+
+
+async def get_task_stats(db: AsyncSession, user_id: uuid.UUID, now: Optional[datetime] = None) -> Dict:
+    """Return the stats payload for ``GET /tasks/stats``."""
+    now = now or datetime.utcnow()
+
+    stats = {
+        "by_status": {s.value: 0 for s in TaskStatus},
+        "by_priority": {p.value: 0 for p in TaskPriority},
+        "by_category": {},
+    }
+    result = await db.execute(
+        select(TaskStatCounter.dimension, TaskStatCounter.value, TaskStatCounter.count)
+        # A counter that drifted below zero (see ``rebuild``) must not skew the total
+        .where(TaskStatCounter.user_id == user_id, TaskStatCounter.count > 0)
+    )
+    for dimension, value, count in result.all():
+        stats[f"by_{dimension}"][value] = count
+
+    overdue, due_soon = (await db.execute(due_counts_query(user_id, now))).one()
+
+    stats["total"] = sum(stats["by_status"].values())
+    stats["overdue"] = overdue
+    stats["due_soon"] = due_soon
+    return stats
+
+
+async def rebuild_task_stats(db: AsyncSession, user_id: Optional[uuid.UUID] = None) -> None:
+    """Recompute counters from the tasks table for one user (or everyone)."""
+    clear = delete(TaskStatCounter)
+    if user_id is not None:
+        clear = clear.where(TaskStatCounter.user_id == user_id)
+    await db.execute(clear)
+
+    for dimension in DIMENSIONS:
+        column = getattr(Task, dimension)
+        counts = select(Task.user_id, column, func.count()).where(column.is_not(None)).group_by(Task.user_id, column)
+        if user_id is not None:
+            counts = counts.where(Task.user_id == user_id)
+        rows = [
+            {"user_id": uid, "dimension": dimension, "value": _value(value), "count": count}
+            for uid, value, count in (await db.execute(counts)).all()
+        ]
+        if rows:
+            await db.execute(TaskStatCounter.__table__.insert(), rows)
+
+    await db.commit()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Task statistics maintenance.")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--user-id", type=uuid.UUID, default=None)
+    args = parser.parse_args(argv)
+
+    from database import AsyncSessionLocal, async_engine
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            await rebuild_task_stats(db, args.user_id)
+        await async_engine.dispose()
+
+    asyncio.run(run())
+    print("Task statistics rebuilt.")
+
+
+if __name__ == "__main__":
+    main()
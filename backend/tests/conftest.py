@@ -0,0 +1,87 @@
+"""pytest configuration for the test suite.
+
+The tests run against a throwaway SQLite database (through aiosqlite)
+brought to the head revision by the Alembic migrations, as a deployment
+would, and call the app in-process through ``httpx``::
+
+    python -m pytest
+
+The database, upload directory and rate limiter store live in a temporary
+directory, so ``DATABASE_URL`` and friends from the environment are
+overridden. Every test shares one event loop, like the app's pooled
+connections do.
+"""
+import os
+import shutil
+import tempfile
+import uuid
+
+TEST_DIR = tempfile.mkdtemp(prefix="task-manager-tests-")
+
+# Settings are read at import time, so they are set before the app is imported
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TEST_DIR, 'test.db')}"
+os.environ["DATABASE_REPLICA_URLS"] = "[]"
+os.environ["UPLOAD_DIR"] = os.path.join(TEST_DIR, "uploads")
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+os.environ["RATE_LIMIT_SQLITE_PATH"] = os.path.join(TEST_DIR, "ratelimit.sqlite3")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+import pytest_asyncio  # noqa: E402
+from pytest_asyncio import is_async_test  # noqa: E402
+
+PASSWORD = "password123"
+
+
+def pytest_collection_modifyitems(items):
+    session_loop = pytest.mark.asyncio(scope="session")
+    for item in items:
+        if is_async_test(item):
+            item.add_marker(session_loop, append=False)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    """Migrate the test database to head once for the whole run."""
+    from database.migrations import upgrade_database
+    upgrade_database()
+    yield os.environ["DATABASE_URL"]
+    shutil.rmtree(TEST_DIR, ignore_errors=True)
+
+
+@pytest_asyncio.fixture(scope="session")
+async def client(database):
+    from main import app
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+async def login_new_user(client, role=None):
+    """Register a fresh user (optionally with ``role``) and return its bearer token headers."""
+    email = f"user-{uuid.uuid4().hex[:12]}@example.com"
+    response = await client.post(
+        "/api/v1/auth/register", json={"email": email, "full_name": "Test User", "password": PASSWORD}
+    )
+    assert response.status_code == 201, response.text
+    if role is not None:
+        from sqlalchemy import update
+        from database import AsyncSessionLocal
+        from models import User
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(User).where(User.email == email).values(role=role))
+            await db.commit()
+    response = await client.post("/api/v1/auth/login", json={"email": email, "password": PASSWORD})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest_asyncio.fixture
+async def auth_headers(client):
+    return await login_new_user(client)
+
+
+@pytest_asyncio.fixture
+async def admin_headers(client):
+    from models import UserRole
+    return await login_new_user(client, UserRole.ADMIN)
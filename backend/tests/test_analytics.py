@@ -0,0 +1,78 @@
+"""Admin analytics from rollups."""
+import uuid
+from datetime import datetime
+from database import AsyncSessionLocal
+from services.rollups import ACTIVE_USERS, USERS_TOTAL, RollupRecorder, get_series, get_totals, rollups
+
+# Far from the buckets the other tests write to
+AT = datetime(2020, 1, 1, 10, 30)
+
+
+async def test_flush_aggregates_per_bucket():
+    first, second = RollupRecorder(interval=60.0), RollupRecorder(interval=60.0)
+    alice, bob = uuid.uuid4(), uuid.uuid4()
+    first.increment("test_metric", amount=2, at=AT)
+    first.increment("test_metric", amount=3, at=AT)
+    first.increment("test_metric", "red", at=AT)
+    first.mark_active(alice, at=AT)
+    first.mark_active(alice, at=AT)
+    first.mark_active(bob, at=AT)
+    await first.flush()
+    # Another worker seeing the same user in the same bucket does not count it twice
+    second.mark_active(alice, at=AT)
+    second.increment("test_metric", at=AT.replace(hour=11))
+    await second.flush()
+
+    async with AsyncSessionLocal() as db:
+        hourly = await get_series(db, "hour", datetime(2020, 1, 1), datetime(2020, 1, 2))
+        daily = await get_series(db, "day", datetime(2020, 1, 1), datetime(2020, 1, 2))
+    assert hourly["test_metric"] == [
+        {"bucket": datetime(2020, 1, 1, 10), "value": 5},
+        {"bucket": datetime(2020, 1, 1, 11), "value": 1},
+    ]
+    assert hourly["test_metric:red"] == [{"bucket": datetime(2020, 1, 1, 10), "value": 1}]
+    assert hourly[ACTIVE_USERS] == [{"bucket": datetime(2020, 1, 1, 10), "value": 2}]
+    assert daily["test_metric"] == [{"bucket": datetime(2020, 1, 1), "value": 6}]
+    assert daily[ACTIVE_USERS] == [{"bucket": datetime(2020, 1, 1), "value": 2}]
+
+
+async def test_totals_follow_registrations(client):
+    await rollups.flush()
+    async with AsyncSessionLocal() as db:
+        before = (await get_totals(db)).get(USERS_TOTAL, 0)
+    await client.post("/api/v1/auth/register", json={
+        "email": f"new-{uuid.uuid4().hex[:12]}@example.com", "full_name": "New", "password": "password123",
+    })
+    await rollups.flush()
+    async with AsyncSessionLocal() as db:
+        assert (await get_totals(db))[USERS_TOTAL] == before + 1
+
+
+async def test_analytics_accepts_timezone_aware_ranges(client, admin_headers):
+    recorder = RollupRecorder(interval=60.0)
+    recorder.increment("test_tz", at=AT)
+    await recorder.flush()
+
+    async def series(start, end):
+        response = await client.get("/api/v1/admin/analytics", params={
+            "granularity": "hour", "start": start, "end": end,
+        }, headers=admin_headers)
+        assert response.status_code == 200, response.text
+        return response.json()["series"].get("test_tz", [])
+
+    # 13:00+02:00 is 11:00 UTC, so the 10:00 bucket is in range; 12:00+02:00 excludes it
+    assert [point["value"] for point in await series("2020-01-01T00:00:00Z", "2020-01-01T13:00:00+02:00")] == [1]
+    assert await series("2020-01-01T00:00:00Z", "2020-01-01T12:00:00+02:00") == []
+
+
+async def test_analytics_rejects_bad_ranges(client, admin_headers, auth_headers):
+    response = await client.get("/api/v1/admin/analytics", params={
+        "start": "2020-01-02T00:00:00Z", "end": "2020-01-01T00:00:00Z",
+    }, headers=admin_headers)
+    assert response.status_code == 400
+    response = await client.get("/api/v1/admin/analytics", params={
+        "granularity": "hour", "start": "2020-01-01T00:00:00Z", "end": "2020-06-01T00:00:00Z",
+    }, headers=admin_headers)
+    assert response.status_code == 400
+    response = await client.get("/api/v1/admin/analytics", headers=auth_headers)
+    assert response.status_code == 403
@@ -0,0 +1,147 @@
+"""Streamed uploads, content-addressed blobs and the sweeper."""
+import hashlib
+import os
+import time
+import uuid
+from sqlalchemy import func, select
+from config import settings
+from database import AsyncSessionLocal
+from models import AttachmentBlob
+from services.attachments import CHUNK_SIZE, STALE_UPLOAD_SECONDS, BlobStore, BlobSweeper, blob_store
+
+
+async def create_task(client, headers):
+    response = await client.post("/api/v1/tasks", json={"title": "With files"}, headers=headers)
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+async def upload(client, headers, task_id, content, filename="report.pdf"):
+    return await client.post(
+        f"/api/v1/tasks/{task_id}/attachments", params={"filename": filename}, content=content, headers=headers,
+    )
+
+
+async def ref_count(sha256):
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(select(AttachmentBlob.ref_count).where(AttachmentBlob.sha256 == sha256))
+
+
+def temp_files():
+    try:
+        return set(os.listdir(blob_store.temp_dir))
+    except FileNotFoundError:
+        return set()
+
+
+async def test_upload_is_stored_by_content(client, auth_headers):
+    task_id = await create_task(client, auth_headers)
+    # Several chunks, so the body reaches the disk in more than one write
+    content = os.urandom(2 * CHUNK_SIZE + 123)
+    sha256 = hashlib.sha256(content).hexdigest()
+
+    response = await upload(client, auth_headers, task_id, content)
+    assert response.status_code == 201, response.text
+    assert response.json()["file_size"] == len(content)
+    with open(blob_store.path(sha256), "rb") as stored:
+        assert stored.read() == content
+
+    download = await client.get(f"/api/v1/tasks/{task_id}/attachments/{response.json()['id']}", headers=auth_headers)
+    assert download.status_code == 200
+    assert download.content == content
+
+
+async def test_short_writes_are_completed(tmp_path, monkeypatch):
+    real_write = os.write
+    # Like a write interrupted by a signal: only part of the data goes out per call
+    monkeypatch.setattr(os, "write", lambda fd, data: real_write(fd, bytes(data[:1000])))
+    content = os.urandom(CHUNK_SIZE + 4321)
+
+    async def chunks():
+        yield content[:CHUNK_SIZE]
+        yield content[CHUNK_SIZE:]
+
+    staged = await BlobStore(str(tmp_path)).receive(chunks(), max_size=len(content))
+    monkeypatch.undo()
+    assert staged.size == len(content)
+    assert staged.sha256 == hashlib.sha256(content).hexdigest()
+    with open(staged.temp_path, "rb") as written:
+        assert written.read() == content
+
+
+async def test_identical_uploads_share_one_blob(client, auth_headers):
+    first_task, second_task = await create_task(client, auth_headers), await create_task(client, auth_headers)
+    content = f"shared {uuid.uuid4()}".encode()
+    sha256 = hashlib.sha256(content).hexdigest()
+
+    first = await upload(client, auth_headers, first_task, content)
+    second = await upload(client, auth_headers, second_task, content, filename="copy.pdf")
+    assert first.status_code == second.status_code == 201
+    assert await ref_count(sha256) == 2
+
+    response = await client.delete(f"/api/v1/tasks/{first_task}/attachments/{first.json()['id']}", headers=auth_headers)
+    assert response.status_code == 204
+    assert await ref_count(sha256) == 1
+    # Deleting the task releases its attachments too
+    assert (await client.delete(f"/api/v1/tasks/{second_task}", headers=auth_headers)).status_code == 204
+    assert await ref_count(sha256) == 0
+    # The file stays until the sweeper runs
+    assert os.path.exists(blob_store.path(sha256))
+
+
+async def test_sweeper_removes_unreferenced_blobs_and_stale_uploads(client, auth_headers):
+    task_id = await create_task(client, auth_headers)
+    kept, dropped = (f"{name} {uuid.uuid4()}".encode() for name in ("kept", "dropped"))
+    await upload(client, auth_headers, task_id, kept)
+    response = await upload(client, auth_headers, task_id, dropped)
+    await client.delete(f"/api/v1/tasks/{task_id}/attachments/{response.json()['id']}", headers=auth_headers)
+
+    os.makedirs(blob_store.temp_dir, exist_ok=True)
+    stale, fresh = (os.path.join(blob_store.temp_dir, f"{uuid.uuid4().hex}.upload") for _ in range(2))
+    for path in (stale, fresh):
+        open(path, "wb").close()
+    long_ago = time.time() - STALE_UPLOAD_SECONDS - 60
+    os.utime(stale, (long_ago, long_ago))
+
+    sweeper = BlobSweeper(blob_store, interval=60)
+    await sweeper.flush()
+
+    kept_sha256, dropped_sha256 = (hashlib.sha256(content).hexdigest() for content in (kept, dropped))
+    assert sweeper.removed_blobs >= 1
+    assert await ref_count(dropped_sha256) is None
+    assert not os.path.exists(blob_store.path(dropped_sha256))
+    assert await ref_count(kept_sha256) == 1
+    assert os.path.exists(blob_store.path(kept_sha256))
+    assert not os.path.exists(stale)
+    assert os.path.exists(fresh)
+    os.unlink(fresh)
+
+
+async def test_upload_cut_off_past_the_size_limit(client, auth_headers, monkeypatch):
+    task_id = await create_task(client, auth_headers)
+    monkeypatch.setattr(settings, "MAX_UPLOAD_SIZE", 1000)
+    async with AsyncSessionLocal() as db:
+        blobs_before = await db.scalar(select(func.count()).select_from(AttachmentBlob))
+    temp_before = temp_files()
+
+    async def body():
+        # Streamed without a Content-Length, so only the running total can catch it
+        for _ in range(5):
+            yield b"x" * 300
+
+    response = await upload(client, auth_headers, task_id, body())
+    assert response.status_code == 413
+    # A declared length over the limit is refused before reading the body
+    assert (await upload(client, auth_headers, task_id, b"x" * 1001)).status_code == 413
+
+    assert temp_files() == temp_before
+    async with AsyncSessionLocal() as db:
+        assert await db.scalar(select(func.count()).select_from(AttachmentBlob)) == blobs_before
+    response = await client.get(f"/api/v1/tasks/{task_id}/attachments", headers=auth_headers)
+    assert response.json() == []
+
+
+async def test_disallowed_extension_is_rejected(client, auth_headers):
+    task_id = await create_task(client, auth_headers)
+    response = await upload(client, auth_headers, task_id, b"#!/bin/sh", filename="run.sh")
+    assert response.status_code == 400
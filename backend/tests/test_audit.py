@@ -0,0 +1,65 @@
+"""Batched audit log writer."""
+import asyncio
+import uuid
+import pytest
+from sqlalchemy import select
+from database import AsyncSessionLocal
+from models import ActivityLog
+from services.audit import AuditWriter
+
+
+@pytest.fixture
+async def user_id(client, auth_headers):
+    return uuid.UUID((await client.get("/api/v1/auth/profile", headers=auth_headers)).json()["id"])
+
+
+async def logged(user_id):
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(ActivityLog.action, ActivityLog.task_id, ActivityLog.details).where(ActivityLog.user_id == user_id)
+        )
+        return result.all()
+
+
+@pytest.mark.parametrize("policy, kept, accepted", [
+    ("drop_oldest", ["event-2", "event-3", "event-4"], [True] * 5),
+    ("drop_new", ["event-0", "event-1", "event-2"], [True, True, True, False, False]),
+])
+async def test_overflow_policy(user_id, policy, kept, accepted):
+    writer = AuditWriter(max_queue=3, batch_size=100, interval=3600.0, overflow_policy=policy)
+    assert [writer.record(f"event-{n}", user_id) for n in range(5)] == accepted
+    assert writer.stats()["dropped"] == 2
+    assert writer.queued == 3
+
+    await writer.flush()
+    assert sorted(action for action, _, _ in await logged(user_id)) == kept
+    assert writer.stats()["written"] == 3
+
+
+def test_unknown_overflow_policy():
+    with pytest.raises(ValueError):
+        AuditWriter(max_queue=3, batch_size=1, interval=1.0, overflow_policy="block")
+
+
+async def test_stop_flushes_what_is_queued(user_id):
+    writer = AuditWriter(max_queue=100, batch_size=100, interval=3600.0)
+    writer.start()
+    writer.record("before-stop", user_id)
+    assert await logged(user_id) == []
+    await writer.stop()
+    assert [action for action, _, _ in await logged(user_id)] == ["before-stop"]
+
+
+async def test_full_batch_flushes_early(user_id):
+    writer = AuditWriter(max_queue=100, batch_size=2, interval=3600.0)
+    writer.start()
+    try:
+        writer.record("one", user_id)
+        writer.record("two", user_id)
+        for _ in range(100):
+            if writer.written == 2:
+                break
+            await asyncio.sleep(0.01)
+        assert writer.written == 2
+    finally:
+        await writer.stop()
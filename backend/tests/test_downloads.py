@@ -0,0 +1,125 @@
+"""Conditional and range requests for attachment downloads."""
+from datetime import datetime, timedelta
+import pytest
+from services.downloads import ByteRange, RangeNotSatisfiable, http_date, is_not_modified, requested_range
+
+ETAG = '"abc123"'
+MODIFIED = datetime(2026, 5, 4, 3, 2, 1, 500000)
+SIZE = 1000
+
+
+def byte_range(**headers):
+    return requested_range(headers, SIZE, ETAG, MODIFIED)
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", ByteRange(0, 99)),
+    ("bytes=900-", ByteRange(900, 999)),
+    ("bytes=900-5000", ByteRange(900, 999)),
+    ("bytes=-100", ByteRange(900, 999)),
+    ("bytes=-5000", ByteRange(0, 999)),
+    ("bytes=999-999", ByteRange(999, 999)),
+    (" Bytes = 10-19", ByteRange(10, 19)),
+])
+def test_single_range(header, expected):
+    assert byte_range(range=header) == expected
+
+
+@pytest.mark.parametrize("header", [
+    "bytes=0-9,20-29",   # several ranges: the whole file
+    "items=0-9",
+    "bytes=10-5",
+    "bytes=abc-",
+    "bytes=10",
+    "bytes=-",
+])
+def test_ignored_range(header):
+    assert byte_range(range=header) is None
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=5000-6000", "bytes=-0"])
+def test_unsatisfiable_range(header):
+    with pytest.raises(RangeNotSatisfiable):
+        byte_range(range=header)
+
+
+def test_no_range():
+    assert byte_range() is None
+    assert byte_range(**{"if-range": ETAG}) is None
+
+
+def test_empty_file_range_is_unsatisfiable():
+    with pytest.raises(RangeNotSatisfiable):
+        requested_range({"range": "bytes=-10"}, 0, ETAG, MODIFIED)
+    with pytest.raises(RangeNotSatisfiable):
+        requested_range({"range": "bytes=0-"}, 0, ETAG, MODIFIED)
+
+
+@pytest.mark.parametrize("if_range, honoured", [
+    (ETAG, True),
+    ('"other"', False),
+    (f"W/{ETAG}", False),          # weak validators never match If-Range
+    (http_date(MODIFIED), True),
+    (http_date(MODIFIED - timedelta(seconds=1)), False),
+    ("not a date", False),
+])
+def test_if_range(if_range, honoured):
+    expected = ByteRange(0, 9) if honoured else None
+    assert byte_range(range="bytes=0-9", **{"if-range": if_range}) == expected
+
+
+@pytest.mark.parametrize("headers, not_modified", [
+    ({}, False),
+    ({"if-none-match": ETAG}, True),
+    ({"if-none-match": f'"x", W/{ETAG}'}, True),
+    ({"if-none-match": "*"}, True),
+    ({"if-none-match": '"x"'}, False),
+    ({"if-modified-since": http_date(MODIFIED)}, True),
+    ({"if-modified-since": http_date(MODIFIED + timedelta(days=1))}, True),
+    ({"if-modified-since": http_date(MODIFIED - timedelta(seconds=1))}, False),
+    ({"if-modified-since": "garbage"}, False),
+    # If-None-Match wins over If-Modified-Since
+    ({"if-none-match": '"x"', "if-modified-since": http_date(MODIFIED)}, False),
+])
+def test_is_not_modified(headers, not_modified):
+    assert is_not_modified(headers, ETAG, MODIFIED) is not_modified
+
+
+async def test_download_ranges(client, auth_headers):
+    task = (await client.post("/api/v1/tasks", json={"title": "With file"}, headers=auth_headers)).json()
+    content = bytes(range(256)) * 8
+    response = await client.post(
+        f"/api/v1/tasks/{task['id']}/attachments",
+        params={"filename": "data.pdf"},
+        content=content,
+        headers={**auth_headers, "Content-Type": "application/pdf"},
+    )
+    assert response.status_code == 201, response.text
+    url = f"/api/v1/tasks/{task['id']}/attachments/{response.json()['id']}"
+
+    response = await client.get(url, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.content == content
+    assert response.headers["accept-ranges"] == "bytes"
+    etag = response.headers["etag"]
+
+    response = await client.get(url, headers={**auth_headers, "Range": "bytes=100-199"})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes 100-199/{len(content)}"
+    assert response.content == content[100:200]
+
+    response = await client.get(url, headers={**auth_headers, "Range": "bytes=-10", "If-Range": etag})
+    assert response.status_code == 206
+    assert response.content == content[-10:]
+
+    response = await client.get(url, headers={**auth_headers, "Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert response.status_code == 200
+    assert response.content == content
+
+    response = await client.get(url, headers={**auth_headers, "Range": f"bytes={len(content)}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(content)}"
+
+    response = await client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
@@ -0,0 +1,165 @@
+"""Live task events: fan-out, resuming with Last-Event-ID and resets."""
+import asyncio
+import uuid
+import orjson
+from database import async_engine
+from services.events import TASK_CREATED, TaskEventBroker
+
+USER = uuid.uuid4()
+OTHER_USER = uuid.uuid4()
+
+
+def make_broker(buffer_size=10, replay_size=10):
+    return TaskEventBroker(async_engine, "task_events", heartbeat=60, buffer_size=buffer_size, replay_size=replay_size)
+
+
+def publish(broker, user_id, title):
+    broker.publish(TASK_CREATED, user_id, {"title": title})
+    return broker.latest_id
+
+
+def titles(events):
+    return [orjson.loads(event.data)["title"] for event in events]
+
+
+class EventStream:
+    """An SSE response driven by hand: ``httpx`` would wait for the endless body to end."""
+
+    def __init__(self, app, path, headers):
+        self.scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+            "headers": [(b"host", b"test")] + [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+            "client": ("127.0.0.1", 40000), "server": ("test", 80),
+        }
+        self.app = app
+        self.messages = asyncio.Queue()
+        self.disconnected = asyncio.Event()
+        self.requested = False
+        self.task = None
+
+    async def receive(self):
+        if not self.requested:
+            self.requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await self.disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def open(self):
+        self.task = asyncio.create_task(self.app(self.scope, self.receive, self.messages.put))
+        start = await asyncio.wait_for(self.messages.get(), 5)
+        assert start["status"] == 200
+        assert await self.read() == [{"retry": "3000"}]
+        return self
+
+    async def read(self):
+        """The next batch of frames, as dicts of their fields."""
+        message = await asyncio.wait_for(self.messages.get(), 5)
+        frames = [frame for frame in message["body"].decode().split("\n\n") if frame]
+        return [dict(line.split(": ", 1) for line in frame.split("\n")) for frame in frames]
+
+    async def close(self):
+        self.disconnected.set()
+        await asyncio.wait_for(self.task, 5)
+
+
+def test_events_go_to_their_users_connections():
+    broker = make_broker()
+    first, second, other = broker.subscribe(str(USER)), broker.subscribe(str(USER)), broker.subscribe(str(OTHER_USER))
+    publish(broker, USER, "Mine")
+
+    assert titles(first.take()[0]) == titles(second.take()[0]) == ["Mine"]
+    assert other.take() == ([], False, False)
+    broker.unsubscribe(second)
+    assert broker.connections == 2
+
+
+def test_resume_after_last_event_id():
+    broker = make_broker()
+    seen = publish(broker, USER, "Seen")
+    publish(broker, USER, "Missed")
+    publish(broker, OTHER_USER, "Someone else's")
+    publish(broker, USER, "Also missed")
+
+    events, reset, _ = broker.subscribe(str(USER), last_event_id=seen).take()
+    assert not reset
+    assert titles(events) == ["Missed", "Also missed"]
+    # Up to date: nothing to replay
+    assert broker.subscribe(str(USER), last_event_id=broker.latest_id).take() == ([], False, False)
+
+
+def test_unknown_or_expired_last_event_id_resets():
+    broker = make_broker(replay_size=2)
+    expired = publish(broker, USER, "Old")
+    publish(broker, USER, "Newer")
+    publish(broker, USER, "Newest")
+
+    assert broker.subscribe(str(USER), last_event_id=expired).take() == ([], True, False)
+    assert broker.subscribe(str(USER), last_event_id="unknown").take() == ([], True, False)
+    assert broker.resets == 2
+
+
+def test_resume_that_would_overflow_the_buffer_resets():
+    broker = make_broker(buffer_size=2)
+    seen = publish(broker, USER, "Seen")
+    for title in ("One", "Two", "Three"):
+        publish(broker, USER, title)
+    assert broker.subscribe(str(USER), last_event_id=seen).take() == ([], True, False)
+
+
+def test_slow_connection_is_dropped():
+    broker = make_broker(buffer_size=2)
+    subscription = broker.subscribe(str(USER))
+    for title in ("One", "Two", "Three"):
+        publish(broker, USER, title)
+    assert subscription.closed
+    assert broker.dropped_connections == 1
+    # A closed connection gets nothing more
+    publish(broker, USER, "Four")
+    assert broker.dropped_connections == 1
+
+
+def test_resync_resets_live_connections():
+    broker = make_broker()
+    subscription = broker.subscribe(str(USER))
+    seen = publish(broker, USER, "Before")
+    broker.resync()
+
+    assert subscription.take() == ([], True, False)
+    # The replay history is gone with it
+    assert broker.subscribe(str(USER), last_event_id=seen).take() == ([], True, False)
+
+
+async def test_event_stream_resumes_with_last_event_id(client, auth_headers):
+    from main import app
+    stream = await EventStream(app, "/api/v1/tasks/events", auth_headers).open()
+    try:
+        response = await client.post("/api/v1/tasks", json={"title": "Streamed"}, headers=auth_headers)
+        assert response.status_code == 201
+        [frame] = await stream.read()
+    finally:
+        await stream.close()
+    assert frame["event"] == "task.created"
+    assert orjson.loads(frame["data"])["id"] == response.json()["id"]
+
+    # Changes made while disconnected are replayed on reconnect
+    await client.post("/api/v1/tasks", json={"title": "While away"}, headers=auth_headers)
+    stream = await EventStream(app, "/api/v1/tasks/events", {**auth_headers, "Last-Event-ID": frame["id"]}).open()
+    try:
+        [missed] = await stream.read()
+    finally:
+        await stream.close()
+    assert missed["event"] == "task.created"
+    assert orjson.loads(missed["data"])["title"] == "While away"
+
+
+async def test_event_stream_sends_reset_for_unknown_id(client, auth_headers):
+    from main import app
+    from services.events import task_events
+    headers = {**auth_headers, "Last-Event-ID": "no-longer-known"}
+    stream = await EventStream(app, "/api/v1/tasks/events", headers).open()
+    try:
+        [reset] = await stream.read()
+    finally:
+        await stream.close()
+    assert reset == {"id": task_events.latest_id or "", "event": "reset", "data": "{}"}
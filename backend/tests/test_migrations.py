@@ -0,0 +1,98 @@
+"""Migrations: adopting a database created before Alembic, and round trips."""
+import sqlite3
+import uuid
+import pytest
+from alembic import command
+from alembic.script import ScriptDirectory
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from database.migrations import BASELINE_REVISION, alembic_config, upgrade_database
+from services.task_stats import get_task_stats
+
+USER_ID = uuid.uuid4()
+TASKS = [
+    ("Write report", "TODO", "HIGH", "work"),
+    ("Water plants", "DONE", "LOW", None),
+    ("Review report", "DONE", "MEDIUM", "work"),
+]
+
+
+@pytest.fixture
+def baseline_db(tmp_path):
+    """A database shaped like the old ``create_all`` output, with data and no ``alembic_version``."""
+    path = tmp_path / "baseline.db"
+    url = f"sqlite:///{path}"
+    upgrade_database(BASELINE_REVISION, url)
+    with sqlite3.connect(path) as connection:
+        connection.execute("DROP TABLE alembic_version")
+        connection.execute(
+            "INSERT INTO users VALUES (?, 'old@example.com', 'hash', 'Old User', 'USER', 1, '2025-01-01', '2025-01-01')",
+            (USER_ID.hex,),
+        )
+        for day, (title, status, priority, category) in enumerate(TASKS, start=1):
+            connection.execute(
+                "INSERT INTO tasks (id, user_id, title, priority, status, category, tags, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, '[]', ?, ?)",
+                (uuid.uuid4().hex, USER_ID.hex, title, priority, status, category, f"2025-01-0{day}", f"2025-01-0{day}"),
+            )
+    connection.close()
+    return path, url
+
+
+def head_revision(url):
+    return ScriptDirectory.from_config(alembic_config(url)).get_current_head()
+
+
+def test_baseline_database_is_adopted(baseline_db):
+    path, url = baseline_db
+    upgrade_database(url=url)
+
+    with sqlite3.connect(path) as connection:
+        assert connection.execute("SELECT version_num FROM alembic_version").fetchall() == [(head_revision(url),)]
+        assert connection.execute("SELECT count(*) FROM tasks").fetchone() == (3,)
+        # Existing tasks are searchable
+        assert connection.execute("SELECT count(*) FROM tasks_fts WHERE tasks_fts MATCH 'report'").fetchone() == (2,)
+        # Running totals start from the existing rows
+        totals = dict(connection.execute("SELECT metric, value FROM analytics_rollups WHERE granularity = 'total'"))
+    connection.close()
+    assert totals == {"users_total": 1, "users_active": 1, "tasks_total": 3}
+    # The schema matches the models
+    command.check(alembic_config(url))
+
+
+async def test_baseline_task_stats_are_backfilled(baseline_db):
+    path, url = baseline_db
+    upgrade_database(url=url)
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    try:
+        async with AsyncSession(engine) as db:
+            stats = await get_task_stats(db, USER_ID)
+    finally:
+        await engine.dispose()
+    assert stats["total"] == 3
+    assert stats["by_status"] == {"todo": 1, "in_progress": 0, "done": 2}
+    assert stats["by_priority"] == {"low": 1, "medium": 1, "high": 1, "critical": 0}
+    assert stats["by_category"] == {"work": 2}
+
+
+def test_downgrade_and_upgrade_again(tmp_path):
+    url = f"sqlite:///{tmp_path / 'roundtrip.db'}"
+    config = alembic_config(url)
+    upgrade_database(url=url)
+    command.downgrade(config, "base")
+    with sqlite3.connect(tmp_path / "roundtrip.db") as connection:
+        tables = {name for name, in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    connection.close()
+    assert tables == {"alembic_version"}
+    command.upgrade(config, "head")
+    command.check(config)
+
+
+def test_postgresql_offline_sql_renders(capsys):
+    # ``alembic upgrade head --sql``: every data migration must render without a connection
+    url = "postgresql://localhost/task_manager"
+    command.upgrade(alembic_config(url), "head", sql=True)
+    sql = capsys.readouterr().out
+    assert "INSERT INTO task_stat_counters" in sql
+    assert "INSERT INTO analytics_rollups" in sql
+    assert f"UPDATE alembic_version SET version_num='{head_revision(url)}'" in sql
@@ -0,0 +1,60 @@
+"""Keyset pagination: cursor encoding and walking task pages."""
+import uuid
+from datetime import datetime
+import pytest
+from database.pagination import InvalidCursorError, decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2026, 3, 1, 12, 30, 15, 123456)
+    row_id = uuid.uuid4()
+    assert decode_cursor(encode_cursor(created_at, row_id)) == (created_at, row_id)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", "bm90IGpzb24", "WyJ4IiwieSJd", "WzEsMl0"])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor)
+
+
+async def test_cursor_pages_cover_every_task_once(client, auth_headers):
+    created = []
+    for n in range(7):
+        response = await client.post("/api/v1/tasks", json={"title": f"Task {n}"}, headers=auth_headers)
+        assert response.status_code == 201
+        created.append(response.json()["id"])
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"pagination": "cursor", "page_size": 3}
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get("/api/v1/tasks", params=params, headers=auth_headers)
+        assert response.status_code == 200
+        page = response.json()
+        seen.extend(task["id"] for task in page["tasks"])
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert pages == 3
+    # Newest first, each task exactly once
+    assert seen == created[::-1]
+
+
+async def test_cursor_page_total_on_request(client, auth_headers):
+    for n in range(2):
+        await client.post("/api/v1/tasks", json={"title": f"Task {n}"}, headers=auth_headers)
+
+    response = await client.get("/api/v1/tasks", params={"pagination": "cursor"}, headers=auth_headers)
+    assert response.json()["total"] is None
+    response = await client.get(
+        "/api/v1/tasks", params={"pagination": "cursor", "include_total": True}, headers=auth_headers
+    )
+    assert response.json()["total"] == 2
+
+
+async def test_invalid_cursor_is_a_bad_request(client, auth_headers):
+    response = await client.get("/api/v1/tasks", params={"cursor": "garbage"}, headers=auth_headers)
+    assert response.status_code == 400
@@ -0,0 +1,36 @@
+"""bcrypt in a bounded process pool."""
+import asyncio
+import pytest
+from auth.password import PasswordHasher, PasswordHasherBusy, password_hasher
+
+
+@pytest.fixture
+def hasher():
+    hasher = PasswordHasher(workers=1, max_queue=1)
+    yield hasher
+    hasher.shutdown()
+
+
+async def test_hash_and_verify(hasher):
+    hashed = await hasher.hash("correct horse")
+    assert await hasher.verify("correct horse", hashed)
+    assert not await hasher.verify("wrong horse", hashed)
+    assert hasher.stats()["completed"] == 3
+
+
+async def test_rejects_beyond_the_queue(hasher):
+    # One running, one waiting, the third is turned away
+    results = await asyncio.gather(*(hasher.hash(f"password-{n}") for n in range(3)), return_exceptions=True)
+    assert [type(result) for result in results] == [str, str, PasswordHasherBusy]
+    assert hasher.stats()["rejected"] == 1
+
+
+async def test_registration_answers_503_when_the_hasher_is_saturated(client, monkeypatch):
+    # Every worker busy and the queue full
+    monkeypatch.setattr(password_hasher, "_semaphore", asyncio.Semaphore(0))
+    monkeypatch.setattr(password_hasher, "max_queue", 0)
+    response = await client.post(
+        "/api/v1/auth/register", json={"email": "busy@example.com", "full_name": "Busy", "password": "password123"}
+    )
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
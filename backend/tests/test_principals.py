@@ -0,0 +1,63 @@
+"""Cached principals and their invalidation."""
+import uuid
+from sqlalchemy import update
+from database import AsyncSessionLocal
+from models import User, UserRole
+from auth.principals import Principal, PrincipalCache, bump_principal_version, principal_cache
+
+
+def principal(n=0):
+    return Principal(uuid.uuid4(), f"user{n}@example.com", UserRole.USER, True)
+
+
+def test_entries_loaded_under_an_old_version_are_ignored():
+    cache = PrincipalCache(ttl=60, max_entries=10, poll_interval=1)
+    alice = principal()
+    cache.put(alice, 0)
+    assert cache.get(alice.id) is alice
+    cache.version = 1
+    assert cache.get(alice.id) is None
+    # Loaded before the version moved: never cached as current
+    cache.put(alice, 0)
+    assert len(cache) == 0
+
+
+def test_ttl_and_lru_bound(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("auth.principals.time.monotonic", lambda: now[0])
+    cache = PrincipalCache(ttl=60, max_entries=2, poll_interval=1)
+    first, second, third = principal(1), principal(2), principal(3)
+    cache.put(first, 0)
+    cache.put(second, 0)
+    cache.get(first.id)
+    cache.put(third, 0)
+    assert cache.get(second.id) is None
+    assert cache.get(first.id) is first
+    now[0] += 61
+    assert cache.get(first.id) is None
+    assert cache.stats()["hits"] == 2
+
+
+async def test_deactivation_by_another_worker_applies_after_a_poll(client, auth_headers):
+    response = await client.get("/api/v1/auth/profile", headers=auth_headers)
+    user_id = uuid.UUID(response.json()["id"])
+    assert principal_cache.get(user_id) is not None
+
+    # Another worker deactivates the user: it bumps the version but cannot touch this cache
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(User).where(User.id == user_id).values(is_active=False))
+        await bump_principal_version(db)
+        await db.commit()
+    assert (await client.get("/api/v1/tasks", headers=auth_headers)).status_code == 200
+
+    await principal_cache.poll()
+    assert (await client.get("/api/v1/tasks", headers=auth_headers)).status_code == 403
+
+
+async def test_admin_deactivation_applies_at_once(client, auth_headers, admin_headers):
+    user_id = (await client.get("/api/v1/auth/profile", headers=auth_headers)).json()["id"]
+    response = await client.patch(
+        f"/api/v1/admin/users/{user_id}/status", json={"is_active": False}, headers=admin_headers
+    )
+    assert response.status_code == 200
+    assert (await client.get("/api/v1/tasks", headers=auth_headers)).status_code == 403
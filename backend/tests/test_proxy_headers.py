@@ -0,0 +1,41 @@
+"""Client address and scheme from a trusted reverse proxy."""
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from middleware import ProxyHeadersMiddleware
+
+
+async def echo(request: Request):
+    return JSONResponse({"client": request.client.host, "scheme": request.url.scheme})
+
+
+async def call(trusted_proxies, peer, headers):
+    app = ProxyHeadersMiddleware(Starlette(routes=[Route("/", echo)]), trusted_proxies=trusted_proxies)
+    transport = httpx.ASGITransport(app=app, client=(peer, 40000))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return (await client.get("/", headers=headers)).json()
+
+
+@pytest.mark.parametrize("peer, forwarded_for, expected", [
+    ("172.28.0.10", "203.0.113.7", "203.0.113.7"),
+    # Only the right-most untrusted hop counts; the rest is client-supplied
+    ("172.28.0.10", "198.51.100.1, 203.0.113.7", "203.0.113.7"),
+    ("172.28.0.10", "203.0.113.7, 172.28.0.11", "203.0.113.7"),
+    ("172.28.0.10", "172.28.0.12, 172.28.0.11", "172.28.0.12"),
+    # Untrusted peers cannot spoof their address
+    ("203.0.113.9", "198.51.100.1", "203.0.113.9"),
+])
+async def test_client_address(peer, forwarded_for, expected):
+    result = await call(["172.28.0.0/16"], peer, {"X-Forwarded-For": forwarded_for})
+    assert result["client"] == expected
+
+
+async def test_scheme():
+    assert await call(["172.28.0.10"], "172.28.0.10", {"X-Forwarded-Proto": "https"}) == {
+        "client": "172.28.0.10", "scheme": "https",
+    }
+    assert (await call(["172.28.0.10"], "203.0.113.9", {"X-Forwarded-Proto": "https"}))["scheme"] == "http"
+    assert (await call(["172.28.0.10"], "172.28.0.10", {"X-Forwarded-Proto": "gopher"}))["scheme"] == "http"
@@ -0,0 +1,36 @@
+"""Query plans: every route query on the migrated schema must use an index.
+
+The same cases as ``python -m database.plan_check``, one test each, against
+a seeded database brought to head by the migrations.
+"""
+import uuid
+import pytest
+from sqlalchemy import create_engine, select
+from database.migrations import upgrade_database
+from database.plan_check import find_seq_scans, get_plan_cases, seed
+from models import Task
+
+CASES = sorted(get_plan_cases("sqlite", uuid.uuid4(), uuid.uuid4()))
+
+
+@pytest.fixture(scope="module")
+def seeded(tmp_path_factory):
+    url = f"sqlite:///{tmp_path_factory.mktemp('plans') / 'plans.db'}"
+    upgrade_database(url=url)
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        with conn.begin():
+            user_id, task_id = seed(conn)
+        yield conn, get_plan_cases(conn.dialect.name, user_id, task_id)
+    engine.dispose()
+
+
+@pytest.mark.parametrize("name", CASES)
+def test_query_uses_an_index(seeded, name):
+    conn, cases = seeded
+    assert find_seq_scans(conn, cases[name]()) == []
+
+
+def test_full_scans_are_detected(seeded):
+    conn, _ = seeded
+    assert find_seq_scans(conn, select(Task.id).where(Task.title == "Task 1")) == ["tasks"]
@@ -0,0 +1,118 @@
+"""GCRA rate limiting: rate parsing, both backends and the 429 response."""
+import pytest
+from fastapi import HTTPException
+from services.ratelimit import MemoryRateLimitBackend, RateLimitBackend, RateLimiter, SQLiteRateLimitBackend, parse_rate
+
+NOW = 1_700_000_000.0
+# 10/minute: one request every 6 seconds, with a burst of 10
+INTERVAL, TOLERANCE = 6.0, 54.0
+
+
+@pytest.mark.parametrize("rate, expected", [
+    ("10/minute", (10, 60)),
+    ("20/hours", (20, 3600)),
+    ("5 / second", (5, 1)),
+    ("1000/day", (1000, 86400)),
+])
+def test_parse_rate(rate, expected):
+    assert parse_rate(rate) == expected
+
+
+@pytest.mark.parametrize("rate", ["10", "ten/minute", "10/fortnight", ""])
+def test_parse_rate_rejects_garbage(rate):
+    with pytest.raises(ValueError):
+        parse_rate(rate)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        backend = MemoryRateLimitBackend(max_keys=100)
+    else:
+        backend = SQLiteRateLimitBackend(str(tmp_path / "ratelimit.sqlite3"))
+    yield backend
+    backend.close()
+
+
+async def test_burst_then_limited(backend):
+    for _ in range(10):
+        assert await backend.hit("login:ip:1.2.3.4", NOW, INTERVAL, TOLERANCE) == 0
+    assert await backend.hit("login:ip:1.2.3.4", NOW, INTERVAL, TOLERANCE) == pytest.approx(INTERVAL)
+    # A rejected request does not push the next slot further out
+    assert await backend.hit("login:ip:1.2.3.4", NOW + 1, INTERVAL, TOLERANCE) == pytest.approx(INTERVAL - 1)
+    # Other keys have their own budget
+    assert await backend.hit("login:ip:5.6.7.8", NOW, INTERVAL, TOLERANCE) == 0
+
+
+async def test_budget_refills_at_the_rate(backend):
+    for _ in range(10):
+        await backend.hit("key", NOW, INTERVAL, TOLERANCE)
+    assert await backend.hit("key", NOW + INTERVAL, INTERVAL, TOLERANCE) == 0
+    assert await backend.hit("key", NOW + INTERVAL, INTERVAL, TOLERANCE) > 0
+    # Idle for the whole period: the full burst is back
+    later = NOW + 120
+    for _ in range(10):
+        assert await backend.hit("key", later, INTERVAL, TOLERANCE) == 0
+    assert await backend.hit("key", later, INTERVAL, TOLERANCE) > 0
+
+
+async def test_sqlite_backend_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "ratelimit.sqlite3")
+    first, second = SQLiteRateLimitBackend(path), SQLiteRateLimitBackend(path)
+    try:
+        for _ in range(5):
+            assert await first.hit("key", NOW, INTERVAL, 4 * INTERVAL) == 0
+        assert await second.hit("key", NOW, INTERVAL, 4 * INTERVAL) > 0
+    finally:
+        first.close()
+        second.close()
+
+
+async def test_memory_backend_is_bounded():
+    backend = MemoryRateLimitBackend(max_keys=3)
+    for n in range(10):
+        await backend.hit(f"key{n}", NOW, INTERVAL, TOLERANCE)
+    assert len(backend._tats) == 3
+
+
+async def test_limiter_answers_429_with_retry_after():
+    limiter = RateLimiter(MemoryRateLimitBackend(max_keys=100), {"login": "2/minute"})
+    await limiter.check("login", "ip", "1.2.3.4")
+    await limiter.check("login", "ip", "1.2.3.4")
+    with pytest.raises(HTTPException) as exc_info:
+        await limiter.check("login", "ip", "1.2.3.4")
+    assert exc_info.value.status_code == 429
+    assert 1 <= int(exc_info.value.headers["Retry-After"]) <= 30
+    assert limiter.limited == 1
+    # Per-user and per-IP budgets are separate
+    await limiter.check("login", "user", "1.2.3.4")
+
+
+async def test_limiter_skips_unknown_clients_and_when_disabled():
+    limiter = RateLimiter(MemoryRateLimitBackend(max_keys=100), {"login": "1/minute"})
+    for _ in range(3):
+        await limiter.check("login", "ip", None)
+    disabled = RateLimiter(MemoryRateLimitBackend(max_keys=100), {"login": "1/minute"}, enabled=False)
+    for _ in range(3):
+        await disabled.check("login", "ip", "1.2.3.4")
+
+
+async def test_limiter_fails_open():
+    class BrokenBackend(RateLimitBackend):
+        async def hit(self, key, now, interval, tolerance):
+            raise OSError("disk full")
+
+    limiter = RateLimiter(BrokenBackend(), {"login": "1/minute"})
+    for _ in range(3):
+        await limiter.check("login", "ip", "1.2.3.4")
+
+
+async def test_login_budget_is_enforced_per_client(client, monkeypatch):
+    limiter = RateLimiter(MemoryRateLimitBackend(max_keys=100), {"login": "2/minute"})
+    monkeypatch.setattr("services.ratelimit.rate_limiter", limiter)
+    credentials = {"email": "nobody@example.com", "password": "wrong-password"}
+    for _ in range(2):
+        assert (await client.post("/api/v1/auth/login", json=credentials)).status_code == 401
+    response = await client.post("/api/v1/auth/login", json=credentials)
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) > 0
@@ -0,0 +1,103 @@
+"""Read replica routing, ejection and the read-your-writes cookie."""
+import httpx
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from config import settings
+from database import replicas as replica_routing
+from database.replicas import READ_YOUR_WRITES_COOKIE, ReplicaSet, get_read_db, read_your_writes_cookie, wrote_recently
+from database.session import primary_pool_options
+from middleware import ReadYourWritesMiddleware
+
+NOW = 1_700_000_000.0
+
+
+async def echo(request: Request):
+    if request.query_params.get("wrote"):
+        request.state.read_your_writes = "cookie-value"
+    return JSONResponse({})
+
+
+async def call(method, url):
+    app = ReadYourWritesMiddleware(Starlette(routes=[Route("/", echo, methods=["GET", "POST"])]), max_age=2.5, path="/api")
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app)) as client:
+        return await client.request(method, url)
+
+
+def read_request(user_key=None, cookie=None):
+    headers = [(b"cookie", f"{READ_YOUR_WRITES_COOKIE}={cookie}".encode())] if cookie else []
+    request = Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+    if user_key is not None:
+        request.state.token_payload = {"sub": user_key}
+    return request
+
+
+async def routed_to(request):
+    sessions = get_read_db(request)
+    db = await sessions.__anext__()
+    url = db.bind.url
+    await sessions.aclose()
+    return url
+
+
+def test_read_your_writes_cookie():
+    cookie = read_your_writes_cookie("user-1", now=NOW)
+    assert wrote_recently(cookie, "user-1", now=NOW)
+    assert wrote_recently(cookie, "user-1", now=NOW + settings.READ_YOUR_WRITES_SECONDS)
+    assert not wrote_recently(cookie, "user-1", now=NOW + settings.READ_YOUR_WRITES_SECONDS + 1)
+    assert not wrote_recently(cookie, "user-2", now=NOW)
+    until, _, signature = cookie.partition(".")
+    assert not wrote_recently(f"{int(until) + 3600}.{signature}", "user-1", now=NOW)
+    assert not wrote_recently("garbage", "user-1", now=NOW)
+    assert not wrote_recently(None, "user-1", now=NOW)
+
+
+async def test_read_your_writes_middleware():
+    response = await call("POST", "https://test/?wrote=1")
+    assert response.headers["set-cookie"] == (
+        f"{READ_YOUR_WRITES_COOKIE}=cookie-value; Max-Age=3; Path=/api; HttpOnly; SameSite=Lax; Secure"
+    )
+    # Writes that set nothing and reads get no cookie
+    assert "set-cookie" not in (await call("POST", "http://test/")).headers
+    assert "set-cookie" not in (await call("GET", "http://test/?wrote=1")).headers
+
+
+async def test_reads_routed_to_replicas_until_a_write(tmp_path, monkeypatch):
+    replica_urls = [f"sqlite:///{tmp_path / 'replica0.db'}", f"sqlite:///{tmp_path / 'replica1.db'}"]
+    replica_set = ReplicaSet(replica_urls, primary_pool_options, interval=60, max_lag=5)
+    monkeypatch.setattr(replica_routing, "replicas", replica_set)
+    try:
+        # Round-robin over the replicas
+        served = {(await routed_to(read_request("user-1"))).database for _ in range(4)}
+        assert served == {str(tmp_path / "replica0.db"), str(tmp_path / "replica1.db")}
+
+        # After the user's own write, and without a known user, reads go to the primary
+        cookie = read_your_writes_cookie("user-1")
+        assert (await routed_to(read_request("user-1", cookie))).database not in served
+        assert (await routed_to(read_request())).database not in served
+        # Someone else's cookie does not pin this user to the primary
+        assert (await routed_to(read_request("user-2", cookie))).database in served
+        assert replica_set.reads["primary"] == 2
+    finally:
+        await replica_set.dispose()
+
+
+async def test_unreachable_replica_is_ejected_and_restored(tmp_path, monkeypatch):
+    missing_dir = tmp_path / "missing"
+    replica_set = ReplicaSet([f"sqlite:///{missing_dir / 'replica.db'}"], primary_pool_options, interval=60, max_lag=5)
+    monkeypatch.setattr(replica_routing, "replicas", replica_set)
+    try:
+        await replica_set.flush()
+        [replica] = replica_set.replicas
+        assert not replica.healthy and replica.ejections == 1
+        assert replica_set.choose() is None
+        # Reads fall back to the primary
+        assert (await routed_to(read_request("user-1"))).database != str(missing_dir / "replica.db")
+
+        missing_dir.mkdir()
+        await replica_set.flush()
+        assert replica.healthy and replica.last_error is None
+        assert replica_set.choose() is replica
+    finally:
+        await replica_set.dispose()
@@ -0,0 +1,99 @@
+"""Token revocation: exact map, bloom filter and database fallback."""
+import uuid
+from datetime import datetime, timedelta
+import pytest
+from auth.jwt import decode_token
+from auth.revocation import BloomFilter, RevocationList
+from database import AsyncSessionLocal
+
+
+def revocation_list(exact_max=100):
+    return RevocationList(capacity=1000, error_rate=1e-6, exact_max=exact_max, poll_interval=60, rebuild_interval=3600)
+
+
+async def revoke(revocations, jti):
+    async with AsyncSessionLocal() as db:
+        await revocations.revoke(db, jti, None, datetime.utcnow() + timedelta(hours=1))
+        await db.commit()
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    keys = [uuid.uuid4().hex for _ in range(1000)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+    false_positives = sum(uuid.uuid4().hex in bloom for _ in range(10000))
+    assert false_positives < 300
+
+
+async def test_revoked_token_is_rejected_from_the_exact_map(client):
+    email = f"user-{uuid.uuid4().hex[:12]}@example.com"
+    await client.post("/api/v1/auth/register", json={"email": email, "full_name": "U", "password": "password123"})
+    tokens = (await client.post("/api/v1/auth/login", json={"email": email, "password": "password123"})).json()
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+
+    response = await client.post("/api/v1/auth/logout", json={"refresh_token": tokens["refresh_token"]}, headers=headers)
+    assert response.status_code == 200
+    response = await client.get("/api/v1/tasks", headers=headers)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Token has been revoked"
+    response = await client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 401
+
+
+async def test_revoked_token_is_rejected_through_the_bloom_filter(client, auth_headers, monkeypatch):
+    jti = decode_token(auth_headers["Authorization"].split()[1])["jti"]
+    await revoke(revocation_list(), jti)
+
+    # A worker that only knows the revocation from its table load, with the
+    # exact entry pushed out by a newer revocation
+    worker = revocation_list(exact_max=1)
+    await worker.load()
+    await revoke(worker, uuid.uuid4().hex)
+    monkeypatch.setattr("auth.rbac.revocation_list", worker)
+
+    response = await client.get("/api/v1/tasks", headers=auth_headers)
+    assert response.status_code == 401
+    assert worker.stats()["db_lookups"] == 1
+    # The confirmed hit is remembered
+    assert (await client.get("/api/v1/tasks", headers=auth_headers)).status_code == 401
+    assert worker.stats()["db_lookups"] == 1
+
+
+async def test_unrevoked_tokens_skip_the_database_once_loaded():
+    worker = revocation_list()
+    async with AsyncSessionLocal() as db:
+        # Not loaded yet: every lookup falls back to the table
+        assert not await worker.is_revoked(db, uuid.uuid4().hex)
+        assert worker.stats()["db_lookups"] == 1
+        await worker.load()
+        for _ in range(10):
+            assert not await worker.is_revoked(db, uuid.uuid4().hex)
+    assert worker.stats()["db_lookups"] == 1
+
+
+async def test_poll_picks_up_other_workers_revocations():
+    first, second = revocation_list(), revocation_list()
+    await first.load()
+    await second.load()
+    jti = uuid.uuid4().hex
+    await revoke(first, jti)
+
+    async with AsyncSessionLocal() as db:
+        assert await first.is_revoked(db, jti)
+        await second.poll()
+        assert await second.is_revoked(db, jti)
+    assert second.stats()["db_lookups"] == 0
+
+
+@pytest.mark.parametrize("expires_in, kept", [(timedelta(hours=1), True), (timedelta(hours=-1), False)])
+async def test_load_purges_expired_revocations(expires_in, kept):
+    jti = uuid.uuid4().hex
+    async with AsyncSessionLocal() as db:
+        await revocation_list().revoke(db, jti, None, datetime.utcnow() + expires_in)
+        await db.commit()
+    worker = revocation_list()
+    await worker.load()
+    async with AsyncSessionLocal() as db:
+        assert await worker.is_revoked(db, jti) is kept
@@ -0,0 +1,74 @@
+"""Task search: matching, ranking and scoping of ``GET /tasks?search=``."""
+import uuid
+import pytest
+from database.search import SQLiteTaskSearch
+
+
+async def create(client, headers, title, description=None):
+    response = await client.post("/api/v1/tasks", json={"title": title, "description": description}, headers=headers)
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+async def search(client, headers, term):
+    response = await client.get("/api/v1/tasks", params={"search": term}, headers=headers)
+    assert response.status_code == 200, response.text
+    return [task["title"] for task in response.json()["tasks"]]
+
+
+@pytest.mark.parametrize("term, expected", [
+    ("quarterly", '"quarterly"*'),
+    ("tax  report", '"tax"* "report"*'),
+    ('say "hi" OR NEAR(', '"say"* """hi"""* "OR"* "NEAR("*'),
+    ("   ", ""),
+])
+def test_match_expression_quotes_every_token(term, expected):
+    assert SQLiteTaskSearch._match_expression(term) == expected
+
+
+async def test_prefix_stem_and_substring_matches(client, auth_headers):
+    await create(client, auth_headers, "Quarterly tax report")
+    await create(client, auth_headers, "Groceries", "milk, eggs and reporting paper")
+    await create(client, auth_headers, "Unrelated")
+
+    assert await search(client, auth_headers, "quart") == ["Quarterly tax report"]
+    # Stemmed: "reports" and "reporting" both match "report"
+    assert sorted(await search(client, auth_headers, "reports")) == ["Groceries", "Quarterly tax report"]
+    # Inside a word: only the title LIKE fallback can find it
+    assert await search(client, auth_headers, "terly") == ["Quarterly tax report"]
+    assert await search(client, auth_headers, "tax report") == ["Quarterly tax report"]
+    assert await search(client, auth_headers, "nothing-like-this") == []
+    # FTS5 syntax in user input is searched for, not interpreted
+    assert await search(client, auth_headers, 'report" OR "x') == []
+
+
+async def test_title_matches_rank_first(client, auth_headers):
+    await create(client, auth_headers, "Call the plumber", "about the kitchen")
+    await create(client, auth_headers, "Kitchen", "call the plumber about the kitchen sink")
+    await create(client, auth_headers, "Weekly plan", "plumber")
+
+    assert await search(client, auth_headers, "kitchen") == ["Kitchen", "Call the plumber"]
+    assert (await search(client, auth_headers, "plumber"))[0] == "Call the plumber"
+
+
+async def test_index_follows_updates_and_deletes(client, auth_headers):
+    task_id = await create(client, auth_headers, "Draft budget")
+    await client.put(f"/api/v1/tasks/{task_id}", json={"title": "Final forecast"}, headers=auth_headers)
+    assert await search(client, auth_headers, "budget") == []
+    assert await search(client, auth_headers, "forecast") == ["Final forecast"]
+
+    await client.delete(f"/api/v1/tasks/{task_id}", headers=auth_headers)
+    assert await search(client, auth_headers, "forecast") == []
+
+
+async def test_search_is_per_user(client, auth_headers):
+    email = f"other-{uuid.uuid4().hex[:12]}@example.com"
+    await client.post("/api/v1/auth/register", json={"email": email, "full_name": "Other", "password": "password123"})
+    login = await client.post("/api/v1/auth/login", json={"email": email, "password": "password123"})
+    other_headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    await create(client, auth_headers, "Secret recipe")
+    await create(client, other_headers, "Secret plans")
+
+    assert await search(client, auth_headers, "secret") == ["Secret recipe"]
+    assert await search(client, other_headers, "secret") == ["Secret plans"]
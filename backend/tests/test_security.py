@@ -0,0 +1,106 @@
+"""Brute-force detection over streaming security events."""
+import uuid
+import pytest
+from sqlalchemy import select
+from config import settings
+from database import AsyncSessionLocal
+from models import SecurityEvent, SecurityEventSeverity
+from services.security import (
+    LOGIN_FAILED, DetectionRule, SecurityMonitor, SlidingWindowCounter, WindowedCounters, security_writer,
+)
+
+RULE = DetectionRule("brute_force_account", LOGIN_FAILED, "account", 3, SecurityEventSeverity.MEDIUM)
+
+
+class RecordingWriter:
+    def __init__(self):
+        self.events = []
+
+    def record(self, event_type, severity, user_id=None, ip_address=None, details=None):
+        self.events.append((event_type, severity))
+        return True
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("services.security.time.monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def monitor():
+    return SecurityMonitor(RecordingWriter(), rules=(RULE,), window_seconds=300, slots=10, critical_multiplier=5)
+
+
+def alerts(monitor):
+    return [severity for event_type, severity in monitor.writer.events if event_type == RULE.event_type]
+
+
+def test_alerts_at_threshold_then_escalates_once(clock, monitor):
+    for _ in range(2):
+        monitor.login_failed(None, "victim@example.com")
+    assert alerts(monitor) == []
+    monitor.login_failed(None, "Victim@example.com")
+    assert alerts(monitor) == [SecurityEventSeverity.MEDIUM]
+    # A sustained attack raises one alert per tier per window
+    for _ in range(11):
+        monitor.login_failed(None, "victim@example.com")
+    assert alerts(monitor) == [SecurityEventSeverity.MEDIUM]
+    monitor.login_failed(None, "victim@example.com")
+    assert alerts(monitor) == [SecurityEventSeverity.MEDIUM, SecurityEventSeverity.CRITICAL]
+    monitor.login_failed(None, "victim@example.com")
+    assert monitor.alerts == 2
+    # Every signal is recorded as well
+    assert monitor.writer.events.count((LOGIN_FAILED, SecurityEventSeverity.LOW)) == 16
+
+
+def test_old_signals_leave_the_window(clock, monitor):
+    for _ in range(2):
+        monitor.login_failed(None, "victim@example.com")
+    clock[0] += 301
+    monitor.login_failed(None, "victim@example.com")
+    assert alerts(monitor) == []
+
+
+def test_accounts_are_counted_separately(clock, monitor):
+    for n in range(6):
+        monitor.login_failed(None, f"user{n % 3}@example.com")
+    assert alerts(monitor) == []
+
+
+def test_sliding_window_counter():
+    counter = SlidingWindowCounter(slots=3)
+    assert [counter.add(slot) for slot in (0, 0, 1, 2)] == [1, 2, 3, 4]
+    # Slot 3 reuses slot 0's bucket
+    assert counter.add(3) == 3
+    assert counter.add(10) == 1
+
+
+def test_least_recently_seen_key_is_evicted():
+    counters = WindowedCounters(window_seconds=60, slots=6, max_keys=2)
+    counters.hit(("rule", "a"), 0)
+    counters.hit(("rule", "b"), 0)
+    counters.hit(("rule", "a"), 1)
+    counters.hit(("rule", "c"), 2)
+    assert len(counters) == 2 and counters.evicted == 1
+    # "b" was evicted, so it starts from scratch; "a" kept its count
+    assert counters.hit(("rule", "a"), 3)[1] == 3
+    assert counters.hit(("rule", "b"), 3)[1] == 1
+
+
+async def test_failed_logins_raise_an_alert(client):
+    email = f"target-{uuid.uuid4().hex[:12]}@example.com"
+    for _ in range(settings.SECURITY_LOGIN_FAILURES_PER_ACCOUNT):
+        response = await client.post("/api/v1/auth/login", json={"email": email, "password": "wrong-password"})
+        assert response.status_code == 401
+    await security_writer.flush()
+
+    async with AsyncSessionLocal() as db:
+        events = (await db.execute(
+            select(SecurityEvent.event_type, SecurityEvent.severity, SecurityEvent.details)
+            .where(SecurityEvent.event_type == "brute_force_account")
+        )).all()
+    assert [(severity, details["count"]) for _, severity, details in events if details["key"] == email] == [
+        (SecurityEventSeverity.MEDIUM, settings.SECURITY_LOGIN_FAILURES_PER_ACCOUNT),
+    ]
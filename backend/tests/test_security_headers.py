@@ -0,0 +1,34 @@
+"""Security headers added by the pure ASGI middleware."""
+import httpx
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+from middleware import DEFAULT_SECURITY_HEADERS, SecurityHeadersMiddleware
+
+
+async def test_every_response_carries_the_headers(client):
+    for path in ("/health", "/api/v1/tasks", "/no-such-page"):
+        response = await client.get(path)
+        for name, value in DEFAULT_SECURITY_HEADERS.items():
+            assert response.headers[name] == value, (path, name)
+
+
+async def test_headers_replace_the_applications_and_streams_pass_through():
+    async def framed(request):
+        return PlainTextResponse("hi", headers={"X-Frame-Options": "SAMEORIGIN"})
+
+    async def stream(request):
+        async def chunks():
+            for n in range(3):
+                yield f"chunk {n}\n"
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    app = SecurityHeadersMiddleware(
+        Starlette(routes=[Route("/framed", framed), Route("/stream", stream)]), headers={"X-Frame-Options": "DENY"}
+    )
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/framed")
+        assert response.headers.get_list("x-frame-options") == ["DENY"]
+        response = await client.get("/stream")
+        assert response.text == "chunk 0\nchunk 1\nchunk 2\n"
+        assert response.headers["x-frame-options"] == "DENY"
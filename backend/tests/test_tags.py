@@ -0,0 +1,51 @@
+"""Tag filters and facet counts."""
+
+
+async def create(client, headers, title, tags, category=None):
+    response = await client.post(
+        "/api/v1/tasks", json={"title": title, "tags": tags, "category": category}, headers=headers
+    )
+    assert response.status_code == 201
+
+
+async def titles(client, headers, **params):
+    response = await client.get("/api/v1/tasks", params=params, headers=headers)
+    assert response.status_code == 200, response.text
+    return sorted(task["title"] for task in response.json()["tasks"])
+
+
+async def test_filter_by_any_or_all_tags(client, auth_headers):
+    await create(client, auth_headers, "Both", ["urgent", "home"])
+    await create(client, auth_headers, "Urgent only", ["urgent"])
+    await create(client, auth_headers, "Home only", ["home"])
+    await create(client, auth_headers, "Untagged", [])
+
+    assert await titles(client, auth_headers, tags=["urgent"]) == ["Both", "Urgent only"]
+    assert await titles(client, auth_headers, tags=["urgent", "home"]) == ["Both", "Home only", "Urgent only"]
+    assert await titles(client, auth_headers, tags=["urgent", "home"], tags_match="all") == ["Both"]
+    assert await titles(client, auth_headers, tags=["missing"]) == []
+    # Cursor pages filter the same way
+    assert await titles(
+        client, auth_headers, tags=["home"], pagination="cursor"
+    ) == ["Both", "Home only"]
+
+
+async def test_invalid_tags_match_is_rejected(client, auth_headers):
+    response = await client.get("/api/v1/tasks", params={"tags": "a", "tags_match": "some"}, headers=auth_headers)
+    assert response.status_code == 422
+
+
+async def test_facet_counts(client, auth_headers):
+    await create(client, auth_headers, "One", ["urgent", "home"], "chores")
+    await create(client, auth_headers, "Two", ["urgent"], "chores")
+    await create(client, auth_headers, "Three", [], "work")
+    await create(client, auth_headers, "Four", ["home"])
+
+    response = await client.get("/api/v1/tasks/facets", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json() == {"tags": {"urgent": 2, "home": 2}, "categories": {"chores": 2, "work": 1}}
+
+
+async def test_facets_of_a_new_user_are_empty(client, auth_headers):
+    response = await client.get("/api/v1/tasks/facets", headers=auth_headers)
+    assert response.json() == {"tags": {}, "categories": {}}
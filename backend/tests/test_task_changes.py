@@ -0,0 +1,160 @@
+"""Delta sync: change cursors and ``GET /tasks/changes``."""
+import uuid
+from datetime import timedelta
+import pytest
+from database.pagination import InvalidCursorError
+from services.task_changes import TombstoneCompactor, decode_change_cursor, encode_change_cursor
+
+
+@pytest.mark.parametrize("task_id", [None, uuid.uuid4()])
+@pytest.mark.parametrize("full_sync_seq", [None, 0, 7])
+def test_change_cursor_round_trip(task_id, full_sync_seq):
+    assert decode_change_cursor(encode_change_cursor(42, task_id, full_sync_seq)) == (42, task_id, full_sync_seq)
+
+
+@pytest.mark.parametrize("cursor", [
+    "", "garbage", encode_change_cursor(1)[:-2],
+    "WyJ4IixudWxsXQ",      # ["x",null]
+    "WzEsbnVsbCwieCJd",    # [1,null,"x"]
+    "WzEsbnVsbCwxLDJd",    # [1,null,1,2]
+])
+def test_malformed_change_cursor_is_rejected(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_change_cursor(cursor)
+
+
+async def sync(client, headers, since=None, limit=100):
+    params = {"limit": limit}
+    if since is not None:
+        params["since"] = since
+    response = await client.get("/api/v1/tasks/changes", params=params, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def test_full_sync_then_deltas(client, auth_headers):
+    first = (await client.post("/api/v1/tasks", json={"title": "First"}, headers=auth_headers)).json()
+    second = (await client.post("/api/v1/tasks", json={"title": "Second"}, headers=auth_headers)).json()
+
+    changes = await sync(client, auth_headers)
+    assert [task["id"] for task in changes["tasks"]] == [first["id"], second["id"]]
+    assert changes["deleted"] == []
+    assert changes["has_more"] is False
+
+    # Nothing new: same cursor, empty page
+    unchanged = await sync(client, auth_headers, changes["cursor"])
+    assert unchanged["tasks"] == [] and unchanged["deleted"] == []
+    assert unchanged["cursor"] == changes["cursor"]
+
+    response = await client.put(f"/api/v1/tasks/{first['id']}", json={"title": "First, edited"}, headers=auth_headers)
+    assert response.status_code == 200
+    response = await client.delete(f"/api/v1/tasks/{second['id']}", headers=auth_headers)
+    assert response.status_code == 204
+
+    delta = await sync(client, auth_headers, changes["cursor"])
+    assert [task["title"] for task in delta["tasks"]] == ["First, edited"]
+    assert delta["deleted"] == [second["id"]]
+
+    # A full sync never reports deletes
+    full = await sync(client, auth_headers)
+    assert [task["id"] for task in full["tasks"]] == [first["id"]]
+    assert full["deleted"] == []
+
+
+async def test_has_more_pages_through_every_change(client, auth_headers):
+    since = (await sync(client, auth_headers))["cursor"]
+    ids = []
+    for n in range(5):
+        response = await client.post("/api/v1/tasks", json={"title": f"Task {n}"}, headers=auth_headers)
+        ids.append(response.json()["id"])
+    await client.delete(f"/api/v1/tasks/{ids[0]}", headers=auth_headers)
+
+    seen, deleted, pages = [], [], 0
+    while True:
+        page = await sync(client, auth_headers, since, limit=2)
+        seen.extend(task["id"] for task in page["tasks"])
+        deleted.extend(page["deleted"])
+        since = page["cursor"]
+        pages += 1
+        if not page["has_more"]:
+            break
+
+    # Five creates and a delete, two per page
+    assert pages == 3
+    assert seen == ids[1:]
+    assert deleted == [ids[0]]
+
+
+async def test_changes_are_per_user(client, auth_headers):
+    other = await client.post("/api/v1/auth/register", json={
+        "email": f"other-{uuid.uuid4().hex[:12]}@example.com", "full_name": "Other", "password": "password123",
+    })
+    assert other.status_code == 201
+    await client.post("/api/v1/tasks", json={"title": "Mine"}, headers=auth_headers)
+
+    changes = await sync(client, auth_headers)
+    assert [task["title"] for task in changes["tasks"]] == ["Mine"]
+
+
+async def test_invalid_cursor_is_a_bad_request(client, auth_headers):
+    response = await client.get("/api/v1/tasks/changes", params={"since": "garbage"}, headers=auth_headers)
+    assert response.status_code == 400
+
+
+async def test_compacted_cursor_is_gone(client, auth_headers):
+    task = (await client.post("/api/v1/tasks", json={"title": "Doomed"}, headers=auth_headers)).json()
+    since = (await sync(client, auth_headers))["cursor"]
+    await client.delete(f"/api/v1/tasks/{task['id']}", headers=auth_headers)
+
+    compactor = TombstoneCompactor(interval=3600.0, retention=timedelta(0))
+    await compactor.flush()
+    assert compactor.removed >= 1
+
+    response = await client.get("/api/v1/tasks/changes", params={"since": since}, headers=auth_headers)
+    assert response.status_code == 410
+    # Starting over works, and the new cursor is past the compaction point
+    changes = await sync(client, auth_headers)
+    assert changes["tasks"] == []
+    assert (await sync(client, auth_headers, changes["cursor"]))["deleted"] == []
+
+
+async def test_full_sync_pages_survive_compaction(client, auth_headers):
+    ids = [
+        (await client.post("/api/v1/tasks", json={"title": f"Task {n}"}, headers=auth_headers)).json()["id"]
+        for n in range(5)
+    ]
+    page = await sync(client, auth_headers, limit=2)
+    seen = [task["id"] for task in page["tasks"]]
+    assert page["has_more"]
+
+    # Meanwhile a task already sent is deleted, and its tombstone compacted at once
+    await client.delete(f"/api/v1/tasks/{ids[4]}", headers=auth_headers)
+    await client.delete(f"/api/v1/tasks/{ids[0]}", headers=auth_headers)
+    await TombstoneCompactor(interval=3600.0, retention=timedelta(0)).flush()
+
+    while page["has_more"]:
+        page = await sync(client, auth_headers, page["cursor"], limit=2)
+        assert page["deleted"] == []
+        seen.extend(task["id"] for task in page["tasks"])
+    assert seen == ids[:4]
+
+    # The final cursor is a plain one from where the scan started: too old for the compacted delete,
+    # so the client is told to start over instead of keeping a deleted task
+    response = await client.get("/api/v1/tasks/changes", params={"since": page["cursor"]}, headers=auth_headers)
+    assert response.status_code == 410
+
+
+async def test_changes_during_a_full_sync_reach_the_next_delta(client, auth_headers):
+    ids = [
+        (await client.post("/api/v1/tasks", json={"title": f"Task {n}"}, headers=auth_headers)).json()["id"]
+        for n in range(3)
+    ]
+    page = await sync(client, auth_headers, limit=2)
+    await client.delete(f"/api/v1/tasks/{ids[0]}", headers=auth_headers)
+    await client.put(f"/api/v1/tasks/{ids[1]}", json={"title": "Edited"}, headers=auth_headers)
+
+    while page["has_more"]:
+        page = await sync(client, auth_headers, page["cursor"], limit=2)
+    delta = await sync(client, auth_headers, page["cursor"])
+    assert delta["deleted"] == [ids[0]]
+    assert [task["title"] for task in delta["tasks"]] == ["Edited"]
@@ -0,0 +1,83 @@
+"""Per-user task statistics kept as counters."""
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from database import AsyncSessionLocal
+from models import TaskStatCounter
+from services.task_stats import diff_dimensions, rebuild_task_stats
+
+
+async def stats(client, headers):
+    response = await client.get("/api/v1/tasks/stats", headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_diff_dimensions():
+    before = (("status", "todo"), ("priority", "low"), ("category", "work"))
+    after = (("status", "done"), ("priority", "low"))
+    assert {key: delta for key, delta in diff_dimensions(before, after).items() if delta} == {
+        ("status", "todo"): -1, ("status", "done"): 1, ("category", "work"): -1,
+    }
+
+
+async def test_counters_follow_every_write(client, auth_headers):
+    assert (await stats(client, auth_headers))["total"] == 0
+
+    first = (await client.post("/api/v1/tasks", json={
+        "title": "First", "priority": "high", "category": "work",
+    }, headers=auth_headers)).json()
+    second = (await client.post("/api/v1/tasks", json={"title": "Second"}, headers=auth_headers)).json()
+    result = await stats(client, auth_headers)
+    assert result["total"] == 2
+    assert result["by_status"] == {"todo": 2, "in_progress": 0, "done": 0}
+    assert result["by_priority"] == {"low": 0, "medium": 1, "high": 1, "critical": 0}
+    assert result["by_category"] == {"work": 1}
+
+    await client.put(f"/api/v1/tasks/{first['id']}", json={"priority": "low", "category": "home"}, headers=auth_headers)
+    await client.patch(f"/api/v1/tasks/{second['id']}/status", json={"status": "in_progress"}, headers=auth_headers)
+    result = await stats(client, auth_headers)
+    assert result["by_status"] == {"todo": 1, "in_progress": 1, "done": 0}
+    assert result["by_priority"] == {"low": 1, "medium": 1, "high": 0, "critical": 0}
+    # Emptied buckets disappear
+    assert result["by_category"] == {"home": 1}
+
+    await client.delete(f"/api/v1/tasks/{first['id']}", headers=auth_headers)
+    result = await stats(client, auth_headers)
+    assert result["total"] == 1
+    assert result["by_status"] == {"todo": 0, "in_progress": 1, "done": 0}
+    assert result["by_category"] == {}
+
+
+async def test_overdue_and_due_soon(client, auth_headers):
+    now = datetime.utcnow()
+    for title, due, status in [
+        ("Overdue", now - timedelta(days=1), "todo"),
+        ("Done late", now - timedelta(days=1), "done"),
+        ("Soon", now + timedelta(hours=3), "in_progress"),
+        ("Later", now + timedelta(days=30), "todo"),
+    ]:
+        await client.post("/api/v1/tasks", json={
+            "title": title, "due_date": due.isoformat(), "status": status,
+        }, headers=auth_headers)
+
+    result = await stats(client, auth_headers)
+    assert (result["overdue"], result["due_soon"]) == (1, 1)
+
+
+async def test_rebuild_repairs_drift(client, auth_headers):
+    await client.post("/api/v1/tasks", json={"title": "A", "category": "work"}, headers=auth_headers)
+    await client.post("/api/v1/tasks", json={"title": "B", "category": "work"}, headers=auth_headers)
+    user_id = uuid.UUID((await client.get("/api/v1/auth/profile", headers=auth_headers)).json()["id"])
+    expected = await stats(client, auth_headers)
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(TaskStatCounter).where(TaskStatCounter.user_id == user_id).values(count=-3))
+        await db.commit()
+    drifted = await stats(client, auth_headers)
+    # Negative counts are hidden rather than reported
+    assert drifted["total"] == 0 and drifted["by_category"] == {}
+
+    async with AsyncSessionLocal() as db:
+        await rebuild_task_stats(db, user_id)
+    assert await stats(client, auth_headers) == expected
@@ -0,0 +1,29 @@
+"""Task create and update through the async session."""
+from datetime import datetime
+from schemas import TaskCreate, TaskUpdate
+
+
+def test_due_dates_are_stored_as_naive_utc():
+    assert TaskCreate(title="T", due_date="2026-11-05T14:30:00.000Z").due_date == datetime(2026, 11, 5, 14, 30)
+    assert TaskUpdate(due_date="2026-11-05T16:30:00+02:00").due_date == datetime(2026, 11, 5, 14, 30)
+    assert TaskUpdate(due_date="2026-11-05T14:30:00").due_date == datetime(2026, 11, 5, 14, 30)
+    assert TaskUpdate().due_date is None
+
+
+async def test_create_and_update_with_utc_due_date(client, auth_headers):
+    # What the frontend sends: new Date(...).toISOString()
+    response = await client.post(
+        "/api/v1/tasks", json={"title": "Due soon", "due_date": "2026-11-05T14:30:00.000Z"}, headers=auth_headers
+    )
+    assert response.status_code == 201, response.text
+    task = response.json()
+    assert task["due_date"].startswith("2026-11-05T14:30:00")
+
+    response = await client.put(
+        f"/api/v1/tasks/{task['id']}", json={"due_date": "2026-11-06T09:00:00+01:00"}, headers=auth_headers
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["due_date"].startswith("2026-11-06T08:00:00")
+
+    response = await client.get(f"/api/v1/tasks/{task['id']}", headers=auth_headers)
+    assert response.json()["due_date"].startswith("2026-11-06T08:00:00")
@@ -34,8 +34,8 @@ export const AdminDashboard = () => {
 
             setStats(statsRes.data);
             setUsers(usersRes.data);
-            setAuditLogs(logsRes.data);
-            setSecurityEvents(eventsRes.data);
+            setAuditLogs(logsRes.data.items);
+            setSecurityEvents(eventsRes.data.items);
         } catch (error) {
             console.error('Failed to load admin data:', error);
         } finally {
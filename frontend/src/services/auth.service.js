@@ -18,7 +18,8 @@ export const authService = {
 
     async logout() {
         try {
-            await api.post('/auth/logout');
+            const refreshToken = localStorage.getItem('refresh_token');
+            await api.post('/auth/logout', refreshToken ? { refresh_token: refreshToken } : undefined);
         } finally {
             localStorage.removeItem('access_token');
             localStorage.removeItem('refresh_token');